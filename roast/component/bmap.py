@@ -0,0 +1,199 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import os
+import gzip
+import errno
+import lzma
+import hashlib
+import logging
+from collections import namedtuple
+from xml.etree import ElementTree
+from roast.utils import is_file, get_original_path
+
+log = logging.getLogger(__name__)
+
+BmapRange = namedtuple("BmapRange", ["first", "last", "chksum"])
+Bmap = namedtuple("Bmap", ["image_size", "block_size", "checksum_type", "ranges"])
+
+compressed_exts = (".xz", ".gz", ".zst", ".bz2")
+
+
+def _open_image(image: str):
+    if image.endswith(".xz"):
+        return lzma.open(image, "rb")
+    if image.endswith(".gz"):
+        return gzip.open(image, "rb")
+    return open(image, "rb")
+
+
+def bmap_path(image: str) -> str:
+    """This Function returns the bmap file of image, bmaptool names the map
+    of a compressed image after the uncompressed one.
+    """
+    if image.endswith(compressed_exts):
+        image = os.path.splitext(image)[0]
+    return f"{image}.bmap"
+
+
+def bmap_is_current(path: str, image: str) -> bool:
+    """This Function tells whether the map at path still describes image. A
+    map older than the resolved image, or made for another image size, is
+    left over from an earlier build.
+    """
+    if not is_file(image):
+        return True
+    if os.path.getmtime(path) < os.path.getmtime(image):
+        return False
+    if image.endswith(compressed_exts):
+        return True
+    try:
+        return parse_bmap(path).image_size == os.path.getsize(image)
+    except Exception:
+        return False
+
+
+def find_bmap(image: str):
+    """This Function returns the bmap file of image, stale maps are skipped."""
+    for path in (f"{image}.bmap", bmap_path(image)):
+        if is_file(path):
+            if bmap_is_current(path, image):
+                return path
+            log.info(f"{path} does not match {image}, ignoring it")
+    return None
+
+
+def _data_extents(f, image_size):
+    """Yields (start, end) byte ranges holding data, a file system without
+    SEEK_DATA support reports the whole file as data.
+    """
+    if not hasattr(os, "SEEK_DATA"):
+        yield 0, image_size
+        return
+    fd = f.fileno()
+    pos = 0
+    while pos < image_size:
+        try:
+            start = os.lseek(fd, pos, os.SEEK_DATA)
+        except OSError as err:
+            if err.errno == errno.ENXIO:
+                return
+            if pos == 0:
+                yield 0, image_size
+            return
+        end = os.lseek(fd, start, os.SEEK_HOLE)
+        yield start, end
+        pos = end
+
+
+def create_bmap(image: str, block_size: int = 4096) -> Bmap:
+    """This Function computes the block map of an image like bmaptool: the
+    allocated extents of a sparse raw image are mapped, holes are not.
+    Zero blocks written to the image stay mapped, so zeroed file system
+    metadata and partition tables are flashed too. Holes of a compressed
+    image can not be seen, it is mapped as a whole.
+
+    Parameters:
+        image - raw, xz or gz compressed image
+        block_size - granularity of the map
+    """
+    if image.endswith(compressed_exts):
+        digest = hashlib.sha256()
+        image_size = 0
+        with _open_image(image) as f:
+            for data in iter(lambda: f.read(1 << 20), b""):
+                image_size += len(data)
+                digest.update(data)
+        blocks = (image_size + block_size - 1) // block_size
+        ranges = [BmapRange(0, blocks - 1, digest.hexdigest())] if blocks else []
+        return Bmap(image_size, block_size, "sha256", ranges)
+
+    image_size = os.path.getsize(image)
+    blocks = []
+    with open(image, "rb") as f:
+        for start, end in _data_extents(f, image_size):
+            first, last = start // block_size, (end - 1) // block_size
+            if blocks and first <= blocks[-1][1] + 1:
+                blocks[-1][1] = max(blocks[-1][1], last)
+            else:
+                blocks.append([first, last])
+        ranges = []
+        for first, last in blocks:
+            digest = hashlib.sha256()
+            f.seek(first * block_size)
+            remaining = min((last + 1) * block_size, image_size) - first * block_size
+            while remaining:
+                data = f.read(min(remaining, 1 << 20))
+                digest.update(data)
+                remaining -= len(data)
+            ranges.append(BmapRange(first, last, digest.hexdigest()))
+    return Bmap(image_size, block_size, "sha256", ranges)
+
+
+def parse_bmap(path: str) -> Bmap:
+    """This Function reads a bmaptool compatible .bmap file."""
+    root = ElementTree.parse(path).getroot()
+    checksum_type = root.findtext("ChecksumType", "sha1").strip()
+    ranges = []
+    for item in root.iter("Range"):
+        first, _, last = item.text.strip().partition("-")
+        ranges.append(BmapRange(int(first), int(last or first), item.get("chksum")))
+    return Bmap(
+        int(root.findtext("ImageSize")),
+        int(root.findtext("BlockSize")),
+        checksum_type,
+        ranges,
+    )
+
+
+def write_bmap(bmap: Bmap, path: str) -> None:
+    """This Function saves bmap in the bmaptool 2.0 file format."""
+    blocks = (bmap.image_size + bmap.block_size - 1) // bmap.block_size
+    mapped = sum(r.last - r.first + 1 for r in bmap.ranges)
+    lines = [
+        "<?xml version='1.0' ?>",
+        '<bmap version="2.0">',
+        f"    <ImageSize> {bmap.image_size} </ImageSize>",
+        f"    <BlockSize> {bmap.block_size} </BlockSize>",
+        f"    <BlocksCount> {blocks} </BlocksCount>",
+        f"    <MappedBlocksCount> {mapped} </MappedBlocksCount>",
+        f"    <ChecksumType> {bmap.checksum_type} </ChecksumType>",
+        "    <BlockMap>",
+    ]
+    for r in bmap.ranges:
+        span = f"{r.first}-{r.last}" if r.last != r.first else f"{r.first}"
+        lines.append(f'        <Range chksum="{r.chksum}"> {span} </Range>')
+    lines += ["    </BlockMap>", "</bmap>", ""]
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+
+
+def generate_bmap(image: str, block_size: int = 4096):
+    """This Function makes sure a current .bmap file exists next to image, a
+    stale map of an earlier build is regenerated.
+
+    Returns the bmap path, or None when the image can not be scanned.
+    """
+    path = find_bmap(image)
+    if path:
+        return path
+    if not is_file(image) or image.endswith((".zst", ".bz2")):
+        return None
+    path = bmap_path(image)
+    if os.path.islink(path) or is_file(path):
+        # never write through a symlinked map of another image
+        os.remove(path)
+    if os.path.islink(image):
+        # symlinked image names share the map of the real image
+        target = generate_bmap(get_original_path(image), block_size)
+        if target:
+            os.symlink(target, path)
+            return path
+        return None
+    bmap = create_bmap(image, block_size)
+    write_bmap(bmap, path)
+    mapped = sum(r.last - r.first + 1 for r in bmap.ranges) * block_size
+    log.info(f"Generated {path}: {mapped} of {bmap.image_size} bytes mapped")
+    return path
@@ -9,6 +9,8 @@ import inspect
 from time import sleep
 from roast.component.petalinux import petalinux_boot
 from roast.component.basebuild import Basebuild
+from roast.component.xsdb.pool import get_xsdb
+from roast.component.board.bootplan import BootPlan, serial_ready
 from roast.utils import convert_list, is_file, get_base_name, get_files
 from box import Box
 
@@ -90,6 +92,11 @@ class BootZynqmp(BaseBoot):
         self.set_processor()
 
     def _linux_boot(self):
+        if self.config.get("jtag_boot_plan"):
+            self.timings = self.linux_boot_plan().run()
+            self.serialcon.prompt = None
+            self.serialcon.sendline(f"source {hex(self.config['boot_scr_loadaddr'])}")
+            return
         self._load_bitstream()
         self._load_pmufw()
         self._load_fsbl()
@@ -109,6 +116,80 @@ class BootZynqmp(BaseBoot):
         self.serialcon.prompt = None
         self.serialcon.sendline(f"source {hex(self.config['boot_scr_loadaddr'])}")
 
+    def linux_boot_plan(self) -> BootPlan:
+        """This Function describes the zynqmp JTAG linux boot as a BootPlan.
+
+        Fixed sleeps of the legacy sequence are replaced by waits on serial
+        markers, kernel, rootfs and boot script are streamed in one batch.
+        """
+        plan = BootPlan(self.xsdbcon, self.serialcon)
+        if self.config.get("is_rfdc_board"):
+            plan.add("bitstream", action=self._load_bitstream)
+        elif self.config.get("load_bitstream"):
+            plan.add("bitstream", file=f"{self.images_dir}/system.bit")
+        plan.add("pmu_init", target=self.proc["PSU"], post=["mwr 0xffca0038 0x1ff"])
+        plan.add(
+            "pmufw",
+            target=self.proc["MB_PMU"],
+            file=f"{self.images_dir}/pmufw.elf",
+            post=["con"],
+        )
+        plan.add(
+            "fsbl",
+            target=self.proc["a53_0"],
+            pre=["rst -proc -clear-registers"],
+            file=f"{self.images_dir}/zynqmp_fsbl.elf",
+            post=["con"],
+            ready=serial_ready(
+                self.config.get(
+                    "fsbl_ready_marker", "(?i)jtag boot mode|Exit from FSBL"
+                ),
+                timeout=2,
+                required=False,
+            ),
+        )
+        plan.add(
+            "devicetree",
+            pre=["stop"],
+            file=f"{self.images_dir}/{self.config['system_dtb']}",
+            addr=self.config["dtb_loadaddr"],
+            timeout=400,
+        )
+        plan.add("uboot", file=f"{self.images_dir}/u-boot.elf")
+        plan.add(
+            "atf",
+            file=f"{self.images_dir}/bl31.elf",
+            post=["con"],
+            ready=lambda: uboot_login(self.serialcon),
+        )
+        plan.add("halt", pre=["stop"])
+        plan.add(
+            "kernel",
+            file=f"{self.images_dir}/Image",
+            addr=self.config["kernel_loadaddr"],
+            timeout=400,
+        )
+        plan.add(
+            "rootfs",
+            file=self.config["rootfs_path"],
+            addr=self.config["rootfs_loadaddr"],
+            timeout=1800,
+        )
+        plan.add(
+            "boot_scr",
+            file=self.config["boot_scr_path"],
+            addr=self.config["boot_scr_loadaddr"],
+            timeout=400,
+        )
+        plan.add(
+            "resume",
+            pre=["con", "disconnect"],
+            ready=serial_ready(
+                "(ZynqMP>|Zynq>|U-Boot>|Versal> )", timeout=10, required=False, send=""
+            ),
+        )
+        return plan
+
     def _uboot_boot(self):
         self._load_bitstream()
         self._load_pmufw()
@@ -158,9 +239,9 @@ class BootZynqmp(BaseBoot):
             self.load_bitstream(f"{self.images_dir}/system.bit")
 
     def _validate_address(self, addr_value):
+        reg_values = self.xsdbcon.read_many(list(addr_value))
         for addr, value in addr_value.items():
-            reg_value = self.xsdbcon.read(addr)
-            assert hex(int(reg_value[0])) == value, "ERROR: Register value mismatch"
+            assert reg_values[addr] == int(value, 16), "ERROR: Register value mismatch"
 
     def _load_kernel(self):
         self.load_kernel(f"{self.images_dir}/Image", self.config["kernel_loadaddr"])
@@ -565,6 +646,10 @@ def linux(board, timeout=500, expected_msg="Total PLM Boot Time") -> None:
     load_interface = config["load_interface"]
     variant = config["platform"]
 
+    # Lease a pooled session when the board was set up without one
+    if not xsdbcon and config.get("xsdb_pool") and load_interface in ("tcl", "images"):
+        xsdbcon = board.xsdb = get_xsdb(config, hwserver=config.get("systest_host"))
+
     if load_interface == "tcl":
         xsdbcon.run_tcl(config["linux_run_tcl"])
         if config.get("tcl_args"):
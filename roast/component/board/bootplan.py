@@ -0,0 +1,206 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import time
+import logging
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+BootStage = namedtuple(
+    "BootStage",
+    ["name", "target", "file", "addr", "pre", "post", "ready", "timeout", "action"],
+)
+BootReady = namedtuple(
+    "BootReady", ["console", "expected", "timeout", "required", "send"]
+)
+StageTiming = namedtuple("StageTiming", ["name", "load", "wait"])
+
+
+def serial_ready(expected, timeout=200, required=True, send=None) -> BootReady:
+    """This Function describes a wait for a pattern on the serial console.
+
+    Parameters:
+        expected - pattern or list of patterns to expect
+        timeout - seconds to wait for the pattern
+        required - raise when the pattern is not seen, otherwise only warn
+        send - optional line sent before waiting
+    """
+    return BootReady("serial", expected, timeout, required, send)
+
+
+def xsdb_ready(state="Running", timeout=200, required=True) -> BootReady:
+    """This Function describes a wait for the selected xsdb target state.
+
+    Parameters:
+        state - regex matched against the xsdb target state
+        timeout - seconds to wait for the state
+        required - raise when the state is not reached, otherwise only warn
+    """
+    return BootReady("xsdb", state, timeout, required, None)
+
+
+class BootPlan:
+    """This class runs a JTAG boot sequence described as a list of stages.
+
+    Every stage selects its target, runs its pre commands, downloads its file
+    and runs its post commands in one xsdb round-trip, then waits for its
+    readiness condition instead of sleeping. Consecutive data payloads are
+    streamed with one batched "dow -data" sequence. Load and wait time of each
+    stage are recorded in timings.
+
+    >>> Usage:
+        plan = BootPlan(xsdbcon, serialcon)
+        plan.add("fsbl", target="a53_0", file="zynqmp_fsbl.elf", post=["con"],
+                 ready=serial_ready("Exit from FSBL", timeout=5, required=False))
+        plan.add("kernel", file="Image", addr=0x200000, timeout=400)
+        plan.add("rootfs", file="rootfs.cpio.gz.u-boot", addr=0x4000000)
+        plan.run()
+    """
+
+    def __init__(self, xsdbcon, serialcon, stages=None):
+        self.xsdbcon = xsdbcon
+        self.serialcon = serialcon
+        self.stages = list(stages or [])
+        self.timings = []
+
+    def __len__(self):
+        return len(self.stages)
+
+    def add(
+        self,
+        name,
+        target=None,
+        file=None,
+        addr=None,
+        pre=(),
+        post=(),
+        ready=None,
+        timeout=200,
+        action=None,
+    ):
+        """This Function appends a stage to the plan.
+
+        Parameters:
+            name - stage name used in the timing report
+            target - xsdb target to select before loading
+            file - elf, bitstream or data file to download
+            addr - load address, file is downloaded as data when set
+            pre - xsdb commands run before the download
+            post - xsdb commands run after the download
+            ready - BootReady or callable to wait on once the stage is loaded
+            timeout - seconds allowed for the download
+            action - callable loading the stage itself, run before its xsdb
+                     commands and timed as part of the load
+        """
+        self.stages.append(
+            BootStage(
+                name,
+                target,
+                file,
+                addr,
+                tuple(pre),
+                tuple(post),
+                ready,
+                timeout,
+                action,
+            )
+        )
+        return self
+
+    @staticmethod
+    def _is_data(stage) -> bool:
+        return (
+            stage.addr is not None
+            and stage.target is None
+            and not stage.pre
+            and not stage.post
+            and stage.ready is None
+            and stage.action is None
+        )
+
+    def _groups(self):
+        group = []
+        for stage in self.stages:
+            if group and not (self._is_data(group[-1]) and self._is_data(stage)):
+                yield group
+                group = []
+            group.append(stage)
+        if group:
+            yield group
+
+    def _load(self, stages) -> None:
+        batch = self.xsdbcon.batch(timeout=sum(stage.timeout for stage in stages))
+        for stage in stages:
+            if stage.action is not None:
+                # only data stages share a batch, an action stage is alone
+                stage.action()
+            if stage.target is not None:
+                batch.targets(stage.target)
+            for cmd in stage.pre:
+                batch.add(cmd)
+            if stage.file is None:
+                pass
+            elif stage.addr is not None:
+                batch.dow(stage.file, hex(int(stage.addr)))
+            elif stage.file.endswith(".bit"):
+                batch.fpga(stage.file)
+            else:
+                batch.dow(stage.file)
+            for cmd in stage.post:
+                batch.add(cmd)
+        if len(batch):
+            batch.run()
+
+    def _wait(self, stage) -> None:
+        ready = stage.ready
+        if ready is None:
+            return
+        if callable(ready):
+            ready()
+            return
+        try:
+            if ready.console == "serial":
+                if ready.send is not None:
+                    self.serialcon.sendline(ready.send)
+                self.serialcon.expect(
+                    expected=ready.expected,
+                    wait_for_prompt=False,
+                    timeout=ready.timeout,
+                )
+            elif ready.console == "xsdb":
+                self.xsdbcon.wait_state(ready.expected, timeout=ready.timeout)
+            else:
+                raise Exception(f"Unknown boot ready console {ready.console}")
+        except Exception as err:
+            if ready.required:
+                raise
+            log.warning(f"{stage.name}: {ready.expected} not seen, continuing ({err})")
+
+    def run(self) -> list:
+        """This Function runs all stages and returns their StageTiming."""
+        self.timings = []
+        for stages in self._groups():
+            name = "+".join(stage.name for stage in stages)
+            start = time.monotonic()
+            self._load(stages)
+            loaded = time.monotonic()
+            self._wait(stages[-1])
+            self.timings.append(
+                StageTiming(name, loaded - start, time.monotonic() - loaded)
+            )
+        self.report()
+        return self.timings
+
+    def report(self) -> str:
+        """This Function logs and returns the per stage load time report."""
+        lines = [f"{'stage':<32} {'load(s)':>9} {'wait(s)':>9}"]
+        for timing in self.timings:
+            lines.append(f"{timing.name:<32} {timing.load:>9.2f} {timing.wait:>9.2f}")
+        total = sum(timing.load + timing.wait for timing in self.timings)
+        lines.append(f"{'total':<32} {total:>19.2f}")
+        report = "\n".join(lines)
+        log.info(f"JTAG boot stage timings:\n{report}")
+        return report
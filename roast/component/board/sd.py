@@ -3,10 +3,23 @@
 # SPDX-License-Identifier: MIT
 #
 
+import os
+import re
 import socket
 import time
+import logging
+from collections import namedtuple
 from roast.serial import Serial
-from roast.component.xsdb.xsdb import Xsdb
+from roast.component.xsdb.pool import get_xsdb
+from roast.testlibs.linux.dmesg import get_dmesg_log
+from roast.testlibs.linux.baselinux import write_lines
+from roast.component.bmap import find_bmap, parse_bmap, create_bmap
+
+log = logging.getLogger(__name__)
+
+FlashResult = namedtuple("FlashResult", ["image", "size", "duration", "sha256"])
+
+decompressors = {".xz": "xzcat", ".gz": "zcat", ".zst": "zstdcat"}
 
 
 def is_sd(board):
@@ -14,13 +27,9 @@ def is_sd(board):
     Parameters:
         board : object of Board class
     """
-    linuxcons = board.serial
-    linuxcons.runcmd("ls /var/log", expected="\r\n")
-    if "dmesg" not in linuxcons.output():
-        linuxcons.runcmd("dmesg >> /var/log/dmesg")
-    linuxcons.runcmd("cat /var/log/dmesg | grep 'sdhci' | wc -l", expected="\r\n")
-    sdstring = linuxcons.output()
-    if int(sdstring) >= 1:
+    dmesg = get_dmesg_log(board.serial)
+    dmesg.update()
+    if dmesg.search("sdhci"):
         return True
     else:
         return False
@@ -115,6 +124,158 @@ def copy_sd_boot_artifacts(board):
     linuxcons.runcmd(f"sync")
 
 
+def decompress_cmd(image):
+    """This method returns the command streaming image to stdout, compressed
+    images (xz, gz, zst) are decompressed on the fly.
+    """
+    for ext, cmd in decompressors.items():
+        if image.endswith(ext):
+            return cmd
+    return "cat"
+
+
+def stream_flash(linuxcons, src, dest, timeout, bs="32M", verify=True):
+    """This method streams src into dest on target and verifies the write.
+
+    The decompressed stream is hashed with sha256 while it is written, dd
+    statistics are printed every 10 seconds and the written range is read
+    back from dest and hashed again when verify is set.
+
+    Parameters:
+        linuxcons : board.serial object
+        src : image path on target, e.g. /nfsroot/petalinux-sdimage.wic.xz
+        dest : block device to write
+        bs : dd block size
+        verify : compare sha256 of the source stream and the device readback
+    """
+    fifo = "/tmp/roast_flash"
+    cmdlist = [
+        f"rm -f {fifo}.tee {fifo}.cnt; mkfifo {fifo}.tee {fifo}.cnt",
+        f"tee {fifo}.cnt < {fifo}.tee | sha256sum > {fifo}.sha256 &",
+        f"wc -c < {fifo}.cnt > {fifo}.size &",
+    ]
+    linuxcons.runcmd_list(cmdlist)
+    start = time.time()
+    linuxcons.runcmd(
+        f"{decompress_cmd(src)} {src} | tee {fifo}.tee | "
+        f"dd of={dest} bs={bs} conv=fsync & DD=$!; "
+        "while kill -0 $DD 2>/dev/null; do sleep 10; kill -USR1 $DD 2>/dev/null; done; "
+        "wait",
+        timeout=timeout,
+    )
+    duration = time.time() - start
+    linuxcons.runcmd(f"cat {fifo}.size", expected="\r\n")
+    size = int(linuxcons.output().split()[-1])
+    linuxcons.runcmd(f"cat {fifo}.sha256", expected="\r\n")
+    src_sha = re.search(r"[0-9a-f]{64}", linuxcons.output()).group(0)
+    log.info(
+        f"Flashed {src} to {dest}: {size} bytes in {duration:.1f}s "
+        f"({size / max(duration, 1e-3) / (1 << 20):.1f} MB/s)"
+    )
+    if verify:
+        linuxcons.runcmd("sync; echo 3 > /proc/sys/vm/drop_caches")
+        linuxcons.runcmd(
+            f"dd if={dest} bs={bs} 2>/dev/null | head -c {size} | sha256sum",
+            expected="\r\n",
+            timeout=timeout,
+        )
+        dest_sha = re.search(r"[0-9a-f]{64}", linuxcons.output()).group(0)
+        if dest_sha != src_sha:
+            raise Exception(
+                f"sha256 mismatch after flashing {src}: {src_sha} != {dest_sha}"
+            )
+    linuxcons.runcmd(f"rm -f {fifo}.*")
+    return FlashResult(src, size, round(duration, 2), src_sha)
+
+
+def bmap_flash(linuxcons, src, dest, bmap, timeout, verify=True, bs="4M"):
+    """This method writes only the mapped block ranges of src into dest.
+
+    The ranges are shipped to the target as a file and written there by a
+    dd loop with byte offsets, raw images are read with skip, compressed
+    images are streamed and the unmapped gaps discarded. With verify each
+    range is read back from dest and compared against the bmap checksum.
+
+    Parameters:
+        linuxcons : board.serial object
+        src : image path on target
+        dest : block device to write
+        bmap : Bmap of the uncompressed image
+        bs : dd block size used for the ranges
+    """
+    ranges = "/tmp/roast_bmap.ranges"
+    errors = "/tmp/roast_bmap.err"
+    linuxcons.runcmd(f"rm -f {errors}")
+    lines = []
+    for r in bmap.ranges:
+        offset = r.first * bmap.block_size
+        size = min((r.last + 1) * bmap.block_size, bmap.image_size) - offset
+        lines.append(f"{offset} {size} {r.chksum}")
+    write_lines(linuxcons, ranges, lines)
+
+    mapped = sum(int(line.split()[1]) for line in lines)
+    start = time.time()
+    write = (
+        f"of={dest} bs={bs} iflag=fullblock,count_bytes count=$size "
+        "oflag=seek_bytes seek=$offset conv=notrunc 2>/dev/null"
+    )
+    decompress = decompress_cmd(src)
+    if decompress == "cat":
+        cmd = (
+            f"while read offset size sum; do "
+            f"dd if={src} iflag=skip_bytes skip=$offset {write}; "
+            f"done < {ranges}; sync"
+        )
+    else:
+        cmd = (
+            f"{decompress} {src} | {{ pos=0; while read offset size sum <&3; do "
+            f"dd of=/dev/null bs={bs} iflag=fullblock,count_bytes "
+            "count=$((offset - pos)) 2>/dev/null; "
+            f"dd {write}; "
+            f"pos=$((offset + size)); done 3< {ranges}; cat > /dev/null; }}; sync"
+        )
+    linuxcons.runcmd(cmd, timeout=timeout)
+    duration = time.time() - start
+    log.info(
+        f"Flashed {src} to {dest} using bmap: {mapped} of {bmap.image_size} bytes "
+        f"in {duration:.1f}s ({mapped / max(duration, 1e-3) / (1 << 20):.1f} MB/s)"
+    )
+
+    if verify and bmap.ranges[0].chksum:
+        linuxcons.runcmd("echo 3 > /proc/sys/vm/drop_caches")
+        linuxcons.runcmd(
+            f"while read offset size sum; do "
+            f'[ "$(dd if={dest} bs={bs} iflag=skip_bytes,count_bytes '
+            f"skip=$offset count=$size 2>/dev/null | "
+            f'{bmap.checksum_type}sum | cut -d\' \' -f1)" = "$sum" ] '
+            f"|| echo $offset >> {errors}; done < {ranges}",
+            timeout=timeout,
+        )
+        linuxcons.runcmd(f"cat {errors} 2>/dev/null | wc -l", expected="\r\n")
+        failed = int(linuxcons.output().split()[-1])
+        if failed:
+            raise Exception(f"bmap checksum mismatch in {failed} ranges of {src}")
+    linuxcons.runcmd(f"rm -f {ranges} {errors}")
+    return FlashResult(src, mapped, round(duration, 2), None)
+
+
+def host_bmap(board, image):
+    """This method returns the Bmap of image from the .bmap file produced by
+    the build, raw images without a current one are scanned on the host. None is
+    returned when the image is not reachable from the host.
+    """
+    images_path = board.config.get("images_path") or board.config.get("imagesDir")
+    if not images_path or not board.config.get("sd_flash_bmap", True):
+        return None
+    path = find_bmap(f"{images_path}/{image}")
+    if path:
+        return parse_bmap(path)
+    host_image = f"{images_path}/{image}"
+    if decompress_cmd(image) == "cat" and os.path.isfile(host_image):
+        return create_bmap(host_image)
+    return None
+
+
 def flash_binaries(board, sd_device, binaries, timeout, bs="32M"):
     """This method performs flashing wic image to SD/eMMC from nfsmount based on the directory path given in
     systest_nw_shared_path.
@@ -123,21 +284,27 @@ def flash_binaries(board, sd_device, binaries, timeout, bs="32M"):
         sd_device : the return value of find_sdmount_point
         binaries : List of binaries to be flased
         bs : block size
+        sd_flash_verify : config option, readback verification (default True)
+        sd_flash_bmap : config option, write only the ranges mapped by the
+                        image bmap when available (default True)
 
     >>> Usage:
         flash_binaries(board, sd_device, config['petalinux-sdimage.wic'], bs)
     """
 
     linuxcons = board.serial
+    verify = board.config.get("sd_flash_verify", True)
+    results = []
     for image in binaries:
-        if image.endswith(".xz"):
-            linuxcons.runcmd(
-                f"xzcat /nfsroot/{image} | dd of={sd_device} bs={bs}", timeout=timeout
-            )
+        src = f"/nfsroot/{image}"
+        bmap = host_bmap(board, image)
+        if bmap and bmap.ranges:
+            results.append(bmap_flash(linuxcons, src, sd_device, bmap, timeout, verify))
         else:
-            linuxcons.runcmd(f"dd if=/nfsroot/{image} of={sd_device}", timeout=timeout)
+            results.append(stream_flash(linuxcons, src, sd_device, timeout, bs, verify))
     umount(linuxcons, "/nfsroot")
     linuxcons.runcmd("df -h")
+    return results
 
 
 def fat32(board, sd_device, partition_size="500"):
@@ -237,21 +404,20 @@ def ext(board, sd_device, partition="ext4", partition_size="500", timeout=900):
 
 
 def copy_rootfs(board, timeout):
-    """This method copies rootfs tar to /mnt and then untar it.
+    """This method extracts the rootfs archive from /nfsroot straight into /mnt.
     Parameters:
         board : object of Board class
         rootfs : rootfs filename
     >>> Usage:
         rootfs = "rootfs.tar.gz"
     """
+    rootfs = board.config["rootfs"]
+    src = f"{decompress_cmd(rootfs)} /nfsroot/{rootfs}"
     board.serial.runcmd("cd /mnt")
-    board.serial.runcmd(f"cp /nfsroot/{board.config['rootfs']} /mnt", timeout=timeout)
-    if board.config["rootfs"].endswith("cpio.gz"):
-        board.serial.runcmd(f"gzip -d {board.config['rootfs']}", timeout=timeout)
-        rootfs_cpio = re.sub(r"\.gz$", "", board.config["rootfs"])
-        board.serial.runcmd(f"cpio -idm < {rootfs_cpio}", timeout=timeout)
+    if re.search(r"\.cpio(\.\w+)?$", rootfs):
+        board.serial.runcmd(f"{src} | cpio -idm", timeout=timeout)
     else:
-        board.serial.runcmd(f"tar xvf {board.config['rootfs']}", timeout=timeout)
+        board.serial.runcmd(f"{src} | tar xf - -C /mnt", timeout=timeout)
 
 
 def zynqmp_bootmode_sd(board, boot_device):
@@ -294,7 +460,7 @@ def sd_boot(board, boot_device="SD"):
     board.serial.mode = True
     board.systest.reboot()
     if not board.xsdb:
-        board.xsdb = Xsdb(board.config, hwserver=board.config["systest_host"])
+        board.xsdb = get_xsdb(board.config, hwserver=board.config["systest_host"])
     if "port" in board.config:
         board.serial = Serial(
             "systest", board.config, mode=True, port=board.config["port"]
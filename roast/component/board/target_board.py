@@ -8,6 +8,7 @@ import socket
 import logging
 from roast.component.board.board import BoardBase
 from roast.component.xsdb.xsdb import Xsdb
+from roast.component.xsdb.pool import get_xsdb, release_xsdb
 from roast.serial import Serial
 from roast.xexpect import Xexpect
 from roast.component.relay import Relay
@@ -58,13 +59,28 @@ class TargetBoard(BoardBase):
                     self.config, hostname=self.host, setup_hwserver=True
                 )
             if self.invoke_xsdb:
-                self.xsdb = Xsdb(self.config, hwserver=self.host)
+                self.xsdb = self._get_xsdb()
             self.isLive = True
         else:
             self.serial.exit()
             time.sleep(4)
             if self.invoke_xsdb:
-                self.xsdb = Xsdb(self.config, hwserver=self.host)
+                self.xsdb = self._get_xsdb()
+
+    def _get_xsdb(self):
+        # Lease a warm session from the shared pool when enabled
+        if self.config.get("xsdb_pool"):
+            self.release_xsdb()
+            return get_xsdb(self.config, hwserver=self.host)
+        return Xsdb(self.config, hwserver=self.host)
+
+    def release_xsdb(self) -> None:
+        """This Function hands a pooled xsdb session back to the pool, the
+        next boot flow leases a session again.
+        """
+        if self.config.get("xsdb_pool") and self.xsdb:
+            release_xsdb(self.xsdb)
+            self.xsdb = None
 
     def _set_nw_target(self) -> None:
         self.ip = self.config["target_ip"]
@@ -102,6 +118,7 @@ class TargetBoard(BoardBase):
             )
 
     def reset(self) -> None:
+        self.release_xsdb()
         if self.isLive:
             if self.interface == "host_target":
                 self.relay.reconnect()
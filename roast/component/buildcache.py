@@ -0,0 +1,211 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import subprocess
+from filelock import FileLock
+from roast.utils import is_dir, is_file, mkdir, remove, get_original_path
+
+log = logging.getLogger(__name__)
+
+
+def _as_data(value):
+    if hasattr(value, "as_dict"):
+        value = value.as_dict()
+    if isinstance(value, dict):
+        return {str(k): _as_data(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_as_data(v) for v in value]
+    return value
+
+
+def hash_path(path: str, digest=None):
+    """This Function feeds a file or a directory tree into a sha256 digest.
+
+    Parameters:
+        path - file or directory, directories are walked in sorted order
+        digest - hashlib object to update, a new sha256 is created when None
+    """
+    digest = digest or hashlib.sha256()
+    path = get_original_path(path)
+    if is_dir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file = os.path.join(root, name)
+                digest.update(os.path.relpath(file, path).encode())
+                hash_path(file, digest)
+    else:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest
+
+
+def tree_size(path: str) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            file = os.path.join(root, name)
+            if not os.path.islink(file):
+                size += os.path.getsize(file)
+    return size
+
+
+class BuildCache:
+    """This class is a content addressed on-disk cache of build output trees.
+
+    Entries are stored as <cache_dir>/<key>/ with a <key>.json manifest whose
+    mtime tracks the last use. The least recently used entries are evicted
+    once the cache grows beyond max_size bytes.
+
+    >>> Usage:
+        cache = BuildCache("/scratch/plnx_cache", max_size=100 << 30)
+        key = cache.key({"xsa": "design.xsa", "configs": plnx_configs})
+        if not cache.restore(key, "images/linux"):
+            build()
+            cache.store(key, "images/linux")
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = 100 << 30, link="reflink"):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.link = link
+        mkdir(cache_dir)
+        self.lock = FileLock(os.path.join(cache_dir, ".lock"))
+
+    def key(self, inputs: dict, files=()) -> str:
+        """This Function returns the cache key for a set of build inputs.
+
+        Parameters:
+            inputs - values identifying the build
+            files - keys of inputs holding file or directory paths, their
+                    content is hashed along with the path
+        """
+        digest = hashlib.sha256()
+        for name in sorted(inputs):
+            value = _as_data(inputs[name])
+            digest.update(name.encode())
+            digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+            if name in files:
+                for path in value if isinstance(value, list) else [value]:
+                    if path and (is_file(path) or is_dir(path)):
+                        hash_path(path, digest)
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _manifest(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def entries(self) -> list:
+        """This Function returns (last_used, size, key) of all cached entries."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                manifest = os.path.join(self.cache_dir, name)
+                with open(manifest) as f:
+                    size = json.load(f)["size"]
+                entries.append((os.path.getmtime(manifest), size, name[:-5]))
+        return sorted(entries)
+
+    def has(self, key: str) -> bool:
+        return is_file(self._manifest(key))
+
+    def _copy_tree(self, src: str, dest: str) -> None:
+        if self.link == "hardlink":
+            shutil.copytree(src, dest, symlinks=True, copy_function=self._hardlink)
+        elif self.link == "reflink":
+            mkdir(dest)
+            subprocess.run(["cp", "-a", "--reflink=auto", f"{src}/.", dest], check=True)
+        else:
+            shutil.copytree(src, dest, symlinks=True)
+
+    @staticmethod
+    def _hardlink(src, dest):
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copy2(src, dest)
+
+    def restore(self, key: str, dest: str) -> bool:
+        """This Function populates dest from the cache entry of key.
+
+        Parameters:
+            key - cache key from key()
+            dest - directory replaced by the cached tree
+
+        Returns True on a cache hit.
+        """
+        with self.lock:
+            if not self.has(key):
+                log.info(f"Build cache miss for {key}")
+                return False
+            os.utime(self._manifest(key))
+        if is_dir(dest):
+            remove(dest)
+        self._copy_tree(self._entry(key), dest)
+        log.info(f"Build cache hit for {key}, restored {dest}")
+        return True
+
+    def store(self, key: str, src: str, inputs=None) -> None:
+        """This Function adds the tree src to the cache as entry key.
+
+        Parameters:
+            key - cache key from key()
+            src - directory to cache
+            inputs - optional description of the inputs saved in the manifest
+        """
+        tmp = os.path.join(self.cache_dir, f".{key}.{os.getpid()}")
+        if is_dir(tmp):
+            remove(tmp)
+        shutil.copytree(src, tmp, symlinks=True)
+        size = tree_size(tmp)
+        with self.lock:
+            if self.has(key):
+                remove(tmp)
+                return
+            if is_dir(self._entry(key)):
+                remove(self._entry(key))
+            os.rename(tmp, self._entry(key))
+            if self.link == "hardlink":
+                # restored trees share inodes, protect entries from writes
+                for root, _, files in os.walk(self._entry(key)):
+                    for name in files:
+                        file = os.path.join(root, name)
+                        if not os.path.islink(file):
+                            os.chmod(file, os.stat(file).st_mode & ~0o222)
+            with open(self._manifest(key), "w") as f:
+                json.dump(
+                    {"size": size, "created": time.time(), "inputs": _as_data(inputs)},
+                    f,
+                    default=str,
+                )
+            log.info(f"Stored {src} in build cache as {key} ({size} bytes)")
+            self._evict(keep=key)
+
+    def _evict(self, keep=None) -> None:
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_size:
+                break
+            if key == keep:
+                continue
+            log.info(f"Evicting build cache entry {key} ({size} bytes)")
+            os.remove(self._manifest(key))
+            remove(self._entry(key))
+            total -= size
+
+    def evict(self) -> None:
+        """This Function trims the cache down to max_size."""
+        with self.lock:
+            self._evict()
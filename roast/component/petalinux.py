@@ -5,6 +5,7 @@
 
 import os
 import sys
+import time
 import re
 import atexit
 import shutil
@@ -15,6 +16,9 @@ from typing import Optional
 from roast.utils import *  # pylint: disable=unused-wildcard-import
 from roast.xexpect import Xexpect
 from roast.component.basebuild import Basebuild
+from roast.component.buildcache import BuildCache
+from roast.component.bmap import generate_bmap
+from roast.component.sstate import SstateManager
 
 log = logging.getLogger(__name__)
 
@@ -91,6 +95,9 @@ class Petalinux(Basebuild):
         self.proj_dir = f"{self.workDir}/{self.plnx_proj}"
         self.petalinux_images = f"{self.proj_dir}/images"
         self.qemu_boot = False
+        self.sstate = SstateManager(config) if SstateManager.enabled(config) else None
+        self.sstate_stats = None
+        self.build_start = 0
         # Acquire bash console.
         self.runner = Xexpect(log, exit_nzero_ret=True)
         atexit.register(self.__del__)
@@ -257,6 +264,23 @@ class Petalinux(Basebuild):
         if is_filesystem_nfs(self.proj_dir):
             self.plnx_tmp = self.get_tmp_path()
 
+    def set_sstate_mirrors(self):
+        """This Function points the petalinux project at shared sstate and
+        download directories.
+
+        Parameters:
+            sstate_dir, sstate_dl_dir, sstate_mirror, sstate_dl_mirror
+            (see roast.component.sstate.SstateManager)
+        """
+        if self.sstate:
+            tool_dir = self.plnx_tool
+            if is_file(tool_dir):
+                tool_dir = os.path.dirname(tool_dir)
+            self.sstate.inject(
+                f"{self.proj_dir}/{self.plnxbspconf_file}",
+                search_dirs=[self.proj_dir, tool_dir],
+            )
+
     def get_tmp_path(self):
         with open(f"{self.proj_dir}/{self.project_config}", "r") as read_obj:
             for line in read_obj:
@@ -307,6 +331,7 @@ class Petalinux(Basebuild):
         if self.config.get("plnx_build_timeout", ""):
             timeout = self.config.plnx_build_timeout
 
+        self.build_start = time.time()
         self.runner.runcmd(cmd=str(build_cmd), timeout=timeout)
 
     def set_config(self):
@@ -659,11 +684,61 @@ class Petalinux(Basebuild):
         """This Function can be useful to generate wic image to prepare sd card.
         Parameters:
             wic_args : None (or) --bootfiles "BOOT.BIN boot.scr system.dtb image.ub"
+
+        A .bmap file is generated next to the wic image so it can be flashed
+        sparsely, disable with sd_flash_bmap: False.
         """
         wic_cmd = "petalinux-package --wic"
         if wic_args:
             wic_cmd += f" {wic_args}"
         self.runner.runcmd(cmd=str(wic_cmd), timeout=timeout)
+        if self.config.get("sd_flash_bmap", True):
+            for wic in find_files("*.wic", f"{self.proj_dir}/images/linux"):
+                generate_bmap(wic)
+
+    def build_inputs(self, dtb=None):
+        """This Function returns the inputs which define the petalinux build
+        output, used as build cache key together with the file valued keys.
+        """
+        inputs = {
+            "PLNX_TOOL": get_original_path(self.plnx_tool),
+            "platform": self.config["platform"],
+            "dtb": dtb,
+        }
+        for key in (
+            "plnx_flow",
+            "PLNX_BSP",
+            "plnx",
+            "plnx_configs",
+            "user_apps",
+            "build_sdk",
+            "plnx_package_boot",
+            "sdt_flow",
+        ):
+            inputs[key] = self.config.get(key)
+        if self.config.get("plnx_flow") != "template" and "PLNX_BSP" in self.config:
+            inputs["bsp_file"] = f"{self.bsp_path}/{self.config['PLNX_BSP']}"
+        inputs["apply_patches"] = [
+            itr if is_file(itr) else f"{self.workDir}/{itr}"
+            for value in self.config.get("apply_patches", {}).values()
+            for itr in convert_list(value)
+        ]
+        for key in (
+            "hw_design_path",
+            "sdt_file_path",
+            "plnx_user_dtsi_files",
+            "plnx_user_dtsi_file",
+        ):
+            inputs[key] = self.config.get(key)
+        files = (
+            "bsp_file",
+            "hw_design_path",
+            "sdt_file_path",
+            "apply_patches",
+            "plnx_user_dtsi_files",
+            "plnx_user_dtsi_file",
+        )
+        return inputs, files
 
     def deploy(self):
         """This Function deploy the generated petalinux build images to specfic location
@@ -673,8 +748,18 @@ class Petalinux(Basebuild):
         >>> Usage:
             plnx_artifacts = ['image.ub', 'BOOT.BIN', 'Image', 'system.xsa' ]
             deploy_dir = "<path>"
+
+        The sstate hit rate of the build is kept in self.sstate_stats when
+        shared sstate mirrors are configured.
         """
         ret = True
+        if self.sstate and self.build_start:
+            self.sstate_stats = self.sstate.post_build(
+                self.plnx_tmp or f"{self.proj_dir}/build/tmp",
+                f"{self.proj_dir}/build",
+                since=self.build_start,
+                logs=[f"{self.proj_dir}/build/build.log"],
+            )
         if "deploy_dir" in self.config:
             deploy_dir = self.config["deploy_dir"]
             if not is_dir(deploy_dir):
@@ -923,12 +1008,30 @@ def petalinux_build(config, dtb=None):
 
     plnx_builder = Petalinux(config)
     plnx_builder.configure()
+
+    # restore images from build cache when inputs are unchanged
+    cache = None
+    if config.get("plnx_cache_dir"):
+        cache = BuildCache(
+            config["plnx_cache_dir"],
+            max_size=int(config.get("plnx_cache_max_gb", 100)) << 30,
+            link=config.get("plnx_cache_link", "reflink"),
+        )
+        inputs, files = plnx_builder.build_inputs(dtb)
+        cache_key = cache.key(inputs, files)
+        if cache.restore(cache_key, f"{plnx_builder.petalinux_images}/linux"):
+            plnx_builder.deploy()
+            return True
+
     # create project
     plnx_builder.create_project()
 
     # set tmp path
     plnx_builder.set_tmp_path()
 
+    # use shared sstate and download mirrors
+    plnx_builder.set_sstate_mirrors()
+
     # apply external srcs
     if "plnx" in config:
         plnx_builder.apply_external_component()
@@ -975,6 +1078,9 @@ def petalinux_build(config, dtb=None):
         if config["plnx_package_boot"]:
             plnx_builder.plnx_package_boot(dtb)
 
+    if cache:
+        cache.store(cache_key, f"{plnx_builder.petalinux_images}/linux", inputs)
+
     # deploy images
     plnx_builder.deploy()
 
@@ -0,0 +1,305 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import os
+import re
+import glob
+import time
+import shutil
+import logging
+from typing import List, Union
+from collections import namedtuple
+from filelock import FileLock
+from roast.utils import add_newline, is_dir, is_file, mkdir
+
+log = logging.getLogger(__name__)
+
+SstateStats = namedtuple(
+    "SstateStats", ["wanted", "local", "mirrors", "missed", "current", "hit_rate"]
+)
+
+summary_re = re.compile(
+    r"Sstate summary: Wanted (\d+) Local (\d+) (?:Mirrors|Network) (\d+) "
+    r"Missed (\d+) Current (\d+)"
+)
+# bitbake before 1.50 reports local and mirror hits together as Found
+old_summary_re = re.compile(
+    r"Sstate summary: Wanted (\d+) Found (\d+) Missed (\d+) Current (\d+)"
+)
+bb_version_re = re.compile(r"^__version__\s*=\s*[\"'](\d+)\.(\d+)", re.M)
+# first bitbake release parsing the ":" override syntax (honister)
+override_syntax_version = (1, 51)
+skip_dirs = {".git", ".repo", "tmp", "sstate-cache", "downloads", "build"}
+
+
+def parse_sstate_summary(output: str):
+    """This Function sums up all bitbake "Sstate summary" lines of a build log.
+
+    Parameters:
+        output - bitbake console output or log file content
+
+    Returns SstateStats, or None when the output holds no summary. Hits
+    of the older "Wanted N Found M" summary are counted as local.
+    """
+    summaries = summary_re.findall(output)
+    summaries += [
+        (wanted, found, "0", missed, current)
+        for wanted, found, missed, current in old_summary_re.findall(output)
+    ]
+    if not summaries:
+        return None
+    wanted, local, mirrors, missed, current = (
+        sum(int(summary[i]) for summary in summaries) for i in range(5)
+    )
+    hit_rate = round(100 * (local + mirrors) / wanted, 2) if wanted else 100.0
+    return SstateStats(wanted, local, mirrors, missed, current, hit_rate)
+
+
+def bitbake_version(search_dirs, max_depth=5):
+    """This Function finds the bitbake checkout below search_dirs and returns
+    its (major, minor) version, or None when no bitbake is found.
+    """
+    for search_dir in search_dirs:
+        if not search_dir or not is_dir(search_dir):
+            continue
+        base_depth = search_dir.rstrip(os.sep).count(os.sep)
+        for root, dirs, _ in os.walk(search_dir):
+            init = os.path.join(root, "bitbake", "lib", "bb", "__init__.py")
+            if is_file(init):
+                with open(init, errors="ignore") as f:
+                    match = bb_version_re.search(f.read())
+                if match:
+                    return int(match.group(1)), int(match.group(2))
+            if root.count(os.sep) - base_depth >= max_depth:
+                dirs[:] = []
+            else:
+                dirs[:] = [d for d in dirs if d not in skip_dirs]
+    return None
+
+
+class SstateManager:
+    """This class points bitbake based builders at shared sstate and download
+    directories and keeps them healthy.
+
+    Parameters:
+        sstate_dir - shared SSTATE_DIR used by the build
+        sstate_dl_dir - shared DL_DIR used by the build
+        sstate_mirror - read only sstate mirror path or url (SSTATE_MIRRORS)
+        sstate_dl_mirror - download mirror path or url (PREMIRRORS)
+        sstate_seed - copy new sstate objects of the build into sstate_mirror
+        sstate_max_gb - size budget of sstate_dir, oldest objects are pruned first
+        sstate_max_age_days - objects not accessed for this long are pruned
+        sstate_override_syntax - True for "PREMIRRORS:prepend", False for
+                                 "PREMIRRORS_prepend", detected from the
+                                 bitbake version by default
+
+    >>> Usage:
+        sstate = SstateManager(config)
+        sstate.inject(f"{build_dir}/conf/auto.conf")
+        <bitbake>
+        sstate.stats(tmp_dir, since=start)
+        sstate.prune()
+    """
+
+    def __init__(self, config):
+        self.sstate_dir = config.get("sstate_dir")
+        self.dl_dir = config.get("sstate_dl_dir")
+        self.mirror = config.get("sstate_mirror")
+        self.dl_mirror = config.get("sstate_dl_mirror")
+        self.seed_mirror = config.get("sstate_seed", False)
+        self.max_size = int(float(config.get("sstate_max_gb", 0)) * (1 << 30))
+        self.max_age = float(config.get("sstate_max_age_days", 0)) * 86400
+        self.override_syntax = config.get("sstate_override_syntax")
+
+    @staticmethod
+    def enabled(config) -> bool:
+        return any(
+            config.get(key)
+            for key in (
+                "sstate_dir",
+                "sstate_dl_dir",
+                "sstate_mirror",
+                "sstate_dl_mirror",
+            )
+        )
+
+    @staticmethod
+    def _url(path: str) -> str:
+        return path if "://" in path else f"file://{path}"
+
+    def conf_lines(self, override_syntax=True) -> list:
+        """This Function returns the bitbake settings for the shared mirrors.
+
+        Parameters:
+            override_syntax - use the ":" override syntax of honister and newer
+        """
+        lines = []
+        if self.sstate_dir:
+            mkdir(self.sstate_dir)
+            lines.append(f'SSTATE_DIR = "{self.sstate_dir}"')
+        if self.dl_dir:
+            mkdir(self.dl_dir)
+            lines.append(f'DL_DIR = "{self.dl_dir}"')
+        if self.mirror:
+            lines.append(
+                f'SSTATE_MIRRORS = "file://.* {self._url(self.mirror)}/PATH;downloadfilename=PATH"'
+            )
+        if self.dl_mirror:
+            url = self._url(self.dl_mirror)
+            mirrors = " ".join(
+                f"{scheme}://.*/.* {url}/ \\n"
+                for scheme in ("git", "ftp", "http", "https")
+            )
+            prepend = "PREMIRRORS:prepend" if override_syntax else "PREMIRRORS_prepend"
+            lines.append(f'{prepend} = "{mirrors}"')
+            lines.append('BB_GENERATE_MIRROR_TARBALLS = "1"')
+        return lines
+
+    def uses_override_syntax(self, search_dirs=()) -> bool:
+        if self.override_syntax is not None:
+            return bool(self.override_syntax)
+        version = bitbake_version(search_dirs)
+        if version is None:
+            log.info("bitbake version not found, using the ':' override syntax")
+            return True
+        return version >= override_syntax_version
+
+    def inject(self, conf_file: str, search_dirs=()) -> None:
+        """This Function appends the shared mirror settings to a bitbake conf file.
+
+        Parameters:
+            conf_file - petalinuxbsp.conf, auto.conf or local.conf
+            search_dirs - directories holding the bitbake checkout, its version
+                          selects the override syntax
+        """
+        override_syntax = self.uses_override_syntax(search_dirs)
+        for line in self.conf_lines(override_syntax):
+            add_newline(conf_file, line)
+        log.info(f"Shared sstate settings added to {conf_file}")
+
+    def _lock(self, path: str):
+        return FileLock(os.path.join(path, ".roast_sstate.lock"))
+
+    def seed(self, src_dir: str) -> int:
+        """This Function copies sstate objects missing in sstate_mirror from
+        src_dir, holding the mirror lock so concurrent builds do not race.
+
+        Parameters:
+            src_dir - local SSTATE_DIR of the finished build
+
+        Returns the number of objects added to the mirror.
+        """
+        if not self.mirror or "://" in self.mirror or not is_dir(src_dir):
+            return 0
+        mkdir(self.mirror)
+        added = 0
+        with self._lock(self.mirror):
+            for root, _, files in os.walk(src_dir):
+                dest_root = os.path.join(self.mirror, os.path.relpath(root, src_dir))
+                for name in files:
+                    dest = os.path.join(dest_root, name)
+                    if name.startswith(".") or is_file(dest):
+                        continue
+                    mkdir(dest_root)
+                    tmp = f"{dest}.{os.getpid()}.tmp"
+                    shutil.copy2(os.path.join(root, name), tmp)
+                    os.rename(tmp, dest)
+                    added += 1
+        log.info(f"Seeded {added} sstate objects into {self.mirror}")
+        return added
+
+    def prune(self, sstate_dir: str = None) -> int:
+        """This Function removes sstate objects by last access time.
+
+        Objects older than sstate_max_age_days are removed first, then the
+        least recently accessed objects until sstate_max_gb is met.
+
+        Parameters:
+            sstate_dir - directory to prune, defaults to sstate_dir
+
+        Returns the number of bytes freed.
+        """
+        sstate_dir = sstate_dir or self.sstate_dir
+        if not sstate_dir or not is_dir(sstate_dir):
+            return 0
+        if not (self.max_size or self.max_age):
+            return 0
+        freed = 0
+        with self._lock(sstate_dir):
+            objects = []
+            for root, _, files in os.walk(sstate_dir):
+                for name in files:
+                    if name.startswith("."):
+                        continue
+                    path = os.path.join(root, name)
+                    st = os.lstat(path)
+                    objects.append((st.st_atime, st.st_size, path))
+            objects.sort()
+            total = sum(size for _, size, _ in objects)
+            now = time.time()
+            for atime, size, path in objects:
+                expired = self.max_age and now - atime > self.max_age
+                if not expired and (not self.max_size or total <= self.max_size):
+                    break
+                os.remove(path)
+                total -= size
+                freed += size
+        log.info(f"Pruned {freed} bytes from {sstate_dir}")
+        return freed
+
+    def stats(self, tmp_dir: Union[str, List[str]], since: float = 0, logs=()):
+        """This Function reports the sstate hit rate of builds started after since.
+
+        Parameters:
+            tmp_dir - bitbake TMPDIR or list of TMPDIRs, cooker logs below
+                      them are parsed
+            since - epoch time of the build start
+            logs - fallback log files used when no cooker log is found
+
+        Returns SstateStats or None.
+        """
+        tmp_dirs = [tmp_dir] if isinstance(tmp_dir, str) else tmp_dir
+        files = [
+            file
+            for tmp in tmp_dirs
+            for file in glob.glob(f"{tmp}/log/cooker/*/*.log")
+            if os.path.getmtime(file) >= since and not os.path.islink(file)
+        ]
+        if not files:
+            files = [file for file in logs if is_file(file)]
+        output = ""
+        for file in sorted(files):
+            with open(file, errors="ignore") as f:
+                output += f.read()
+        stats = parse_sstate_summary(output)
+        if stats:
+            log.info(
+                f"Sstate: wanted {stats.wanted}, local {stats.local}, "
+                f"mirrors {stats.mirrors}, missed {stats.missed}, "
+                f"hit rate {stats.hit_rate}%"
+            )
+        return stats
+
+    def post_build(
+        self, tmp_dir: Union[str, List[str]], build_dir: str, since: float = 0, logs=()
+    ):
+        """This Function runs the sstate housekeeping after a build.
+
+        It collects the hit rate, seeds the mirror from the local sstate cache
+        when no shared sstate_dir is used and prunes the shared sstate_dir.
+
+        Parameters:
+            tmp_dir - bitbake TMPDIR or list of TMPDIRs of a split build
+            build_dir - bitbake TOPDIR holding the default sstate-cache
+            since - epoch time of the build start
+            logs - fallback log files for stats()
+
+        Returns SstateStats or None.
+        """
+        stats = self.stats(tmp_dir, since=since, logs=logs)
+        if self.seed_mirror and not self.sstate_dir:
+            self.seed(os.path.join(build_dir, "sstate-cache"))
+        self.prune()
+        return stats
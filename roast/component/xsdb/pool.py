@@ -0,0 +1,164 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
+from roast.component.xsdb.xsdb import Xsdb
+
+log = logging.getLogger(__name__)
+
+
+class XsdbPool:
+    """Process wide pool of warm XSDB sessions.
+
+    Starting an Xsdb instance sources the Vitis settings, launches rdi_xsdb and
+    connects to hw_server, which costs several seconds. The pool keeps started
+    sessions keyed by (hw_server host, port, vitisPath) and leases them out
+    again after a liveness probe, so a board session pays the startup once.
+
+    Parameters:
+        max_sessions - Maximum number of XSDB sessions kept by the pool
+        idle_timeout - Seconds after which an unused session is closed
+    """
+
+    def __init__(self, max_sessions: int = 4, idle_timeout: int = 1800):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.sessions = {}  # id(xsdb) -> [key, xsdb, leased, last_used]
+        atexit.register(self.close)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    @staticmethod
+    def _key(config, hwserver, port):
+        return (hwserver, str(port), config["vitisPath"])
+
+    def _close_session(self, entry) -> None:
+        key, xsdb = entry[0], entry[1]
+        del self.sessions[id(xsdb)]
+        log.debug(f"Closing XSDB session for {key}")
+        atexit.unregister(xsdb.exit)
+        try:
+            xsdb.exit()
+        except Exception as err:
+            log.debug(f"XSDB session for {key} did not exit cleanly: {err}")
+
+    def _healthy(self, xsdb) -> bool:
+        try:
+            if not xsdb.alive(timeout=10):
+                return False
+            xsdb.reconnect()
+        except Exception:
+            return False
+        return True
+
+    def _evict_idle(self, now) -> None:
+        for entry in list(self.sessions.values()):
+            if not entry[2] and now - entry[3] > self.idle_timeout:
+                self._close_session(entry)
+
+    def evict_idle(self) -> None:
+        """This Function closes all sessions idle for more than idle_timeout."""
+        with self.lock:
+            self._evict_idle(time.monotonic())
+
+    def acquire(self, config, hwserver: Optional[str] = None, port: str = "3121"):
+        """This Function leases an XSDB session connected to hwserver.
+
+        An idle session for the same (hwserver, port, vitisPath) is reused when
+        it still answers, otherwise a new session is started. When the pool is
+        full the least recently used idle session is closed to make room.
+
+        Parameters:
+            config - roast config with vitisPath
+            hwserver - hw_server host to connect to
+            port - hw_server port
+        """
+        key = self._key(config, hwserver, port)
+        with self.lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+            idle = [e for e in self.sessions.values() if e[0] == key and not e[2]]
+            for entry in sorted(idle, key=lambda e: e[3], reverse=True):
+                if self._healthy(entry[1]):
+                    entry[2], entry[3] = True, now
+                    log.debug(f"Reusing XSDB session for {key}")
+                    return entry[1]
+                self._close_session(entry)
+
+            if len(self.sessions) >= self.max_sessions:
+                idle = [e for e in self.sessions.values() if not e[2]]
+                if not idle:
+                    raise Exception(
+                        f"XSDB pool exhausted: all {self.max_sessions} sessions in use"
+                    )
+                self._close_session(min(idle, key=lambda e: e[3]))
+
+            log.debug(f"Starting XSDB session for {key}")
+            xsdb = Xsdb(config, hwserver=hwserver, port=port)
+            self.sessions[id(xsdb)] = [key, xsdb, True, time.monotonic()]
+            return xsdb
+
+    def release(self, xsdb) -> None:
+        """This Function returns a leased XSDB session to the pool.
+
+        Parameters:
+            xsdb - session returned by acquire(), other objects are ignored
+        """
+        with self.lock:
+            entry = self.sessions.get(id(xsdb))
+            if entry is not None and entry[1] is xsdb:
+                entry[2], entry[3] = False, time.monotonic()
+
+    @contextmanager
+    def lease(self, config, hwserver: Optional[str] = None, port: str = "3121"):
+        xsdb = self.acquire(config, hwserver=hwserver, port=port)
+        try:
+            yield xsdb
+        finally:
+            self.release(xsdb)
+
+    def close(self) -> None:
+        """This Function closes all sessions owned by the pool."""
+        with self.lock:
+            for entry in list(self.sessions.values()):
+                self._close_session(entry)
+
+
+xsdb_pool = XsdbPool()
+
+
+def get_xsdb(config, hwserver: Optional[str] = None, port: str = "3121"):
+    """This Function returns an XSDB session for hwserver.
+
+    Sessions are leased from the shared xsdb_pool when config["xsdb_pool"] is
+    set, otherwise a new Xsdb instance is started.
+
+    Parameters:
+        config - roast config, xsdb_pool_max_sessions and xsdb_pool_idle_timeout
+                 optionally tune the shared pool
+        hwserver - hw_server host to connect to
+        port - hw_server port
+    """
+    if not config.get("xsdb_pool"):
+        return Xsdb(config, hwserver=hwserver, port=port)
+    xsdb_pool.max_sessions = config.get(
+        "xsdb_pool_max_sessions", xsdb_pool.max_sessions
+    )
+    xsdb_pool.idle_timeout = config.get(
+        "xsdb_pool_idle_timeout", xsdb_pool.idle_timeout
+    )
+    return xsdb_pool.acquire(config, hwserver=hwserver, port=port)
+
+
+def release_xsdb(xsdb) -> None:
+    """This Function hands a session from get_xsdb() back to the shared pool."""
+    xsdb_pool.release(xsdb)
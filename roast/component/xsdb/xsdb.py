@@ -9,12 +9,109 @@ import re
 import sys
 import logging
 import atexit
-from typing import Optional, List
+import tempfile
+from array import array
+from collections import namedtuple
+from typing import Optional, List, Dict, Union
 from roast.xexpect import Xexpect
+from roast.exceptions import ExpectError
 from roast.utils import get_base_name, get_original_path, is_file
 
 log = logging.getLogger(__name__)
 
+XsdbResult = namedtuple("XsdbResult", ["cmd", "ok", "output"])
+
+write_failures = [
+    'Invalid target. Use "targets" command to select a target',
+    "instead",
+    "Memory write error",
+]
+
+
+class XsdbBatch:
+    """This class queues xsdb commands and sends them to rdi_xsdb as one
+    TCL block, so a group of register accesses costs a single prompt round-trip.
+
+    >>> Usage:
+        with xsdb.batch() as batch:
+            batch.targets("PSU")
+            batch.mwr("0xffca0038", "0x1ff")
+            batch.mrd("0xffca0038")
+        batch.results -> [XsdbResult(cmd, ok, output), ...]
+    """
+
+    def __init__(self, xsdb, raise_on_error: bool = True, timeout: int = 200):
+        self.xsdb = xsdb
+        self.raise_on_error = raise_on_error
+        self.timeout = timeout
+        self.cmds = []
+        self.results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.run()
+
+    def __len__(self):
+        return len(self.cmds)
+
+    def add(self, cmd: str, expected_failures: Optional[List[str]] = None):
+        self.cmds.append((cmd, expected_failures or []))
+        return self
+
+    def mwr(self, addr, value, num_words=None, args: str = ""):
+        cmd = f"mwr {args} {addr} {value}"
+        if num_words is not None:
+            cmd += f" {num_words}"
+        return self.add(cmd, write_failures)
+
+    def mrd(self, addr, offset: int = 1, args: str = "-value -force"):
+        return self.add(f"mrd {args} {addr} {offset}", ["Memory read error"])
+
+    def mask_write(self, addr, mask, value):
+        return self.add(f"mask_write {addr} {mask} {value}", write_failures)
+
+    def targets(self, proc: str):
+        return self.add(self.xsdb.targets_cmd(proc), ["no targets found"])
+
+    def dow(self, file: str, addr=None):
+        file = get_original_path(file)
+        f_msgs = [
+            f"Failed to download {file}",
+            "no such file or directory",
+            "Memory write error",
+        ]
+        if addr is None:
+            return self.add(f"dow -force {file}", f_msgs)
+        return self.add(f"dow -data -force {file} {addr}", f_msgs)
+
+    def fpga(self, bit_file: str):
+        bit_file = get_original_path(bit_file)
+        f_msgs = [
+            f"Failed to download {bit_file}",
+            "no such file or directory",
+            "bit stream is not compatible",
+        ]
+        return self.add(f"fpga -f {bit_file}", f_msgs)
+
+    def rst(self, args: str = "-proc -clear-registers"):
+        return self.add(f"rst {args}", ["Invalid reset type", "Cannot reset"])
+
+    def con(self):
+        return self.add("con")
+
+    def stop(self):
+        return self.add("stop")
+
+    def run(self) -> List[XsdbResult]:
+        self.results = self.xsdb.run_batch(
+            self.cmds, timeout=self.timeout, raise_on_error=self.raise_on_error
+        )
+        self.cmds = []
+        return self.results
+
 
 class Xsdb(Xexpect):
     def __init__(
@@ -32,6 +129,7 @@ class Xsdb(Xexpect):
         self.setup_hwserver = setup_hwserver
         self.port = port
         self.init_prompt = prompt
+        self.batch_line_max = 3000  # stay below the 4096 byte tty line limit
         super().__init__(log, hostname=self.hostname, non_interactive=False)
         atexit.register(self.exit)
         self._setup()
@@ -79,14 +177,23 @@ class Xsdb(Xexpect):
             err_msg="hw_server setup failed!",
         )
 
-    def alive(self):
+    def alive(self, timeout: int = 200):
         expected = [self.init_prompt, self.hostname]
-        if self.runcmd("\r\n", expected=expected, wait_for_prompt=False) == 0:
+        if (
+            self.runcmd(
+                "\r\n", expected=expected, wait_for_prompt=False, timeout=timeout
+            )
+            == 0
+        ):
             return True
 
     def disconnect(self):
         self.runcmd("disconnect")
 
+    def reconnect(self):
+        self.disconnect()
+        self.connect()
+
     def con(self):
         self.runcmd("con")
 
@@ -94,31 +201,95 @@ class Xsdb(Xexpect):
         self.runcmd("stop")
 
     def read(
-        self, address: str, offset: int = 1, args: str = "-value -force"
-    ) -> List[str]:
+        self,
+        address: Union[str, List[str]],
+        offset: int = 1,
+        args: str = "-value -force",
+    ) -> Union[List[str], Dict[str, List[str]]]:
         """This Function is to read values from memory
         till offset and returns list of values
         Parameters:
-            address - memory location to read value from
+            address - memory location to read value from, a list of
+                      locations is read in one batch and returned as
+                      {address: [values]}
             offset - by default set to 1
         """
+        if isinstance(address, (list, tuple)):
+            batch = self.batch()
+            for addr in address:
+                batch.mrd(addr, offset, args=args)
+            results = batch.run()
+            return {
+                addr: result.output.split() for addr, result in zip(address, results)
+            }
+
         f_msgs = ["Memory read error"]
         self.runcmd(f"mrd {args} {address} {offset}", expected_failures=f_msgs)
         reg_val = self.terminal.before
         reg_val = reg_val.lstrip().rstrip()
         return reg_val.split(" ")
 
+    def read_many(self, addresses: List[str], args: str = "-value -force") -> dict:
+        """This Function reads scattered registers in one batch
+        Parameters:
+            addresses - list of memory locations
+        Returns:
+            {address: value} dictionary of ints
+        """
+        batch = self.batch()
+        for addr in addresses:
+            batch.mrd(addr, 1, args=args)
+        results = batch.run()
+        return {
+            addr: int(result.output.split()[0], 0)
+            for addr, result in zip(addresses, results)
+        }
+
+    def read_block(self, address, count: int, timeout: int = 200) -> memoryview:
+        """This Function reads count words starting from address with
+        mrd -bin into a temp file and returns them as a memoryview of
+        unsigned 32-bit words backed by the file contents.
+        Parameters:
+            address - start address
+            count - number of words to read
+        """
+        fd, bin_file = tempfile.mkstemp(prefix="xsdb_mrd_", suffix=".bin")
+        os.close(fd)
+        try:
+            self.run_batch(
+                [(f"mrd -force -bin -file {bin_file} {address} {count}", [])],
+                timeout=timeout,
+            )
+            buf = bytearray(count * 4)
+            with open(bin_file, "rb") as f:
+                size = f.readinto(buf)
+        finally:
+            os.remove(bin_file)
+        if size != len(buf):
+            # xsdb runs on a remote host, the file is not visible locally
+            log.debug(f"mrd -bin returned {size} bytes, reading values instead")
+            values = self.run_batch(
+                [(f"mrd -value -force {address} {count}", ["Memory read error"])],
+                timeout=timeout,
+            )[0].output.split()
+            buf = array("I", (int(value, 0) for value in values)).tobytes()
+        return memoryview(buf).cast("I")
+
     # write, write to list
     def write(self, addr_value: dict, num_words: str = None, args: str = "") -> None:
         """This Function takes dictionary, writes values to memory addresses
         Parameters:
-            addr_value: Address, value dictionary
+            addr_value: Address, value dictionary, more than one entry
+                        is written in one batch
         """
-        f_msgs = [
-            'Invalid target. Use "targets" command to select a target',
-            "instead",
-            "Memory write error",
-        ]
+        if len(addr_value) > 1:
+            batch = self.batch()
+            for addr, value in addr_value.items():
+                batch.mwr(addr, value, num_words, args=args)
+            batch.run()
+            return
+
+        f_msgs = write_failures
         for addr, value in addr_value.items():
             if num_words is None:
                 self.runcmd(f"mwr {args} {addr} {value}", expected_failures=f_msgs)
@@ -147,23 +318,101 @@ class Xsdb(Xexpect):
     def mask_write(self, *address_values, args="") -> None:
         """This Function takes address values to perform mask write
         Parameters:
-            addr_values: comma seperated values to write
+            addr_values: comma seperated values to write, more than one
+                         address, mask, value triplet is written in one batch
         """
+        if len(address_values) > 3:
+            batch = self.batch()
+            for idx in range(0, len(address_values), 3):
+                batch.mask_write(*address_values[idx : idx + 3])
+            batch.run()
+            return
+
         data = ""
         for value in address_values:
             data = data + " " + value
 
-        f_msgs = [
-            'Invalid target. Use "targets" command to select a target',
-            "instead",
-            "Memory write error",
-        ]
+        f_msgs = write_failures
         self.runcmd(f"mask_write {data}", expected_failures=f_msgs)
 
+    def batch(self, raise_on_error: bool = True, timeout: int = 200) -> XsdbBatch:
+        """Returns an empty command batch bound to this session"""
+        return XsdbBatch(self, raise_on_error=raise_on_error, timeout=timeout)
+
+    def _batch_tcl(self, cmds, start: int = 0) -> str:
+        """Wraps each command in catch and frames its result as
+        XSDB_RESULT <index> <return code> <result with escaped newlines>
+        """
+        tcl = ""
+        for idx, (cmd, _) in enumerate(cmds, start):
+            tcl += (
+                f"set roast_rc [catch {{{cmd}}} roast_res]; "
+                f'puts "XSDB_RESULT {idx} $roast_rc '
+                r'[string map {\n \\n \r {}} $roast_res]"; '
+            )
+        tcl += f"set roast_n {start + len(cmds)}; "
+        tcl += 'puts "XSDB_BATCH_END $roast_n"'
+        return tcl
+
+    def _batch_chunks(self, cmds):
+        """Splits commands so that no TCL line exceeds the tty line limit"""
+        chunk, length = [], 0
+        for cmd in cmds:
+            cmd_len = len(cmd[0]) + 100
+            if chunk and length + cmd_len > self.batch_line_max:
+                yield chunk
+                chunk, length = [], 0
+            chunk.append(cmd)
+            length += cmd_len
+        if chunk:
+            yield chunk
+
+    def run_batch(
+        self, cmds, timeout: int = 200, raise_on_error: bool = True
+    ) -> List[XsdbResult]:
+        """This Function sends commands to rdi_xsdb as TCL blocks and
+        returns one XsdbResult per command
+        Parameters:
+            cmds - list of (command, expected failures) tuples
+            timeout - timeout for each TCL block
+            raise_on_error - raise after logging all failed commands
+        """
+        results = []
+        for chunk in self._batch_chunks(cmds):
+            start = len(results)
+            self.runcmd(
+                self._batch_tcl(chunk, start),
+                expected=r"XSDB_BATCH_END \d+",
+                wait_for_prompt=False,
+                timeout=timeout,
+            )
+            output = self.terminal.before
+            self.expect(timeout=timeout)
+            framed = {
+                int(idx): (int(rc), res.strip().replace("\\n", "\n"))
+                for idx, rc, res in re.findall(r"XSDB_RESULT (\d+) (\d+) ?(.*)", output)
+            }
+            for idx, (cmd, f_msgs) in enumerate(chunk, start):
+                if idx not in framed:
+                    results.append(XsdbResult(cmd, False, "No result received"))
+                    continue
+                rc, res = framed[idx]
+                ok = rc == 0 and not any(re.search(msg, res) for msg in f_msgs)
+                results.append(XsdbResult(cmd, ok, res))
+
+        failed = [result for result in results if not result.ok]
+        for result in failed:
+            log.error(f"xsdb command '{result.cmd}' failed: {result.output}")
+        if failed and raise_on_error:
+            raise ExpectError(
+                f"xsdb command '{failed[0].cmd}' failed: {failed[0].output}"
+            )
+        return results
+
     def get_proc(self):
         pass
 
-    def set_proc(self, proc: str) -> None:
+    def targets_cmd(self, proc: str) -> str:
 
         # Map proc instances with simple keys
         proc_dict = {
@@ -186,9 +435,33 @@ class Xsdb(Xexpect):
             cmd += f'"{proc_dict[proc]}"' + "}"
         else:
             cmd += f'"{proc}"' + "}"
+        return cmd
+
+    def wait_state(self, state: str = "Running", timeout: int = 200) -> None:
+        """This Function polls the selected target until its state matches.
 
+        Parameters:
+            state - regex matched against the output of xsdb "state"
+            timeout - seconds to wait before failing
+        """
+        # result token is assembled in TCL so the echoed command never matches
+        cmd = (
+            f"set roast_t [expr {{[clock seconds] + {timeout}}}]; "
+            f"while {{![regexp {{{state}}} [state]] && [clock seconds] < $roast_t}} "
+            "{after 100}; "
+            f'puts "XSDB_STATE_[expr {{[regexp {{{state}}} [state]] ? {{OK}} : {{TIMEOUT}}}}]"'
+        )
+        self.runcmd(
+            cmd,
+            expected_failures=["XSDB_STATE_TIMEOUT"],
+            expected="XSDB_STATE_OK",
+            timeout=timeout + 10,
+            err_msg=f"Target did not reach state '{state}' in {timeout}s",
+        )
+
+    def set_proc(self, proc: str) -> None:
         f_msgs = ["no targets found"]
-        self.runcmd(cmd, expected_failures=f_msgs)
+        self.runcmd(self.targets_cmd(proc), expected_failures=f_msgs)
 
     def rst_proc(self):
         f_msgs = ["Invalid reset type", "Cannot reset"]
@@ -5,12 +5,63 @@
 
 from roast.utils import *
 from roast.component.basebuild import Basebuild
+from roast.component.sstate import SstateManager
+from roast.component.bmap import generate_bmap
 from roast.xexpect import Xexpect
 import os
+import re
+import time
 import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 log = logging.getLogger(__name__)
 
+RecipeResult = namedtuple("RecipeResult", ["recipe", "ok", "duration"])
+
+task_re = re.compile(
+    r"^(\d+) NOTE: recipe (\S+): task (\S+): (Started|Succeeded|Failed)", re.M
+)
+error_re = re.compile(r"^\d+ ERROR: (.*)$", re.M)
+pn_re = re.compile(r"^(.+?)-(?:v?\d|git)")
+# resolves $REPO_RREV of a repo forall project to a commit sha, exact ref
+# names only, so "main" does not pick "feature/main" and a branch wins over
+# a tag of the same name, annotated tags are peeled
+resolve_script = [
+    'rev="$REPO_RREV"',
+    'if echo "$rev" | grep -qE \'^[0-9a-f]{40}$\'; then echo "$rev"; exit 0; fi',
+    'case "$rev" in',
+    '    refs/*) refs="$rev^{} $rev" ;;',
+    '    *) refs="refs/heads/$rev refs/tags/$rev^{} refs/tags/$rev" ;;',
+    "esac",
+    'out=$(git ls-remote "$REPO_REMOTE" $refs)',
+    "for ref in $refs; do",
+    '    sha=$(echo "$out" | awk -v ref="$ref" \'$2 == ref { print $1; exit }\')',
+    '    [ -n "$sha" ] && echo "$sha" && exit 0',
+    "done",
+]
+tuning_begin = "# roast build tuning begin"
+tuning_end = "# roast build tuning end"
+
+
+def parse_bitbake_log(text):
+    """This Function collects task events from a timestamped bitbake log.
+
+    Parameters:
+        text - bitbake output with every line prefixed by its epoch time
+
+    Returns {pn: (time of the first task event, time of the last task
+    event, any task failed)}.
+    """
+    tasks = {}
+    for stamp, recipe, _, state in task_re.findall(text):
+        # recipe is reported as <pn>-<pv>-<pr>, pv may hold dashes itself
+        match = pn_re.match(recipe)
+        pn = match.group(1) if match else recipe.rsplit("-", 2)[0]
+        first, _, failed = tasks.get(pn, (int(stamp), 0, False))
+        tasks[pn] = (first, int(stamp), failed or state == "Failed")
+    return tasks
+
 
 class Yocto(Basebuild):
     def __init__(self, config, setup: bool = False):
@@ -39,18 +90,99 @@ class Yocto(Basebuild):
         )
         if not self.repo_path:
             self.repo_path = "repo"
+        self.setupfile = None
+        self.recipe_results = {}
+        self.sstate = SstateManager(config) if SstateManager.enabled(config) else None
+        self.sstate_stats = None
+        self.build_start = 0
+        self.split_tmp_dirs = []
 
     def fetch(self):
         init_cmd = f"{self.repo_path} init -u {self.yocto_url} -b {self.yocto_branch} -m {self.yocto_manifest_xml}"
         if self.repo_bundle_url:
             init_cmd += f" --repo-url {self.repo_bundle_url}"
+        if self.config.get("yocto_repo_reference"):
+            init_cmd += f" --reference={self.config['yocto_repo_reference']}"
         self.console.runcmd(init_cmd)
         log.info("INFO: repo init -> DONE")
 
-    def repo_sync(self, timeout=500):
-        self.console.runcmd(f"{self.repo_path} sync -d -j 20", timeout=timeout)
+    def repo_sync(self, timeout=500, projects=()):
+        jobs = self.config.get("yocto_repo_jobs", 20)
+        sync_cmd = f"{self.repo_path} sync -d -j {jobs}"
+        if projects:
+            sync_cmd += f" {' '.join(projects)}"
+        self.console.runcmd(sync_cmd, timeout=timeout)
         log.info("INFO: repo sync -> DONE")
 
+    def repo_state(self, timeout=500):
+        """This Function returns {project path: revision} of the current manifest.
+
+        Revisions given as branch or tag are resolved against the remote, so
+        the result tells which commit a sync would check out. Projects which
+        are not checked out yet are reported with an empty revision.
+        """
+        state_file = os.path.join(self.workDir, ".roast_repo_state")
+        jobs = self.config.get("yocto_repo_jobs", 20)
+        resolve = f"{state_file}.resolve.sh"
+        with open(resolve, "w") as f:
+            f.write("".join(f"{line}\n" for line in resolve_script))
+        self.console.runcmd(
+            f"{{ {self.repo_path} list -p > {state_file}.paths; "
+            f"{self.repo_path} forall -j {jobs} -c "
+            f"""'echo "$REPO_PATH $(sh {resolve})"' > {state_file}; }} || true""",
+            timeout=timeout,
+        )
+        with open(f"{state_file}.paths") as f:
+            state = {path: "" for path in f.read().split()}
+        with open(state_file) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) == 2:
+                    state[fields[0]] = fields[1]
+        return state
+
+    def incremental_sync(self, timeout=500):
+        """This Function syncs only the repo projects whose revision moved and
+        returns the synced project paths.
+
+        The resolved revisions are recorded after every sync. When nothing
+        changed reset and sync are skipped, otherwise only the moved projects
+        are reset (without git clean, untracked build state is kept) and synced.
+
+        Parameters:
+            yocto_repo_jobs - repo job count (default 20)
+            yocto_repo_reference - local mirror passed to repo init --reference
+        """
+        record = os.path.join(self.workDir, ".roast_repo_revisions.json")
+        old = read_json(record) if is_file(record) else None
+        new = self.repo_state(timeout=timeout)
+        if old is None:
+            log.info("INFO: no recorded repo state, running full reset and sync")
+            self.repo_reset(timeout=timeout)
+            self.repo_sync(timeout=timeout)
+            new = self.repo_state(timeout=timeout)
+            synced = sorted(new)
+        else:
+            moved = sorted(
+                path for path, rev in new.items() if not rev or old.get(path) != rev
+            )
+            if not moved:
+                log.info("INFO: repo manifest unchanged, skipping reset and sync")
+                return []
+            log.info(f"INFO: repo projects moved: {moved}")
+            present = [path for path in moved if new[path]]
+            if present:
+                self.console.runcmd(
+                    f"{self.repo_path} forall {' '.join(present)} -c 'git reset --hard -q'",
+                    timeout=timeout,
+                )
+            self.repo_sync(timeout=timeout, projects=moved)
+            if len(present) != len(moved):
+                new = self.repo_state(timeout=timeout)
+            synced = moved
+        write_json(record, new)
+        return synced
+
     def repo_start(self):
         self.console.runcmd(f"{self.repo_path} start {self.yocto_branch} --all")
         log.info("INFO: repo start -> DONE")
@@ -68,6 +200,7 @@ class Yocto(Basebuild):
             setupfile = "setupsdk"
         log.info(f"INFO: sourcing {setupfile}")
         if is_file(setupfile):
+            self.setupfile = os.path.abspath(setupfile)
             self.console.runcmd(f"source {setupfile}")
         else:
             log.error("ERROR:Yocto setup failed.Check repo sync")
@@ -126,58 +259,226 @@ class Yocto(Basebuild):
             if "{{" in entries:
                 entries = entries.format()
             add_newline(conf_file_path, entries)
+        if self.sstate:
+            self.sstate.inject(conf_file_path, search_dirs=[self.workDir])
         # Log the yocto settings done by user for better debugging
         log.info(f"yocto project config set to: {self.config['yocto']}")
 
-    def image_builder(self, recipe_list, timeout=1000):
-        """Runs the bitbake command"""
+    def set_build_tuning(self, conf_dir=None):
+        """This Function applies bitbake parallelism settings from config
+
+        Parameters:
+            yocto_bb_number_threads - BB_NUMBER_THREADS value
+            yocto_parallel_make - PARALLEL_MAKE value, numbers are used as "-j <n>"
+        """
+        conf_file = os.path.join(conf_dir or self.yocto_conf_dir, "auto.conf")
+        lines = []
+        threads = self.config.get("yocto_bb_number_threads")
+        if threads:
+            lines.append(f'BB_NUMBER_THREADS = "{threads}"')
+        parallel_make = self.config.get("yocto_parallel_make")
+        if parallel_make:
+            if str(parallel_make).isdigit():
+                parallel_make = f"-j {parallel_make}"
+            lines.append(f'PARALLEL_MAKE = "{parallel_make}"')
+
+        # replace the block of an earlier call instead of appending again
+        conf = []
+        if is_file(conf_file):
+            with open(conf_file) as f:
+                conf = f.read().splitlines()
+        if tuning_begin in conf and tuning_end in conf:
+            begin, end = conf.index(tuning_begin), conf.index(tuning_end)
+            conf[begin : end + 1] = []
+        if lines:
+            conf += [tuning_begin] + lines + [tuning_end]
+        with open(conf_file, "w") as f:
+            f.write("".join(f"{line}\n" for line in conf))
+
+    def _buildlist(self, console, build_dir, pn, timeout=600):
+        # recipes pulled in by pn, written by bitbake -g
+        console.runcmd(f"cd {build_dir}; bitbake -g {pn}", timeout=timeout)
+        with open(os.path.join(build_dir, "pn-buildlist")) as f:
+            return set(f.read().split())
+
+    def _bitbake(self, console, build_dir, recipes, timeout):
+        build_log = os.path.join(
+            build_dir, f"bitbake-{time.strftime('%Y%m%d-%H%M%S')}.log"
+        )
+        # -k keeps independent targets building after a failure, every line is
+        # stamped so task durations can be read back from the log
+        console.runcmd(
+            f"cd {build_dir}; bitbake -k {' '.join(recipes)} 2>&1 | "
+            """while IFS= read -r line; do printf '%(%s)T %s\\n' -1 "$line"; done | """
+            f"tee {build_log}",
+            timeout=timeout,
+        )
+        with open(build_log, errors="ignore") as f:
+            text = f.read()
+        tasks = parse_bitbake_log(text)
+        errors = " ".join(error_re.findall(text))
+        failed = {pn for pn, (_, _, task_failed) in tasks.items() if task_failed}
+
+        results = {}
+        for recipe in recipes:
+            pn = recipe.split(":")[0]
+            if not errors:
+                ok = True
+            elif pn in failed or f"'{pn}'" in errors or not tasks:
+                ok = False
+            else:
+                ok = not failed & self._buildlist(console, build_dir, pn)
+            # time from the recipe's first task start to its last task end
+            first, last, _ = tasks.get(pn, (0, 0, False))
+            results[recipe] = RecipeResult(recipe, ok, last - first)
+        return results
+
+    def _split_build(self, recipes, builds, timeout):
+        sstate_dir = os.path.join(self.yocto_build_dir, "sstate-cache")
+        dl_dir = os.path.join(self.yocto_build_dir, "downloads")
+        if self.sstate:
+            sstate_dir = self.sstate.sstate_dir or sstate_dir
+            dl_dir = self.sstate.dl_dir or dl_dir
+        groups = [recipes[idx::builds] for idx in range(builds) if recipes[idx::builds]]
+        # deploy() and the sstate stats read the TMPDIR of every group
+        self.split_tmp_dirs = [
+            os.path.join(f"{self.yocto_build_dir}-{idx}", "tmp")
+            for idx in range(len(groups))
+        ]
+
+        def _build(idx, group):
+            build_dir = f"{self.yocto_build_dir}-{idx}"
+            conf_dir = os.path.join(build_dir, "conf")
+            remove(conf_dir)
+            copyDirectory(self.yocto_conf_dir, conf_dir, symlinks=True)
+            conf_file = os.path.join(conf_dir, "auto.conf")
+            add_newline(conf_file, f'TMPDIR = "{os.path.join(build_dir, "tmp")}"')
+            add_newline(conf_file, f'SSTATE_DIR = "{sstate_dir}"')
+            add_newline(conf_file, f'DL_DIR = "{dl_dir}"')
+            console = Xexpect(log=log, exit_nzero_ret=True)
+            console.runcmd(f"cd {os.path.dirname(self.setupfile)}")
+            console.runcmd(f"source {self.setupfile}")
+            console.runcmd(f"export BUILDDIR={build_dir}")
+            return self._bitbake(console, build_dir, group, timeout * len(group))
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            for group_results in executor.map(_build, range(len(groups)), groups):
+                results.update(group_results)
+        return {recipe: results[recipe] for recipe in recipes}
+
+    def image_builder(
+        self, recipe_list, timeout=1000, builds=None, raise_on_error=True
+    ):
+        """Runs the bitbake command
+
+        All recipes are built by one bitbake invocation so metadata is parsed
+        once. With builds > 1 (or yocto_parallel_builds in config) recipes are
+        split across that many concurrent build directories sharing sstate
+        and downloads.
+
+        Parameters:
+            recipe_list - recipe name or list of recipe names
+            timeout - build timeout per recipe
+            builds - number of concurrent build directories
+            raise_on_error - assert when any recipe failed
+
+        Returns {recipe: RecipeResult(recipe, ok, duration)}.
+        """
 
         # Convert the recipe string into a list if only one recipe is passed as a string
-        recipes = [recipe_list] if isinstance(recipe_list, str) else recipe_list
-        # Enables running of multiple recipes in sequence
-        for recipe in recipes:
-            self.console.runcmd(f"bitbake {recipe}", timeout=timeout)
+        recipes = [recipe_list] if isinstance(recipe_list, str) else list(recipe_list)
+        self.build_start = time.time()
+        self.split_tmp_dirs = []
+        self.set_build_tuning()
+        builds = int(builds or self.config.get("yocto_parallel_builds", 1))
+        if builds > 1 and len(recipes) > 1 and self.setupfile:
+            results = self._split_build(recipes, builds, timeout)
+        else:
+            results = self._bitbake(
+                self.console, self.yocto_build_dir, recipes, timeout * len(recipes)
+            )
+        self.recipe_results = results
+        for result in results.values():
+            log.info(
+                f"bitbake {result.recipe}: {'PASS' if result.ok else 'FAIL'} "
+                f"({result.duration}s)"
+            )
+        failed = [result.recipe for result in results.values() if not result.ok]
+        if failed and raise_on_error:
+            assert False, f"bitbake failed for {', '.join(failed)}"
+        return results
 
     def deploy(self):
-        """This Function deploys the generated yocto build images to specific location"""
+        """This Function deploys the generated yocto build images to specific location
+
+        The sstate hit rate of the build is kept in self.sstate_stats when
+        shared sstate mirrors are configured. Deployed wic images get a .bmap
+        file unless sd_flash_bmap is False. After a split build the images of
+        every build directory are deployed.
+        """
         ret = True
+        # a split build leaves its images in the TMPDIR of every group
+        tmp_dirs = self.split_tmp_dirs or [self.yocto_tmp_dir]
+        if self.sstate and self.build_start:
+            self.sstate_stats = self.sstate.post_build(
+                tmp_dirs, self.yocto_build_dir, since=self.build_start
+            )
 
         yocto_deploy_dir = self.config.get("yocto_deploy_dir", self.imagesDir)
         if not is_dir(yocto_deploy_dir):
             mkdir(yocto_deploy_dir)
 
         if self.config.get("yocto_ws_deploy_dir"):
-            yocto_ws_deploy_dir = self.config.yocto_ws_deploy_dir
+            ws_deploy_dirs = [self.config.yocto_ws_deploy_dir]
+        elif self.split_tmp_dirs:
+            ws_deploy_dirs = [
+                os.path.join(tmp_dir, "deploy") for tmp_dir in self.split_tmp_dirs
+            ]
         else:
-            yocto_ws_deploy_dir = self.yocto_ws_deploy_dir
+            ws_deploy_dirs = [self.yocto_ws_deploy_dir]
+        ws_deploy_dirs = [ws_dir for ws_dir in ws_deploy_dirs if is_dir(ws_dir)]
+        if not ws_deploy_dirs:
+            log.error("No yocto deploy directory found")
+            return False
 
-        log.info(f"List of available artifacts: {os.listdir(yocto_ws_deploy_dir)}")
+        for ws_dir in ws_deploy_dirs:
+            log.info(f"List of available artifacts: {os.listdir(ws_dir)}")
 
         if self.config.get("yocto_artifacts"):
             for image_list in self.config["yocto_artifacts"]:
                 if isinstance(image_list, (tuple, list)):
                     image_name = image_list[0]
                     image = image_list[1]
-                    image_file = find_file(image, yocto_ws_deploy_dir)
+                    image_files = [
+                        find_file(image, ws_dir) for ws_dir in ws_deploy_dirs
+                    ]
+                    image_file = next((file for file in image_files if file), None)
                     if image_file:
                         log.info(f"Artifact found: {image_file}")
                         image_file = get_original_path(image_file)
                         copy_data(image_file, f"{yocto_deploy_dir}/{image_name}")
                     else:
-                        log.error(f"{image} does not exist in {yocto_ws_deploy_dir}")
+                        log.error(f"{image} does not exist in {ws_deploy_dirs}")
                         ret = False
                 elif isinstance(image_list, str):
-                    image_files = find_files(image_list, yocto_ws_deploy_dir)
+                    image_files = []
+                    for ws_dir in ws_deploy_dirs:
+                        image_files += find_files(image_list, ws_dir)
                     log.info(f"Artifacts found: {image_files}")
                     for file in image_files:
                         copy_data(file, f"{yocto_deploy_dir}/")
                     if not image_files:
-                        log.error(
-                            f"{image_list} does not exist in {yocto_ws_deploy_dir}"
-                        )
+                        log.error(f"{image_list} does not exist in {ws_deploy_dirs}")
                         ret = False
         else:
-            copyDirectory(yocto_ws_deploy_dir, yocto_deploy_dir, symlinks=True)
+            for ws_dir in ws_deploy_dirs:
+                copyDirectory(ws_dir, yocto_deploy_dir, symlinks=True)
+
+        if self.config.get("sd_flash_bmap", True):
+            for wic in find_files("*.wic*", yocto_deploy_dir):
+                if not wic.endswith(".bmap"):
+                    generate_bmap(wic)
 
         return ret
 
@@ -195,9 +496,11 @@ def yocto_build(
 
     yocto_builder.fetch()
 
-    yocto_builder.repo_reset(timeout=reset_timeout)
-
-    yocto_builder.repo_sync(timeout=sync_timeout)
+    if config.get("yocto_incremental_sync"):
+        yocto_builder.incremental_sync(timeout=max(reset_timeout, sync_timeout))
+    else:
+        yocto_builder.repo_reset(timeout=reset_timeout)
+        yocto_builder.repo_sync(timeout=sync_timeout)
 
     yocto_builder.repo_start()
 
@@ -207,7 +510,7 @@ def yocto_build(
 
     yocto_builder.set_conf_vals()
 
-    yocto_builder.image_builder(recipe=recipe_name, timeout=build_timeout)
+    yocto_builder.image_builder(recipe_name, timeout=build_timeout)
 
     yocto_builder.deploy()
 
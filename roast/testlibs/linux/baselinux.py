@@ -3,10 +3,46 @@
 # SPDX-License-Identifier: MIT
 #
 
+import re
+import shlex
 import logging
+from collections import namedtuple
+from roast.testlibs.linux.dmesg import get_dmesg_log
+from roast.testlibs.linux.snapshot import (
+    SysSnapshot,
+    decode_fdt_dump,
+    parse_fdt,
+    parse_sysfs_links,
+)
 
 log = logging.getLogger(__name__)
 
+CmdResult = namedtuple("CmdResult", ["cmd", "status", "output"])
+
+
+def write_lines(console, path, lines, max_line=2048):
+    """This Function writes a text file on target through the console,
+    lines are sent with printf in chunks of max_line characters.
+
+    Parameters:
+        path - target file, replaced
+        lines - list of lines without newline
+    """
+    console.runcmd(f"rm -f {path}")
+    chunk = []
+    for idx, line in enumerate(lines):
+        chunk.append(shlex.quote(line))
+        if idx == len(lines) - 1 or len(" ".join(chunk)) > max_line:
+            console.runcmd(f"printf '%s\\n' {' '.join(chunk)} >> {path}")
+            chunk = []
+    if not lines:
+        console.runcmd(f"touch {path}")
+
+
+batch_re = re.compile(
+    r"ROAST_BATCH (\d+) BEGIN\r?\n(.*?)(?:\r?\n)?ROAST_BATCH \1 END (\d+)", re.S
+)
+
 
 class BaseLinux:
     def __init__(self, console, config):
@@ -36,6 +72,115 @@ class BaseLinux:
         self.sys_debug = "/sys/kernel/debug"
         self.boot_dt = "/boot/devicetree"
         self.iio_devices = "/sys/bus/iio/devices"
+        self.snapshot = None
+        self.live_tree_boot = None
+
+    def write_lines(self, path, lines, max_line=2048):
+        write_lines(self.console, path, lines, max_line)
+
+    def run_batch(self, cmds, timeout=200, max_line=2048):
+        """This Function runs a list of commands on target in one round trip.
+
+        The commands are framed into a single script, short scripts are sent
+        as one command line, longer ones are written to /tmp/roast_batch.sh
+        first. Each command runs in its own subshell with stderr merged, so
+        a cd or variable does not leak into the console and a failing command
+        does not stop the batch.
+
+        Parameters:
+            cmds - list of shell commands
+            max_line - longest command line sent to the console
+
+        Returns list of CmdResult(cmd, status, output), status is None when
+        the frame of a command was not found in the console output.
+        """
+        if not cmds:
+            return []
+        # the marker is assembled at runtime so the echoed script never
+        # matches the frames
+        lines = ["m=ROAST_"]
+        for idx, cmd in enumerate(cmds):
+            lines += [
+                f'echo "${{m}}BATCH {idx} BEGIN"',
+                f"( {cmd} ) 2>&1",
+                f'echo "${{m}}BATCH {idx} END $?"',
+            ]
+        lines.append('echo "${m}BATCH DONE"')
+        script = "; ".join(lines)
+        if len(script) > max_line:
+            batch_file = "/tmp/roast_batch.sh"
+            self.write_lines(batch_file, lines, max_line)
+            script = f"sh {batch_file}"
+        self.console.runcmd(
+            script, expected="ROAST_BATCH DONE", wait_for_prompt=False, timeout=timeout
+        )
+        output = self.console.output()
+        self.console.expect(timeout=timeout)
+        frames = {
+            int(idx): (int(status), text.replace("\r\n", "\n").strip())
+            for idx, text, status in batch_re.findall(output)
+        }
+        return [
+            CmdResult(cmd, *frames.get(idx, (None, ""))) for idx, cmd in enumerate(cmds)
+        ]
+
+    def sys_snapshot(self):
+        """This Function returns the SysSnapshot of the running boot.
+
+        The device tree and the /sys/class, /sys/bus device links are pulled
+        once per boot, later calls only compare the kernel boot_id. None is
+        returned when sys_snapshot is disabled in config, the target can not
+        provide the flattened device tree or a dt overlay was loaded in this
+        boot, queries then go to the live tree.
+        """
+        if not self.config.get("sys_snapshot", True):
+            return None
+        boot_id = "cat /proc/sys/kernel/random/boot_id"
+        if self.snapshot or self.live_tree_boot:
+            self.console.runcmd(boot_id, expected="\r\n")
+            current = self.console.output().strip()
+            if self.live_tree_boot == current:
+                return None
+            if self.snapshot and self.snapshot.boot_id == current:
+                return self.snapshot
+            log.info("Target rebooted, refreshing sysfs snapshot")
+        self.snapshot = None
+        self.live_tree_boot = None
+        results = self.run_batch(
+            [
+                boot_id,
+                "gzip -c /sys/firmware/fdt | base64",
+                "cd /sys && ls -l class/* bus/*/devices",
+            ],
+            timeout=300,
+        )
+        if results[1].status != 0:
+            log.info("Flattened device tree not available, snapshot disabled")
+            return None
+        try:
+            nodes = parse_fdt(decode_fdt_dump(results[1].output))
+        except Exception as err:
+            log.info(f"Failed to parse flattened device tree: {err}")
+            return None
+        self.snapshot = SysSnapshot(
+            nodes, parse_sysfs_links(results[2].output), results[0].output.strip()
+        )
+        return self.snapshot
+
+    def invalidate_snapshot(self):
+        """This Function drops the SysSnapshot, e.g. after a host rebind."""
+        self.snapshot = None
+
+    def use_live_tree(self):
+        """This Function drops the SysSnapshot and keeps queries on the live
+        device tree until the next boot. /sys/firmware/fdt is the boot time
+        blob, dt overlay nodes are only in /sys/firmware/devicetree/base.
+        """
+        self.snapshot = None
+        if not self.config.get("sys_snapshot", True):
+            return
+        self.console.runcmd("cat /proc/sys/kernel/random/boot_id", expected="\r\n")
+        self.live_tree_boot = self.console.output().strip()
 
     def get_kernel_info(self):
         self.console.runcmd("uname -a", expected="\r\n")
@@ -53,20 +198,22 @@ class BaseLinux:
         return self.console.output()
 
     def capture_boot_dmesg(self):
-        cmd = "(ls /tmp/dmesg.txt >> /dev/null 2>&1 && echo yes) || echo no"
-        self.console.runcmd(cmd, expected=self.console.prompt)
-        if "no" in self.console.output().split("\n")[1]:
-            self.console.runcmd("dmesg > /tmp/dmesg.txt")
-        self.console.runcmd(
-            "cat /tmp/dmesg.txt; echo 'sync' | tr '[:lower:]' '[:upper:]'",
-            expected="SYNC",
-            wait_for_prompt=False,
-        )
+        """This Function returns the kernel log of the current boot as text."""
+        dmesg = get_dmesg_log(self.console)
+        dmesg.update()
+        return dmesg.text()
 
     def capture_dmesg(self):
-        self.console.runcmd("dmesg")
+        """This Function fetches the new kernel log records and saves the log
+        of the current boot to {ROOT}/dmesg.txt.
+
+        Returns the DmesgLog of the console.
+        """
+        dmesg = get_dmesg_log(self.console)
+        dmesg.update()
         with open(f"{self.config['ROOT']}/dmesg.txt", "w+") as f:
-            f.write(str(self.console.output()))
+            f.write(dmesg.text())
+        return dmesg
 
     def set_console_loglevel(self, log_level="8"):
         self.console.runcmd(f"echo {log_level} > {self.proc_kernel}/printk")
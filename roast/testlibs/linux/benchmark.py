@@ -4,9 +4,15 @@
 #
 
 import math
+import shlex
 import logging
 from roast.testlibs.linux.baselinux import BaseLinux
 from roast.testlibs.linux.fileops import FileOps
+from roast.testlibs.linux.benchresult import (
+    parse_benchmark,
+    write_results_csv,
+    write_results_json,
+)
 
 log = logging.getLogger(__name__)
 
@@ -16,6 +22,44 @@ class Benchmark(BaseLinux, FileOps):
 
     def __init__(self, console, config):
         super().__init__(console, config)
+        self.results = []
+        self.cmd_prefix = ""
+
+    def _prefixed(self, cmd):
+        if not self.cmd_prefix:
+            return cmd
+        return f"{self.cmd_prefix} sh -c {shlex.quote(cmd)}"
+
+    def run_tool(self, tool, cmd, timeout=200, **params):
+        """This function runs a benchmark command and parses its output,
+
+        Parameters:
+        tool    : parser name, see benchresult.parsers
+        cmd     : command to execute, prefixed with self.cmd_prefix
+                  (e.g. taskset -c 1)
+        timeout : Timeout for executing the command
+        params  : run parameters stored with the result
+
+        Returns BenchmarkResult, also appended to self.results
+        """
+        result = self.run_batch([self._prefixed(cmd)], timeout=timeout)[0]
+        if result.status != 0:
+            assert False, f"{cmd} failed with {result.status}: {result.output}"
+        bench = parse_benchmark(tool, result.output, **params)
+        self.results.append(bench)
+        return bench
+
+    def export_results(self, path):
+        """This function saves the collected results as json or csv,
+        based on the file extension.
+
+        Parameters:
+        path : result file, e.g. {ROOT}/benchmark.json
+        """
+        if path.endswith(".csv"):
+            write_results_csv(self.results, path)
+        else:
+            write_results_json(self.results, path)
 
     def linpack(self, cmd, arraysize, quit_cmd, timeout):
         """This function executes linpack command,
@@ -27,14 +71,12 @@ class Benchmark(BaseLinux, FileOps):
         timeout   : Timeout for executing that command
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(cmd, expected="Enter array size", wait_for_prompt=False)
-        self.console.runcmd(
-            f"{arraysize}",
-            expected="Enter array size",
-            wait_for_prompt=False,
+        return self.run_tool(
+            "linpack",
+            f"printf '%s\\n' {arraysize} {quit_cmd} | {cmd}",
             timeout=timeout,
+            arraysize=arraysize,
         )
-        self.console.runcmd(quit_cmd)
 
     def dhrystone(self, cmd, number_runs, timeout):
         """This function executes dhrystone command,
@@ -45,10 +87,11 @@ class Benchmark(BaseLinux, FileOps):
         timeout     : Timeout for executing that command
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(cmd, expected="benchmark:", wait_for_prompt=False)
-        self.console.runcmd(
-            f"{number_runs}",
+        return self.run_tool(
+            "dhrystone",
+            f"echo {number_runs} | {cmd}",
             timeout=timeout,
+            number_runs=number_runs,
         )
 
     def whetstone(self, cmd, duration, timeout):
@@ -60,7 +103,9 @@ class Benchmark(BaseLinux, FileOps):
         timeout     : Timeout for executing that command
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(f"{cmd} {duration}", timeout=timeout)
+        return self.run_tool(
+            "whetstone", f"{cmd} {duration}", timeout=timeout, duration=duration
+        )
 
     def w_test(self, cmd, user):
         """This function executes w command,
@@ -108,7 +153,9 @@ class Benchmark(BaseLinux, FileOps):
         operation   : Operation to perform like rd, wr etc.
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(f"{cmd} {size} {operation}")
+        return self.run_tool(
+            "bw_mem", f"{cmd} {size} {operation}", size=size, operation=operation
+        )
 
     def benchmark_cmd_exec(self, cmd):
         """This function executes benchmark command,
@@ -139,7 +186,11 @@ class Benchmark(BaseLinux, FileOps):
         number_pros : Number of processes
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(f"{cmd} -s {mem_size} processes {number_pros}")
+        return self.run_tool(
+            "lat_ctx",
+            f"{cmd} -s {mem_size} processes {number_pros}",
+            mem_size=mem_size,
+        )
 
     def lat_dram_page(self, cmd, mem_size, timeout):
         """This function executes DRAM page latency command,
@@ -150,7 +201,9 @@ class Benchmark(BaseLinux, FileOps):
         timeout     : Timeout for executing the command
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(f"{cmd} -M {mem_size}", timeout=timeout)
+        return self.run_tool(
+            "lat_dram_page", f"{cmd} -M {mem_size}", timeout=timeout, mem_size=mem_size
+        )
 
     def lat_mem_rd(self, cmd, mem_size):
         """This function executes memory read latency command,
@@ -160,7 +213,7 @@ class Benchmark(BaseLinux, FileOps):
         mem_size    : Memory size
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(f"{cmd} {mem_size}")
+        return self.run_tool("lat_mem_rd", f"{cmd} {mem_size}", mem_size=mem_size)
 
     def lat_pagefault(self, cmd, filename):
         """This function finds page fault latency
@@ -174,10 +227,11 @@ class Benchmark(BaseLinux, FileOps):
         if not self.is_file_exist(filename):
             filename = "test.jpg"
             self.createfile(filename, 100000, 256)
-            self.console.runcmd(f"{cmd} {filename}")
+            result = self.run_tool("lat_pagefault", f"{cmd} {filename}")
             self.console.runcmd(f"rm {filename}")
         else:
-            self.console.runcmd(f"{cmd} {filename}")
+            result = self.run_tool("lat_pagefault", f"{cmd} {filename}")
+        return result
 
     def lat_sig_prot(self, cmd, filename):
         """This function finds protection fault latency
@@ -191,14 +245,15 @@ class Benchmark(BaseLinux, FileOps):
         if not self.is_file_exist(filename):
             filename = "test.pdf"
             self.createfile(filename, 1, 256)
-            self.console.runcmd(f"{cmd} prot {filename}")
+            result = self.run_tool("lat_sig", f"{cmd} prot {filename}")
             self.console.runcmd(f"rm {filename}")
         else:
-            self.console.runcmd(f"{cmd} prot {filename}")
+            result = self.run_tool("lat_sig", f"{cmd} prot {filename}")
+        return result
 
     def lat_syscall(self, cmd, filename, operations):
         """This function executes lantency of system calls commands
-        on,
+        on, all operations run in one console round trip
 
         Parameters:
         cmd         : system calls latency command to execute
@@ -206,15 +261,23 @@ class Benchmark(BaseLinux, FileOps):
         operations  : Operations to perform
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        if not self.is_file_exist(filename):
+        remove = not self.is_file_exist(filename)
+        if remove:
             filename = "test.pdf"
             self.createfile(filename, 1, 256)
-            for operation in operations:
-                self.console.runcmd(f"{cmd} {operation} {filename}")
+        cmds = [
+            self._prefixed(f"{cmd} {operation} {filename}") for operation in operations
+        ]
+        results = []
+        for operation, result in zip(operations, self.run_batch(cmds)):
+            if result.status != 0:
+                assert False, f"{result.cmd} failed: {result.output}"
+            bench = parse_benchmark("lat_syscall", result.output, operation=operation)
+            self.results.append(bench)
+            results.append(bench)
+        if remove:
             self.console.runcmd(f"rm {filename}")
-        else:
-            for operation in operations:
-                self.console.runcmd(f"{cmd} {operation} {filename}")
+        return results
 
     def lat_usleep(self, cmd, operation, time, timeout):
         """This function finds latency of usleep with different
@@ -228,9 +291,12 @@ class Benchmark(BaseLinux, FileOps):
         """
         self.is_bin_exist(cmd, silent_discard=False)
         if not time:
-            self.console.runcmd(f"{cmd} {operation}", timeout=timeout)
+            cmd = f"{cmd} {operation}"
         else:
-            self.console.runcmd(f"{cmd} -u {operation} {time}", timeout=timeout)
+            cmd = f"{cmd} -u {operation} {time}"
+        return self.run_tool(
+            "lat_usleep", cmd, timeout=timeout, operation=operation, time=time
+        )
 
     def cache(self, cmd, mem_size):
         """This function executes cache command with specific
@@ -241,7 +307,7 @@ class Benchmark(BaseLinux, FileOps):
         mem_size    : memory size
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(f"{cmd} -M {mem_size}")
+        return self.run_tool("cache", f"{cmd} -M {mem_size}", mem_size=mem_size)
 
     def msleep(self, cmd, time):
         """This function executes msleep command,
@@ -267,7 +333,7 @@ class Benchmark(BaseLinux, FileOps):
         mem_size    : memory size
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(f"{cmd} -M {mem_size}")
+        return self.run_tool("par_mem", f"{cmd} -M {mem_size}", mem_size=mem_size)
 
     def stream(self, cmd, mem_size):
         """This function stream command with memory size,
@@ -277,7 +343,7 @@ class Benchmark(BaseLinux, FileOps):
         mem_size    : memory size
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(f"{cmd} -M {mem_size}")
+        return self.run_tool("stream", f"{cmd} -M {mem_size}", mem_size=mem_size)
 
     def tlb(self, cmd, mem_size):
         """This function measures tlb performance of memory size,
@@ -287,7 +353,7 @@ class Benchmark(BaseLinux, FileOps):
         mem_size    : memory size
         """
         self.is_bin_exist(cmd, silent_discard=False)
-        self.console.runcmd(f"{cmd} -M {mem_size}")
+        return self.run_tool("tlb", f"{cmd} -M {mem_size}", mem_size=mem_size)
 
     def iotop(self, cmd, device, bs_size, count):
         """This function executes input/output top commands,
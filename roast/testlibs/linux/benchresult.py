@@ -0,0 +1,241 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import re
+import csv
+import json
+import logging
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+Metric = namedtuple("Metric", ["name", "value", "unit", "params"])
+BenchmarkResult = namedtuple("BenchmarkResult", ["tool", "params", "metrics"])
+
+number = r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?"
+pair_re = re.compile(rf"^\s*({number})\s+({number})\s*$")
+named_re = re.compile(rf"^\s*([^:]+?):\s+({number})\s+([^\s,]+)")
+
+units = {
+    "microseconds": "us",
+    "microsecond": "us",
+    "nanoseconds": "ns",
+    "nanosecond": "ns",
+    "seconds": "s",
+    "sec": "s",
+    "MB/sec": "MB/s",
+}
+
+
+def _value(text):
+    value = float(text)
+    return int(value) if value.is_integer() and "." not in text else value
+
+
+def parse_named(output: str, params=None) -> list:
+    """This Function parses "<name>: <value> <unit>" lines, the format of
+    lat_syscall, lat_pagefault, lat_sig, lat_usleep, stream and tlb.
+    """
+    metrics = []
+    for line in output.splitlines():
+        match = named_re.match(line)
+        if match:
+            name, value, unit = match.groups()
+            metrics.append(
+                Metric(name.strip(), _value(value), units.get(unit, unit), params or {})
+            )
+    return metrics
+
+
+def parse_pairs(output: str, name, x_name, x_unit, unit, params=None) -> list:
+    """This Function parses lmbench "<x> <value>" tables, key=value header
+    lines (e.g. stride=128, size=0k ovr=1.23) are added to the parameters of
+    the following rows.
+    """
+    metrics = []
+    header = dict(params or {})
+    for line in output.splitlines():
+        match = pair_re.match(line)
+        if match:
+            row = dict(header)
+            row[x_name] = _value(match.group(1))
+            if x_unit:
+                row[f"{x_name}_unit"] = x_unit
+            metrics.append(Metric(name, _value(match.group(2)), unit, row))
+            continue
+        for key, value in re.findall(r"(\w+)=(\S+)", line.replace('"', "")):
+            header[key] = value
+    return metrics
+
+
+def parse_bw_mem(output, **params):
+    return parse_pairs(output, "bandwidth", "size", "MB", "MB/s", params)
+
+
+def parse_lat_mem_rd(output, **params):
+    return parse_pairs(output, "latency", "size", "MB", "ns", params)
+
+
+def parse_lat_ctx(output, **params):
+    return parse_pairs(output, "context_switch", "processes", None, "us", params)
+
+
+def parse_par_mem(output, **params):
+    return parse_pairs(output, "parallelism", "size", "MB", "", params)
+
+
+def parse_lat_dram_page(output, **params):
+    return parse_named(output, params) or parse_pairs(
+        output, "latency", "size", "MB", "ns", params
+    )
+
+
+def parse_dhrystone(output, **params):
+    metrics = []
+    match = re.search(rf"Dhrystones per Second:\s*({number})", output)
+    if match:
+        dps = float(match.group(1))
+        metrics.append(Metric("dhrystones", dps, "ops/s", params))
+        # 1757 Dhrystones per second equal one VAX MIPS
+        metrics.append(Metric("dmips", round(dps / 1757, 2), "DMIPS", params))
+    match = re.search(
+        rf"Microseconds for one run through Dhrystone:\s*({number})", output
+    )
+    if match:
+        metrics.append(Metric("run_time", float(match.group(1)), "us", params))
+    return metrics
+
+
+def parse_whetstone(output, **params):
+    metrics = []
+    match = re.search(rf"Whetstones:\s*({number})\s*(\S+)", output)
+    if match:
+        metrics.append(
+            Metric("whetstones", float(match.group(1)), match.group(2), params)
+        )
+    match = re.search(rf"Duration:\s*({number})\s*sec", output)
+    if match:
+        metrics.append(Metric("duration", float(match.group(1)), "s", params))
+    return metrics
+
+
+def parse_linpack(output, **params):
+    """This Function parses the netlib linpack table,
+    "Reps Time(s) DGEFA DGESL OVERHEAD KFLOPS", one metric per row.
+    """
+    metrics = []
+    row_re = re.compile(
+        rf"^\s*(\d+)\s+({number})\s+({number})%\s+({number})%\s+({number})%\s+({number})\s*$"
+    )
+    array = re.search(r"Array size (\d+) X (\d+)", output)
+    for line in output.splitlines():
+        match = row_re.match(line)
+        if match:
+            row = dict(params, reps=int(match.group(1)), time=float(match.group(2)))
+            if array:
+                row["arraysize"] = int(array.group(1))
+            metrics.append(Metric("kflops", float(match.group(6)), "KFLOPS", row))
+    return metrics
+
+
+def parse_cache(output, **params):
+    """This Function parses lmbench cache output,
+    "L1 cache: 32768 bytes 1.23 nanoseconds 64 linesize 8.00 parallelism".
+    """
+    metrics = []
+    for line in output.splitlines():
+        match = re.match(
+            rf"^\s*(L\d) cache:\s*(\d+) bytes\s+({number}) nanoseconds", line
+        )
+        if match:
+            level = match.group(1)
+            metrics.append(Metric(f"{level}_size", int(match.group(2)), "B", params))
+            metrics.append(
+                Metric(f"{level}_latency", float(match.group(3)), "ns", params)
+            )
+    return metrics
+
+
+parsers = {
+    "bw_mem": parse_bw_mem,
+    "lat_ctx": parse_lat_ctx,
+    "lat_mem_rd": parse_lat_mem_rd,
+    "lat_dram_page": parse_lat_dram_page,
+    "par_mem": parse_par_mem,
+    "lat_syscall": lambda output, **params: parse_named(output, params),
+    "lat_pagefault": lambda output, **params: parse_named(output, params),
+    "lat_sig": lambda output, **params: parse_named(output, params),
+    "lat_usleep": lambda output, **params: parse_named(output, params),
+    "stream": lambda output, **params: parse_named(output, params),
+    "tlb": lambda output, **params: parse_named(output, params),
+    "cache": parse_cache,
+    "dhrystone": parse_dhrystone,
+    "whetstone": parse_whetstone,
+    "linpack": parse_linpack,
+}
+
+
+def parse_benchmark(tool: str, output: str, **params) -> BenchmarkResult:
+    """This Function parses the console output of a benchmark tool.
+
+    Parameters:
+        tool - key of parsers, e.g. "bw_mem"
+        output - tool output
+        params - run parameters kept with the result (size, operation, ...)
+    """
+    if tool not in parsers:
+        raise Exception(f"No benchmark parser for {tool}")
+    metrics = parsers[tool](output, **params)
+    if not metrics:
+        log.warning(f"No {tool} metrics found in output")
+    for metric in metrics:
+        log.info(f"{tool} {metric.name}: {metric.value} {metric.unit} {metric.params}")
+    return BenchmarkResult(tool, params, metrics)
+
+
+def result_as_dict(result: BenchmarkResult) -> dict:
+    return {
+        "tool": result.tool,
+        "params": result.params,
+        "metrics": [metric._asdict() for metric in result.metrics],
+    }
+
+
+def format_table(header, rows) -> str:
+    """This Function formats rows of values as a right aligned text table,
+    None values are shown as "-".
+    """
+    rows = [header] + [
+        ["-" if value is None else str(value) for value in row] for row in rows
+    ]
+    widths = [max(len(row[idx]) for row in rows) for idx in range(len(header))]
+    return "\n".join(
+        "  ".join(value.rjust(width) for value, width in zip(row, widths))
+        for row in rows
+    )
+
+
+def write_results_json(results, path: str) -> None:
+    """This Function saves a list of BenchmarkResult as json."""
+    with open(path, "w") as f:
+        json.dump([result_as_dict(result) for result in results], f, indent=2)
+
+
+def write_results_csv(results, path: str) -> None:
+    """This Function saves a list of BenchmarkResult as csv, one row per metric."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["tool", "metric", "value", "unit", "params"])
+        for result in results:
+            for metric in result.metrics:
+                writer.writerow(
+                    [
+                        result.tool,
+                        metric.name,
+                        metric.value,
+                        metric.unit,
+                        json.dumps(metric.params, sort_keys=True),
+                    ]
+                )
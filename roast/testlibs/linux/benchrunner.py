@@ -0,0 +1,235 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import math
+import logging
+import statistics
+from collections import namedtuple, OrderedDict
+
+log = logging.getLogger(__name__)
+
+BenchmarkSummary = namedtuple(
+    "BenchmarkSummary",
+    [
+        "tool",
+        "metric",
+        "unit",
+        "params",
+        "samples",
+        "median",
+        "mean",
+        "stddev",
+        "ci_low",
+        "ci_high",
+        "outliers",
+    ],
+)
+
+# two sided 95% student t quantiles by degrees of freedom
+# fmt: off
+t95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+# fmt: on
+
+
+def reject_outliers(samples, threshold=3.5, min_samples=5):
+    """This Function splits samples by the modified z-score (median absolute
+    deviation), returns (kept, rejected). Fewer than min_samples samples are
+    all kept, a MAD of a handful of close samples is too small to judge.
+    """
+    if len(samples) < max(min_samples, 3):
+        return list(samples), []
+    median = statistics.median(samples)
+    mad = statistics.median(abs(x - median) for x in samples)
+    if not mad:
+        return list(samples), []
+    kept, rejected = [], []
+    for x in samples:
+        (rejected if 0.6745 * abs(x - median) / mad > threshold else kept).append(x)
+    return kept, rejected
+
+
+def summarize(tool, metric, unit, params, samples, threshold=3.5, min_samples=5):
+    """This Function returns the BenchmarkSummary of a list of samples with
+    a 95% confidence interval of the mean.
+    """
+    kept, rejected = reject_outliers(samples, threshold, min_samples)
+    mean = statistics.mean(kept)
+    stddev = statistics.stdev(kept) if len(kept) > 1 else 0.0
+    if len(kept) > 1:
+        df = len(kept) - 1
+        t = t95[df - 1] if df <= len(t95) else 1.96
+        half = t * stddev / math.sqrt(len(kept))
+    else:
+        half = math.inf
+    return BenchmarkSummary(
+        tool,
+        metric,
+        unit,
+        params,
+        kept,
+        statistics.median(kept),
+        mean,
+        stddev,
+        mean - half,
+        mean + half,
+        rejected,
+    )
+
+
+def compare_summaries(baseline, candidate) -> dict:
+    """This Function compares two lists of BenchmarkSummary.
+
+    Returns dict of (tool, metric, params) -> (relative change of the median
+    in percent, True when the confidence intervals do not overlap).
+    """
+    base = {(s.tool, s.metric, str(s.params)): s for s in baseline}
+    changes = {}
+    for summary in candidate:
+        key = (summary.tool, summary.metric, str(summary.params))
+        if key not in base:
+            continue
+        ref = base[key]
+        change = 100 * (summary.median - ref.median) / ref.median if ref.median else 0
+        significant = summary.ci_low > ref.ci_high or summary.ci_high < ref.ci_low
+        changes[key] = (round(change, 2), significant)
+    return changes
+
+
+class BenchmarkRunner:
+    """This class runs a Benchmark method repeatedly and summarizes the
+    metrics it returns.
+
+    Parameters:
+        bench - Benchmark object
+        warmup - untimed iterations before the measurement
+        repetitions - maximum number of timed iterations
+        min_repetitions - iterations before the early stop check
+        ci_target - stop once the 95% confidence interval half width of every
+                    metric is within this fraction of its mean
+        cpus - cpu list passed to taskset, e.g. "1" or "2-3"
+        governor - cpufreq governor set for the run, e.g. "performance"
+        outlier_threshold - modified z-score beyond which samples are rejected,
+                            outliers are only rejected from min_repetitions + 2
+                            samples on
+
+    >>> Usage:
+        runner = BenchmarkRunner(bench, warmup=1, repetitions=10, cpus="1")
+        summaries = runner.run(bench.bw_mem, "bw_mem", "64M", "rd")
+    """
+
+    def __init__(
+        self,
+        bench,
+        warmup=1,
+        repetitions=10,
+        min_repetitions=3,
+        ci_target=0.02,
+        cpus=None,
+        governor=None,
+        outlier_threshold=3.5,
+    ):
+        if repetitions < 1:
+            raise Exception(f"repetitions must be at least 1, got {repetitions}")
+        self.bench = bench
+        self.warmup = warmup
+        self.repetitions = repetitions
+        self.min_repetitions = min_repetitions
+        self.ci_target = ci_target
+        self.cpus = cpus
+        self.governor = governor
+        self.outlier_threshold = outlier_threshold
+
+    def _set_governor(self, governor):
+        """Sets governor on all cpus, returns (path, governor) in use before."""
+        path = "/sys/devices/system/cpu/cpu*/cpufreq/scaling_governor"
+        saved, result = self.bench.run_batch(
+            [
+                f'for g in {path}; do [ -f $g ] && echo "$g $(cat $g)"; done',
+                f"for g in {path}; do [ -f $g ] && echo {governor} > $g; done",
+            ]
+        )
+        governors = []
+        for line in saved.output.splitlines():
+            fields = line.split()
+            if len(fields) == 2 and fields[0].endswith("/scaling_governor"):
+                governors.append(fields)
+        if not governors:
+            log.warning("No cpufreq governor found, running without one")
+        elif result.status != 0:
+            log.warning(f"Failed to set cpufreq governor: {result.output}")
+        return governors
+
+    def _restore_governor(self, governors):
+        if governors:
+            self.bench.run_batch([f"echo {gov} > {path}" for path, gov in governors])
+
+    def _collect(self, method, args, kwargs, samples):
+        results = method(*args, **kwargs)
+        if not isinstance(results, list):
+            results = [results]
+        for result in results:
+            for idx, metric in enumerate(result.metrics):
+                key = (result.tool, metric.name, idx)
+                if key not in samples:
+                    samples[key] = (metric.unit, metric.params, [])
+                samples[key][2].append(metric.value)
+
+    def _summaries(self, samples):
+        return [
+            summarize(
+                tool,
+                name,
+                unit,
+                params,
+                values,
+                threshold=self.outlier_threshold,
+                min_samples=self.min_repetitions + 2,
+            )
+            for (tool, name, _), (unit, params, values) in samples.items()
+        ]
+
+    def _converged(self, summaries):
+        for s in summaries:
+            half = (s.ci_high - s.ci_low) / 2
+            if not s.mean or half / abs(s.mean) > self.ci_target:
+                return False
+        return True
+
+    def run(self, method, *args, **kwargs):
+        """This Function runs method with args and returns a list of
+        BenchmarkSummary, one per metric.
+        """
+        governors = self._set_governor(self.governor) if self.governor else []
+        prefix = self.bench.cmd_prefix
+        if self.cpus is not None:
+            self.bench.cmd_prefix = f"taskset -c {self.cpus}"
+        try:
+            start = len(self.bench.results)
+            for _ in range(self.warmup):
+                method(*args, **kwargs)
+            del self.bench.results[start:]
+            samples = OrderedDict()
+            summaries = []
+            for rep in range(1, self.repetitions + 1):
+                self._collect(method, args, kwargs, samples)
+                summaries = self._summaries(samples)
+                if rep >= self.min_repetitions and self._converged(summaries):
+                    log.info(f"Confidence interval reached after {rep} repetitions")
+                    break
+        finally:
+            self.bench.cmd_prefix = prefix
+            if governors:
+                self._restore_governor(governors)
+        for s in summaries:
+            log.info(
+                f"{s.tool} {s.metric}: median {s.median} {s.unit}, "
+                f"stddev {s.stddev:.4g}, 95% CI [{s.ci_low:.4g}, {s.ci_high:.4g}], "
+                f"{len(s.samples)} samples, {len(s.outliers)} outliers"
+            )
+        return summaries
@@ -0,0 +1,216 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import io
+import os
+import time
+import base64
+import tarfile
+import logging
+from collections import namedtuple
+from roast.testlibs.linux.benchresult import parse_benchmark, parsers
+
+log = logging.getLogger(__name__)
+
+SuiteJob = namedtuple("SuiteJob", ["name", "cmd", "tool", "stdin", "timeout", "params"])
+SuiteResult = namedtuple("SuiteResult", ["name", "status", "output", "result"])
+
+runner_script = [
+    'cd "$(dirname "$0")"',
+    "echo $$ > pid",
+    "while read name timeout tool; do",
+    "    [ -f $name.rc ] && continue",
+    '    echo "running $name" > status',
+    "    input=/dev/null; [ -f $name.in ] && input=$name.in",
+    "    sh $name.sh < $input > $name.out 2>&1 &",
+    "    job=$!",
+    # the watchdog kills its sleep when it is stopped, no sleep is left behind
+    "    ( trap 'kill $s; exit' TERM; sleep $timeout & s=$!; wait $s;",
+    "      pkill -P $job; kill $job ) 2>/dev/null &",
+    "    watchdog=$!",
+    "    wait $job",
+    "    echo $? > $name.rc",
+    "    kill $watchdog 2>/dev/null",
+    "done < manifest",
+    "echo done > status",
+]
+
+
+class BenchmarkSuite:
+    """This class runs benchmarks detached from the console.
+
+    The jobs are uploaded as scripts with a manifest, one runner started
+    with setsid/nohup executes them in order with output to files, the host
+    only polls a status file. Interactive tools read their answers from a
+    stdin file. Finished jobs are skipped when the runner is started again,
+    so a suite survives a console reconnect with resume().
+
+    Parameters:
+        bench - BaseLinux based testlib object, e.g. Benchmark
+        workdir - target directory for scripts and results
+        poll_interval - seconds between status polls
+
+    >>> Usage:
+        suite = BenchmarkSuite(bench)
+        suite.add("dram", "lat_dram_page -M 64M", tool="lat_dram_page")
+        suite.add_linpack("linpack", arraysize=200)
+        suite.add("stress", "stress-ng --cpu 4 -t 600", timeout=900)
+        results = suite.run(timeout=3600)
+    """
+
+    def __init__(self, bench, workdir="/tmp/roast_suite", poll_interval=30):
+        self.bench = bench
+        self.workdir = workdir
+        self.poll_interval = poll_interval
+        self.jobs = []
+
+    def add(self, name, cmd, tool=None, stdin=None, timeout=900, **params):
+        """This Function adds a job to the suite.
+
+        Parameters:
+            name - unique job name, used for the result files
+            cmd - shell command
+            tool - benchresult parser for the output, None keeps raw output
+            stdin - list of input lines for interactive tools
+            timeout - seconds before the job is killed
+            params - run parameters stored with the parsed result
+        """
+        if tool and tool not in parsers:
+            raise Exception(f"No benchmark parser for {tool}")
+        self.jobs.append(SuiteJob(name, cmd, tool, stdin, timeout, params))
+
+    def add_linpack(self, cmd, arraysize, quit_cmd="q", name="linpack", timeout=900):
+        self.add(
+            name,
+            cmd,
+            tool="linpack",
+            stdin=[arraysize, quit_cmd],
+            timeout=timeout,
+            arraysize=arraysize,
+        )
+
+    def upload(self):
+        """This Function writes the job scripts, stdin files, manifest and
+        runner to workdir.
+        """
+        self.bench.console.runcmd(f"rm -rf {self.workdir}; mkdir -p {self.workdir}")
+        for job in self.jobs:
+            self.bench.write_lines(f"{self.workdir}/{job.name}.sh", [job.cmd])
+            if job.stdin is not None:
+                self.bench.write_lines(
+                    f"{self.workdir}/{job.name}.in", [str(line) for line in job.stdin]
+                )
+        self.bench.write_lines(
+            f"{self.workdir}/manifest",
+            [f"{job.name} {job.timeout} {job.tool or '-'}" for job in self.jobs],
+        )
+        self.bench.write_lines(f"{self.workdir}/run.sh", runner_script)
+
+    def launch(self):
+        """This Function starts the runner detached from the console and
+        returns once it wrote its pid, so the first poll sees it alive.
+        """
+        self.bench.console.runcmd(
+            f"rm -f {self.workdir}/pid; "
+            f"(cd {self.workdir} && if command -v setsid > /dev/null; then "
+            "exec setsid sh run.sh; else exec nohup sh run.sh; fi "
+            "> run.log 2>&1 < /dev/null &); "
+            f"i=0; while [ ! -s {self.workdir}/pid ] && [ $i -lt 100 ]; do "
+            "sleep 0.1; i=$((i+1)); done"
+        )
+
+    def state(self):
+        """This Function returns (status file content, runner alive)."""
+        status, alive = self.bench.run_batch(
+            [
+                f"cat {self.workdir}/status",
+                f"kill -0 $(cat {self.workdir}/pid) 2>/dev/null && echo alive",
+            ]
+        )
+        return status.output.strip(), "alive" in alive.output
+
+    def wait(self, timeout=3600):
+        """This Function polls the status file until all jobs are done, a
+        dead runner with pending jobs is started again.
+        """
+        end = time.time() + timeout
+        restarted = False
+        while True:
+            status, alive = self.state()
+            if status == "done":
+                return
+            if not alive:
+                if restarted:
+                    assert False, f"Benchmark suite runner died: {status}"
+                log.info(f"Benchmark suite runner not active ({status}), resuming")
+                self.launch()
+                restarted = True
+            else:
+                restarted = False
+                log.info(f"Benchmark suite: {status}")
+            if time.time() > end:
+                assert False, f"Benchmark suite timed out: {status}"
+            time.sleep(self.poll_interval)
+
+    def fetch(self, dest=None):
+        """This Function fetches the compressed results and parses them.
+
+        Parameters:
+            dest - host directory to keep the raw result files
+
+        Returns dict of job name to SuiteResult.
+        """
+        result = self.bench.run_batch(
+            [
+                f"cd {self.workdir} && tar cf - manifest *.out *.rc | gzip -c | base64",
+            ],
+            timeout=600,
+        )[0]
+        if result.status != 0:
+            assert False, f"Failed to fetch benchmark results: {result.output}"
+        data = base64.b64decode("".join(result.output.split()))
+        files = {}
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+            for member in tar.getmembers():
+                if member.isfile():
+                    name = os.path.basename(member.name)
+                    files[name] = tar.extractfile(member).read().decode(errors="ignore")
+        if dest:
+            os.makedirs(dest, exist_ok=True)
+            for name, text in files.items():
+                with open(os.path.join(dest, name), "w") as f:
+                    f.write(text)
+        params = {job.name: job.params for job in self.jobs}
+        results = {}
+        for line in files.get("manifest", "").splitlines():
+            name, _, tool = line.split()
+            output = files.get(f"{name}.out", "")
+            status = files.get(f"{name}.rc", "").strip()
+            status = int(status) if status else None
+            bench = None
+            if tool != "-" and status == 0:
+                bench = parse_benchmark(tool, output, **params.get(name, {}))
+                if hasattr(self.bench, "results"):
+                    self.bench.results.append(bench)
+            elif status != 0:
+                log.error(f"Benchmark {name} failed with {status}")
+            results[name] = SuiteResult(name, status, output, bench)
+        return results
+
+    def run(self, timeout=3600, dest=None):
+        """This Function uploads, launches and waits for the suite and
+        returns the fetched results.
+        """
+        self.upload()
+        self.launch()
+        self.wait(timeout)
+        return self.fetch(dest)
+
+    def resume(self, timeout=3600, dest=None):
+        """This Function continues a suite started before a console
+        reconnect, finished jobs are not run again.
+        """
+        self.wait(timeout)
+        return self.fetch(dest)
@@ -3,9 +3,61 @@
 # SPDX-License-Identifier: MIT
 #
 
+import re
+import logging
+from collections import namedtuple
 from roast.testlibs.linux.baselinux import BaseLinux
 from roast.testlibs.linux.dts import DtsLinux
 from roast.testlibs.linux.sysdevices import SysDevices
+from roast.testlibs.linux.dmesg import get_dmesg_log
+
+log = logging.getLogger(__name__)
+
+DmaThread = namedtuple(
+    "DmaThread", ["thread", "channel", "tests", "failures", "iops", "kbps", "result"]
+)
+DmaTestResult = namedtuple(
+    "DmaTestResult", ["buf_size", "threads", "tests", "failures", "iops", "kbps"]
+)
+
+summary_re = re.compile(
+    r"(\S+): summary (\d+) tests, (\d+) failures ([\d.]+) iops ([\d.]+) KB/s \((-?\d+)\)"
+)
+dmatest_errors = [
+    "Could not start test",
+    "no channels configured",
+    "Device or resource busy",
+]
+
+
+def parse_dmatest_summary(message: str):
+    """This Function parses a dmatest "summary" line into DmaThread,
+    e.g. "dma0chan0-copy0: summary 10 tests, 0 failures 3289.04 iops 26312 KB/s (0)".
+    """
+    match = summary_re.search(message)
+    if not match:
+        return None
+    thread, tests, failures, iops, kbps, result = match.groups()
+    return DmaThread(
+        thread,
+        thread.rsplit("-", 1)[0],
+        int(tests),
+        int(failures),
+        float(iops),
+        float(kbps),
+        int(result),
+    )
+
+
+def aggregate_dmatest(buf_size, threads) -> DmaTestResult:
+    return DmaTestResult(
+        buf_size,
+        threads,
+        sum(thread.tests for thread in threads),
+        sum(thread.failures for thread in threads),
+        round(sum(thread.iops for thread in threads), 2),
+        round(sum(thread.kbps for thread in threads), 2),
+    )
 
 
 class DmaLinux(DtsLinux, SysDevices, BaseLinux):
@@ -20,29 +72,93 @@ class DmaLinux(DtsLinux, SysDevices, BaseLinux):
         self.dma_dts_nodes = self.get_dts_nodes(self.dma_dts_list, dmaIp)
         return self.get_channels(self.dma_dts_nodes, "dma")
 
-    def dma_run(self, timeout=60):
-        distro = self.get_system_distro()
-        if distro == "systemd":
-            self.console.runcmd("journalctl -f > /var/log/messages 2>&1 &")
-        self.console.runcmd("echo > /var/log/messages")
-        self.console.runcmd(
-            f"echo 1 > {self.sys_dmatest}/run; sleep {timeout}; \r\n",
-            timeout=timeout + 60,
-        )
-        if distro == "systemd":
-            self.console.runcmd("pkill journalctl")
-        self.console.sync()
-        self.console.runcmd(
-            "cat /var/log/messages",
-            expected=self.console.prompt,
-            expected_failures=[
-                "Could not start test",
-                "no channels configured",
-                "Device or resource busy",
+    def _dmatest_run(self, timeout):
+        """Starts the configured dmatest channels, polls the run parameter
+        until all threads are done and returns their DmaThread.
+        """
+        dmesg = get_dmesg_log(self.console)
+        dmesg.update()
+        run = f"{self.sys_dmatest}/run"
+        result = self.run_batch(
+            [
+                f"echo 1 > {run} && i=0 && "
+                f'while [ "$(cat {run})" = Y ]; do '
+                f"i=$((i+1)); [ $i -gt {timeout} ] && break; sleep 1; done; "
+                f"cat {run}"
             ],
-            timeout=60,
-            wait_for_prompt=False,
-        )
+            timeout=timeout + 60,
+        )[0]
+        messages = [record.message for record in dmesg.update()]
+        for error in dmatest_errors:
+            for text in [result.output] + messages:
+                if error in text:
+                    assert False, f"dmatest failed: {text}"
+        if result.status != 0 or result.output.split()[-1:] != ["N"]:
+            assert False, f"dmatest did not complete in {timeout}s: {result.output}"
+        threads = [parse_dmatest_summary(message) for message in messages]
+        return [thread for thread in threads if thread]
+
+    def dma_run(self, timeout=60):
+        self.dmatest_threads = self._dmatest_run(timeout)
+
+    def dmatest(
+        self,
+        channels=None,
+        threads=1,
+        iterations=10,
+        buf_sizes=(16384,),
+        noverify=None,
+        test_timeout=None,
+        timeout=300,
+    ):
+        """This Function runs dmatest on several channels at once, once per
+        buffer size.
+
+        Parameters:
+            channels - dma channel names, e.g. ["dma0chan0", "dma0chan1"],
+                       None tests all channels
+            threads - threads per channel
+            iterations - transfers per thread
+            buf_sizes - list of test_buf_size values for a throughput curve
+            noverify - 1 to skip the data verification
+            test_timeout - dmatest transfer timeout in ms
+            timeout - seconds to wait for one run
+
+        Returns list of DmaTestResult with per thread and summed tests,
+        failures, iops and KB/s.
+        """
+        params = self.sys_dmatest
+        results = []
+        for buf_size in buf_sizes:
+            cmds = [
+                f"[ -d {params} ] || modprobe dmatest",
+                f"echo {threads} > {params}/threads_per_chan",
+                f"echo {iterations} > {params}/iterations",
+                f"echo {buf_size} > {params}/test_buf_size",
+            ]
+            if noverify is not None:
+                cmds.append(f"echo {noverify} > {params}/noverify")
+            if test_timeout is not None:
+                cmds.append(f"echo {test_timeout} > {params}/timeout")
+            # channels are added with the parameters in place at that time,
+            # an empty channel adds all channels
+            if channels is None:
+                cmds.append(f"echo '' > {params}/channel")
+            else:
+                cmds += [f"echo {channel} > {params}/channel" for channel in channels]
+            for result in self.run_batch(cmds):
+                if result.status != 0:
+                    assert False, f"dmatest setup failed: {result.cmd}: {result.output}"
+            result = aggregate_dmatest(buf_size, self._dmatest_run(timeout))
+            if not result.threads:
+                assert False, "dmatest reported no summary"
+            log.info(
+                f"dmatest buf {buf_size}: {len(result.threads)} threads, "
+                f"{result.tests} tests, {result.failures} failures, "
+                f"{result.iops} iops, {result.kbps} KB/s"
+            )
+            results.append(result)
+        return results
 
     def dmatest_cfg_iterations(self, iterations):
         self.console.runcmd(f"echo {iterations} > {self.sys_dmatest}/iterations")
@@ -92,7 +208,6 @@ class DmaLinux(DtsLinux, SysDevices, BaseLinux):
         )
 
     def dma_print_result(self):
-        val1 = self.console.output().count(": summary ")
-        val2 = self.console.output().count(", 0 failures")
-        if val1 == 0 or val1 != val2:
+        threads = getattr(self, "dmatest_threads", [])
+        if not threads or any(thread.failures for thread in threads):
             assert False, "dma test failed"
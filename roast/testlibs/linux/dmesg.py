@@ -0,0 +1,200 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import re
+import time
+import weakref
+import logging
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+DmesgRecord = namedtuple(
+    "DmesgRecord", ["timestamp", "facility", "level", "driver", "message"]
+)
+
+record_re = re.compile(r"^<(\d+)>(?:\[\s*(\d+\.\d+)\])?\s?(.*)$")
+lines_re = re.compile(r"DMESG_LINES (\d+)")
+boot_id_re = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+driver_re = re.compile(r"^([\w.@-]+)(?: [\w.@:-]+){0,2}: ")
+
+# one log per console so all testlib instances share the cursor
+dmesg_logs = weakref.WeakKeyDictionary()
+
+
+def parse_dmesg_record(line: str):
+    """This Function parses a "dmesg -r" line into a DmesgRecord, the
+    timestamp is None without CONFIG_PRINTK_TIME.
+    """
+    match = record_re.match(line.strip())
+    if not match:
+        return None
+    prio, timestamp, message = match.groups()
+    driver = driver_re.match(message)
+    return DmesgRecord(
+        float(timestamp) if timestamp else None,
+        int(prio) >> 3,
+        int(prio) & 7,
+        driver.group(1) if driver else None,
+        message,
+    )
+
+
+class DmesgLog:
+    """This class keeps a host side copy of the target kernel log.
+
+    Each update() fetches only the records logged since the last one, the
+    records are indexed by driver prefix, facility and level. A change of
+    the kernel boot_id starts a new log. Records are followed by timestamp,
+    a kernel without printk timestamps is followed by line count, which
+    requires that the log buffer does not wrap between updates.
+
+    >>> Usage:
+        dmesg = get_dmesg_log(console)
+        dmesg.update()
+        dmesg.search("probe", driver="xilinx-zynqmp-dma")
+        dmesg.expect("link becomes ready", timeout=30)
+    """
+
+    def __init__(self, console):
+        self.console = console
+        self.reset()
+
+    def reset(self, boot_id=None):
+        self.boot_id = boot_id
+        self.records = []
+        self.by_driver = {}
+        self.by_facility = {}
+        self.by_level = {}
+        self.cursor = 0.0
+        self.lines = 0
+        self.timed = True
+
+    def _add(self, record):
+        idx = len(self.records)
+        self.records.append(record)
+        self.by_driver.setdefault(record.driver, []).append(idx)
+        self.by_facility.setdefault(record.facility, []).append(idx)
+        self.by_level.setdefault(record.level, []).append(idx)
+
+    def update(self, timeout=200) -> list:
+        """This Function fetches the records logged since the last update.
+
+        Returns the list of new DmesgRecord.
+        """
+        if self.timed:
+            select = f"awk -F'[][]' '$2+0 >= {self.cursor:.6f}'"
+        else:
+            select = f"tail -n +{self.lines + 1}"
+        self.console.runcmd(
+            "m=DMESG_; cat /proc/sys/kernel/random/boot_id; "
+            "dmesg -r > /tmp/roast_dmesg; "
+            'echo "${m}LINES $(wc -l < /tmp/roast_dmesg)"; '
+            f"{select} /tmp/roast_dmesg; "
+            'echo "${m}END"',
+            expected="DMESG_END",
+            wait_for_prompt=False,
+            timeout=timeout,
+        )
+        output = self.console.output()
+        self.console.expect(timeout=timeout)
+        boot_id = boot_id_re.search(output)
+        boot_id = boot_id.group(0) if boot_id else None
+        if boot_id != self.boot_id:
+            if self.boot_id:
+                log.info("Target rebooted, starting a new dmesg log")
+            fetched_all = self.cursor == 0 and self.lines == 0
+            self.reset(boot_id)
+            if not fetched_all:
+                # the cursor of the old boot filtered the new log
+                return self.update(timeout)
+        # records at the cursor timestamp are fetched again, skip known ones
+        seen = {
+            record.message for record in self.records if record.timestamp == self.cursor
+        }
+        new = []
+        for line in output.splitlines():
+            record = parse_dmesg_record(line)
+            if not record:
+                continue
+            if record.timestamp is None:
+                if self.timed:
+                    log.info("dmesg has no printk timestamps, following it by line")
+                    self.timed = False
+            elif record.timestamp < self.cursor:
+                continue
+            elif record.timestamp == self.cursor and record.message in seen:
+                continue
+            self._add(record)
+            new.append(record)
+        lines = lines_re.search(output)
+        self.lines = int(lines.group(1)) if lines else self.lines + len(new)
+        timed = [record for record in self.records if record.timestamp is not None]
+        if timed:
+            self.cursor = timed[-1].timestamp
+        return new
+
+    def search(self, pattern=None, driver=None, facility=None, level=None, since=0):
+        """This Function searches the local log.
+
+        Parameters:
+            pattern - regex matched against the message
+            driver - driver prefix, e.g. "sdhci-arasan"
+            facility - syslog facility, 0 for kernel messages
+            level - highest log level to include, e.g. 3 for errors
+            since - only records with a timestamp >= since, records without
+                    timestamp are not filtered
+        """
+        if driver is not None:
+            idxs = self.by_driver.get(driver, [])
+        elif facility is not None:
+            idxs = self.by_facility.get(facility, [])
+        else:
+            idxs = range(len(self.records))
+        regex = re.compile(pattern) if pattern else None
+        records = []
+        for idx in idxs:
+            record = self.records[idx]
+            if record.timestamp is not None and record.timestamp < since:
+                continue
+            if facility is not None and record.facility != facility:
+                continue
+            if level is not None and record.level > level:
+                continue
+            if regex and not regex.search(record.message):
+                continue
+            records.append(record)
+        return records
+
+    def expect(self, pattern, timeout=60, interval=2, **kwargs):
+        """This Function waits for a record matching pattern.
+
+        The local log is searched first, the target is polled for new records
+        until timeout. Returns the first matching DmesgRecord.
+        """
+        records = self.search(pattern, **kwargs)
+        end = time.time() + timeout
+        while not records:
+            if time.time() > end:
+                assert False, f"'{pattern}' not found in dmesg"
+            time.sleep(interval)
+            self.update()
+            records = self.search(pattern, **kwargs)
+        return records[0]
+
+    def text(self) -> str:
+        return "".join(
+            f"[{record.timestamp:12.6f}] {record.message}\n"
+            if record.timestamp is not None
+            else f"{record.message}\n"
+            for record in self.records
+        )
+
+
+def get_dmesg_log(console) -> DmesgLog:
+    """This Function returns the DmesgLog shared by all users of console."""
+    if console not in dmesg_logs:
+        dmesg_logs[console] = DmesgLog(console)
+    return dmesg_logs[console]
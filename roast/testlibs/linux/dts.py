@@ -4,20 +4,30 @@
 #
 
 import logging
+import posixpath
 
 log = logging.getLogger(__name__)
 
 
 class DtsLinux:
     def get_dtsbus_node(self, buses=("amba* -o ", "axi"), bus_req="axi"):
-        self.console.sync()
-        cmd = ""
-        for bus in buses:
-            cmd += f" -name {bus} "
-        self.console.runcmd(
-            f"find {self.sys_dt_base}/ -maxdepth 1 \({cmd}\)", expected="\r\n"
-        )
-        if bus_req in self.console.output():
+        snapshot = self.sys_snapshot()
+        if snapshot:
+            # same text as the find output below, so both paths match alike
+            matches = []
+            for bus in buses:
+                matches += snapshot.glob(bus.replace(" -o ", "").strip())
+            output = " ".join(f"{self.sys_dt_base}/{match}" for match in matches)
+        else:
+            self.console.sync()
+            cmd = ""
+            for bus in buses:
+                cmd += f" -name {bus} "
+            self.console.runcmd(
+                f"find {self.sys_dt_base}/ -maxdepth 1 \({cmd}\)", expected="\r\n"
+            )
+            output = self.console.output()
+        if bus_req in output:
             return f"/{bus_req}/"
         else:
             assert False, f"No buses {buses} found in {self.sys_dt_base}"
@@ -25,24 +35,37 @@ class DtsLinux:
     def check_dt_node_status(self, dts_base=None, dt_nodes=None):
         if not dts_base:
             dts_base = self.sys_dt_base
+        snapshot = self.sys_snapshot()
+        if snapshot and dts_base == self.sys_dt_base:
+            return [snapshot.status(dt_node.strip("/")) for dt_node in dt_nodes]
+        self.console.sync()
+        results = self.run_batch(
+            [f"cat {dts_base}/{dt_node}/status" for dt_node in dt_nodes]
+        )
         node_status = []
-        for dt_node in dt_nodes:
-            self.dts_path = f"{dts_base}/{dt_node}/status"
-            dt_status = self.is_file_exist(self.dts_path)
-            if not dt_status:
-                node_status.append(True)
-                continue
-            self.console.runcmd(f"cat {self.dts_path}", expected="\r\n")
-            if (
-                "ok" in self.console.output()
-                and "disabled" not in self.console.output()
-            ):
-                node_status.append(True)
-            else:
-                node_status.append(False)
+        for dt_node, result in zip(dt_nodes, results):
+            if result.status is None:
+                assert False, f"No status received for {dts_base}/{dt_node}"
+            # nodes without status property are enabled
+            node_status.append(
+                result.status != 0
+                or ("ok" in result.output and "disabled" not in result.output)
+            )
         return node_status
 
     def list_dts_parameters(self, node_path, parameter=None):
+        snapshot = self.sys_snapshot()
+        if snapshot:
+            pattern = f"{node_path}/{parameter}" if parameter else node_path
+            matches = snapshot.glob(pattern)
+            if len(matches) == 1 and snapshot.is_node(matches[0]):
+                dts_params = snapshot.entries(matches[0])
+            else:
+                dts_params = [f"{self.sys_dt_base}/{match}" for match in matches]
+            if not dts_params:
+                log.info(f"No dts entries found for {node_path}")
+                return False
+            return [i for i in dts_params if "root" not in i]
         self.console.sync()
         self.console.runcmd(
             f"ls {self.sys_dt_base}/{node_path}/{parameter}", expected="\r\n"
@@ -56,10 +79,21 @@ class DtsLinux:
 
     def get_dts_nodes(self, dts_list, Ip):
         self.dts_nodes = []
-        for node in dts_list:
+        snapshot = self.sys_snapshot()
+        base = f"{self.sys_dt_base}/"
+        if snapshot and all(node.startswith(base) for node in dts_list):
+            outputs = [
+                snapshot.text(*posixpath.split(node[len(base) :].strip("/"))) or ""
+                for node in dts_list
+            ]
+        else:
             self.console.sync()
-            self.console.runcmd(f"cat {node}", expected="\r\n")
-            if Ip in self.console.output():
+            outputs = [
+                result.output
+                for result in self.run_batch([f"cat {node}" for node in dts_list])
+            ]
+        for node, output in zip(dts_list, outputs):
+            if Ip in output:
                 self.dts_nodes.append(
                     node.split("/")[-2][node.split("/")[-2].find("@") + 1 :]
                 )
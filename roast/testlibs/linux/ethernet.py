@@ -5,9 +5,27 @@
 
 import time
 import logging
+import itertools
 from roast.utils import *  # pylint: disable=unused-wildcard-import
 from roast.xexpect import Xexpect
 from roast.testlibs.linux.baselinux import BaseLinux
+from roast.testlibs.linux.iperf import run_iperf3, run_capture, wait_for_port
+from roast.testlibs.linux.pktgen import (
+    aggregate,
+    parse_pktgen_device,
+    pktgen_config,
+    pktgen_dir,
+)
+from roast.testlibs.linux.netsweep import (
+    SweepResult,
+    format_sweep_table,
+    iperf_point,
+    parse_netperf,
+    sweep_directions,
+    sweep_points,
+    wait_for_link,
+    write_sweep_csv,
+)
 from roast.component.board.boot import is_linux_cons
 
 log = logging.getLogger(__name__)
@@ -37,6 +55,8 @@ class Ethernet(BaseLinux):
         self.udp_mtu = "1500"
         self.iperf3_binary = "iperf3"
         self.extra_iperf3_args = ""
+        self.iperf3_duration = 10
+        self.iperf3_parallel = 1
         self.timeout = "60"
         self.client_user = None
         self.client_password = None
@@ -90,28 +110,87 @@ class Ethernet(BaseLinux):
             self.ping_test()
 
     def eth_pktgen(self):
-        commands = [
-            "echo 'stop' > /proc/net/pktgen/pgctrl",
-            "echo 'rem_device_all' > /proc/net/pktgen/kpktgend_0",
-            f"echo 'add_device {self.eth_interface}' > /proc/net/pktgen/kpktgend_0",
-            f"echo 'count {self.pktgen_count}' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'clone_skb 100' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'pkt_size {self.pktgen_size}' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'burst {self.pktgen_burst}' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'delay {self.pktgen_delay}' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'vlan_id {self.pktgen_vlan_id}' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'vlan_p 0' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'vlan_cfi 0' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'frags {self.pktgen_frags}' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'dst {self.client_ip}' > /proc/net/pktgen/{self.eth_interface}",
-            f"echo 'dst_mac {self.client_mac}' > /proc/net/pktgen/{self.eth_interface}",
-            "echo 'start' > /proc/net/pktgen/pgctrl",
-            f"cat /proc/net/pktgen/{self.eth_interface}",
-            "paramsCount=$(grep -E 'Params: count' /proc/net/pktgen/eth0 | awk '{print substr($3,1)}')",
-            "pktSofar=$(grep -E 'pkts-sofar' /proc/net/pktgen/eth0 | awk '{print substr($2,1)}')",
-            '[ "$paramsCount" -eq "$pktSofar" ]',
+        params = [
+            f"vlan_id {self.pktgen_vlan_id}",
+            "vlan_p 0",
+            "vlan_cfi 0",
+            f"frags {self.pktgen_frags}",
         ]
-        self.terminal.runcmd_list(cmd_list=commands, timeout=60)
+        result = self.pktgen(threads=1, params=params)[0]
+        if result.packets != int(self.pktgen_count):
+            assert False, f"pktgen sent {result.packets} of {self.pktgen_count} packets"
+
+    def pktgen(
+        self,
+        sizes=None,
+        bursts=None,
+        threads=None,
+        count=None,
+        params=None,
+        timeout=300,
+    ):
+        """This Function runs pktgen with one kpktgend thread per cpu, each on
+        its own tx queue, for every packet size and burst value.
+
+        Parameters:
+            sizes - list of packet sizes, default pktgen_size
+            bursts - list of burst values, default pktgen_burst
+            threads - number of kpktgend threads, default all cpus
+            count - packets per thread, default pktgen_count
+            params - extra pktgen device commands, e.g. ["frags 4"]
+            timeout - seconds for one run
+
+        Returns list of PktgenResult with per thread and aggregate pps,
+        Mb/s and errors.
+        """
+        sizes = sizes or [self.pktgen_size]
+        bursts = bursts or [self.pktgen_burst]
+        count = count or self.pktgen_count
+        setup = self.run_batch(
+            [
+                f"[ -d {pktgen_dir} ] || modprobe pktgen",
+                "nproc",
+                f"ls -d /sys/class/net/{self.eth_interface}/queues/tx-* | wc -l",
+            ]
+        )
+        if setup[0].status != 0:
+            assert False, f"pktgen not available: {setup[0].output}"
+        threads = threads or int(setup[1].output)
+        queues = max(1, int(setup[2].output or 1))
+        base = [
+            f"count {count}",
+            "clone_skb 100",
+            f"delay {self.pktgen_delay}",
+            f"dst {self.client_ip}",
+            f"dst_mac {self.client_mac}",
+        ] + (params or [])
+        devices = [f"{self.eth_interface}@{idx}" for idx in range(threads)]
+        results = []
+        for size, burst in itertools.product(sizes, bursts):
+            cmds = pktgen_config(
+                self.eth_interface,
+                threads,
+                queues,
+                base + [f"pkt_size {size}", f"burst {burst}"],
+            )
+            for result in self.run_batch(cmds):
+                if result.status != 0:
+                    assert False, f"pktgen setup failed: {result.cmd}: {result.output}"
+            self.run_batch([f"echo start > {pktgen_dir}/pgctrl"], timeout=timeout)
+            outputs = self.run_batch([f"cat {pktgen_dir}/{dev}" for dev in devices])
+            thread_results = []
+            for device, output in zip(devices, outputs):
+                thread = parse_pktgen_device(device, output.output)
+                if not thread:
+                    assert False, f"pktgen {device} did not complete: {output.output}"
+                thread_results.append(thread)
+            result = aggregate(size, burst, thread_results)
+            self.log.info(
+                f"pktgen size {size} burst {burst} x{threads}: {result.pps} pps, "
+                f"{result.mbps} Mb/s, {result.errors} errors"
+            )
+            results.append(result)
+        return results
 
     def eth_scp(self):
         self.terminal.runcmd(cmd="scp_file=$(mktemp scp.XXXXXXXXX)")
@@ -134,60 +213,150 @@ class Ethernet(BaseLinux):
             self.terminal.runcmd(cmd=f"{self.client_password}")
         self.terminal.runcmd(cmd="rm $scp_file")
 
-    def iperf_tcp_host_client(self):
-        self.log.info("Starting an iperf3 server on the client...")
-        self.get_client_console()
-        cmd = f"{self.iperf3_binary} -s &"
-        self.client_console.runcmd(
-            cmd=cmd, expected="Server listening", wait_for_prompt=False, timeout=60
-        )
-        self.log.info(f"Measuring {self.iperf3_binary} TCP throughput...")
-        cmd = f"{self.iperf3_binary} -c {self.client_ip} -f m {self.extra_iperf3_args}"
-        self.terminal.runcmd(cmd=cmd, timeout=60)
-        time.sleep(5)
-        self.client_console.runcmd(cmd=f"pkill {self.iperf3_binary}", timeout=60)
+    def iperf3(self, host_server=True, **kwargs):
+        """This Function runs an iperf3 test between board and client host.
 
-    def iperf_tcp_client_host(self):
-        self.get_client_console()
-        self.log.info("Starting an iperf3 server on the board...")
-        self.terminal.runcmd(cmd=f"{self.iperf3_binary} -s &", timeout=60)
-        time.sleep(15)
-        self.log.info(f"Starting an iperf3 client...")
-        self.client_console.runcmd(
-            cmd=f"{self.iperf3_binary} -c {self.board_ip} -f m {self.extra_iperf3_args}",
-            timeout=60,
-        )
-        time.sleep(5)
-        self.terminal.runcmd(cmd=f"pkill {self.iperf3_binary}", timeout=60)
+        Parameters:
+            host_server - server on the client host and client on the board,
+                          otherwise the other way round
+            kwargs - run_iperf3 options, e.g. udp, parallel, reverse, bidir
 
-    def iperf_udp_host_client(self):
-        self.log.info("Starting an iperf3 server on the client...")
+        Returns IperfResult.
+        """
         self.get_client_console()
-        cmd = f"{self.iperf3_binary} -s &"
+        kwargs.setdefault("binary", self.iperf3_binary)
+        kwargs.setdefault("duration", self.iperf3_duration)
+        kwargs.setdefault("parallel", self.iperf3_parallel)
+        kwargs.setdefault("extra_args", self.extra_iperf3_args)
+        if host_server:
+            self.log.info("Measuring iperf3 throughput, server on the client...")
+            return run_iperf3(
+                self.client_console, self.terminal, self.client_ip, **kwargs
+            )
+        self.log.info("Measuring iperf3 throughput, server on the board...")
+        return run_iperf3(self.terminal, self.client_console, self.board_ip, **kwargs)
+
+    def iperf_tcp_host_client(self, **kwargs):
+        return self.iperf3(host_server=True, **kwargs)
+
+    def iperf_tcp_client_host(self, **kwargs):
+        return self.iperf3(host_server=False, **kwargs)
+
+    def iperf_udp_host_client(self, **kwargs):
+        return self.iperf3(host_server=True, udp=True, **kwargs)
+
+    def iperf_udp_client_host(self, **kwargs):
+        return self.iperf3(host_server=False, udp=True, **kwargs)
+
+    def set_mtu(self, mtu):
+        """This Function sets the MTU on board and client host and waits for
+        the link instead of fixed sleeps.
+        """
+        self.log.info(f"Updating MTU size on host and device... : {mtu}")
+        self.terminal.runcmd(f"ip link set dev {self.eth_interface} mtu {mtu}")
         self.client_console.runcmd(
-            cmd=cmd, expected="Server listening", wait_for_prompt=False, timeout=60
+            f"sudo ip link set dev {self.host_interface} mtu {mtu}"
         )
-        time.sleep(15)
-        self.log.info(f"Measuring {self.iperf3_binary} UDP throughput...")
-        cmd = (
-            f"{self.iperf3_binary} -c {self.client_ip} -f m -u {self.extra_iperf3_args}"
+        wait_for_link(self.terminal, self.eth_interface, self.client_ip)
+        self.mtu = str(mtu)
+
+    def _iperf_sweep_point(self, point, duration, udp_bitrate):
+        extra_args = self.extra_iperf3_args
+        if point.msg_size:
+            extra_args += f" -l {point.msg_size}"
+        result = run_iperf3(
+            self.client_console,
+            self.terminal,
+            self.client_ip,
+            binary=self.iperf3_binary,
+            udp=point.protocol == "udp",
+            parallel=point.streams,
+            reverse=point.direction == "rx",
+            bidir=point.direction == "bidir",
+            duration=duration,
+            bitrate=udp_bitrate if point.protocol == "udp" else None,
+            extra_args=extra_args.strip(),
         )
-        self.terminal.runcmd(cmd=cmd, timeout=60)
-        time.sleep(5)
-        self.client_console.runcmd(cmd=f"pkill {self.iperf3_binary}", timeout=60)
-
-    def iperf_udp_client_host(self):
-        self.get_client_console()
-        self.log.info("Starting an iperf3 server on the board...")
-        self.terminal.runcmd(cmd=f"{self.iperf3_binary} -s &", timeout=60)
-        time.sleep(15)
-        self.log.info(f"Starting an iperf3 client...")
-        self.client_console.runcmd(
-            cmd=f"{self.iperf3_binary} -c {self.board_ip} -f m -u {self.extra_iperf3_args}",
-            timeout=60,
+        return iperf_point(point, result)
+
+    def _netperf_sweep_point(self, point, duration):
+        if point.direction == "bidir" or point.streams != 1:
+            self.log.warning(f"netperf runs single stream tx/rx only, skip {point}")
+            return None
+        test = "TCP_STREAM" if point.protocol == "tcp" else "UDP_STREAM"
+        opts = "-o THROUGHPUT,LOCAL_CPU_UTIL,REMOTE_CPU_UTIL"
+        if point.msg_size:
+            opts += f" -m {point.msg_size}"
+        if point.direction == "tx":
+            console, peer = self.terminal, self.client_ip
+        else:
+            console, peer = self.client_console, self.board_ip
+        output = run_capture(
+            console,
+            f"netperf -H {peer} -t {test} -l {duration} -c -C -f m -- {opts}",
+            timeout=duration + 60,
         )
-        time.sleep(5)
-        self.terminal.runcmd(cmd=f"pkill {self.iperf3_binary}", timeout=60)
+        values = parse_netperf(output)
+        if not values:
+            assert False, f"netperf {point} failed: {output}"
+        throughput, local, remote = values
+        board, host = (local, remote) if point.direction == "tx" else (remote, local)
+        return SweepResult(point, "netperf", throughput, board, host, None, None)
+
+    def network_sweep(
+        self,
+        mtus=(1500,),
+        protocols=("tcp", "udp"),
+        directions=("tx", "rx"),
+        streams=(1,),
+        msg_sizes=(None,),
+        tool="iperf3",
+        duration=10,
+        udp_bitrate="0",
+        csv_path=None,
+    ):
+        """This Function measures throughput and cpu utilization over a
+        matrix of test points, all points of one MTU run back to back.
+
+        Parameters:
+            mtus - list of MTU sizes
+            protocols - "tcp" and/or "udp"
+            directions - "tx" (board sends), "rx" (board receives), "bidir"
+            streams - list of parallel stream counts
+            msg_sizes - list of message sizes, None for the tool default
+            tool - "iperf3" or "netperf"
+            duration - seconds per point
+            udp_bitrate - iperf3 udp target bitrate, "0" is unlimited
+            csv_path - optional csv file for the results
+
+        Returns list of SweepResult, throughput in Mbits/s.
+        """
+        for direction in directions:
+            if direction not in sweep_directions:
+                raise Exception(f"Unknown sweep direction {direction}")
+        if tool not in ("iperf3", "netperf"):
+            raise Exception(f"Unknown sweep tool {tool}")
+        self.get_client_console()
+        if tool == "netperf":
+            for console in (self.terminal, self.client_console):
+                console.runcmd("pgrep -x netserver > /dev/null || netserver -4")
+                wait_for_port(console, 12865)
+        mtu = None
+        results = []
+        for point in sweep_points(mtus, protocols, directions, streams, msg_sizes):
+            if point.mtu != mtu:
+                self.set_mtu(point.mtu)
+                mtu = point.mtu
+            if tool == "iperf3":
+                result = self._iperf_sweep_point(point, duration, udp_bitrate)
+            else:
+                result = self._netperf_sweep_point(point, duration)
+            if result:
+                results.append(result)
+        self.log.info(f"Network sweep results:\n{format_sweep_table(results)}")
+        if csv_path:
+            write_sweep_csv(results, csv_path)
+        return results
 
     def netperf_tcp_host_client(self):
         self.log.info("Starting an netperf server on the client...")
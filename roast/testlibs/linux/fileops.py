@@ -4,7 +4,20 @@
 #
 
 import re
+import random
 import logging
+from roast.testlibs.linux.pattern import (
+    block_size,
+    parse_cmp,
+    parse_size,
+    pattern_cmd,
+)
+from roast.testlibs.linux.storageperf import (
+    fio_cmd,
+    format_storage_table,
+    parse_fio,
+    storage_points,
+)
 
 log = logging.getLogger(__name__)
 
@@ -31,10 +44,11 @@ class FileOps:
             assert False, f"{device} not found"
         else:
             found_nodes = self.console.output().split("\n")
-        for node in found_nodes:
-            self.console.sync()
-            self.console.runcmd(f"readlink -f {node}", expected="\r\n")
-            nodes.append(self.console.output())
+        self.console.sync()
+        for result in self.run_batch(
+            [f"readlink -f {node.strip()}" for node in found_nodes]
+        ):
+            nodes.append(result.output)
         nodes = list(dict.fromkeys(nodes))
         return nodes
 
@@ -107,6 +121,70 @@ class FileOps:
         file2 = re.findall(r"([a-fA-F\d]{32})", self.console.output())
         return file1 == file2
 
+    def new_pattern_seed(self):
+        seed = random.randrange(1 << 32)
+        log.info(f"Pattern seed {seed}")
+        return seed
+
+    def write_pattern(self, path, seed, length, offset=0, bs=None):
+        """This Function writes length bytes of the seeded pattern to a file
+        or device at offset, the bytes are generated on target.
+
+        Parameters:
+            path - target file or device
+            seed - pattern seed, see roast.testlibs.linux.pattern
+            length - bytes, dd style sizes like "1M" are accepted
+            offset - byte offset in path and in the pattern
+            bs - dd block size, e.g. the write granularity of an eeprom,
+                 defaults to the largest block size offset is aligned to
+        """
+        self.is_bin_exist("openssl", silent_discard=False)
+        length = parse_size(length)
+        bs = self._pattern_bs(offset, bs)
+        result = self.run_batch(
+            [
+                f"{pattern_cmd(seed, offset, length)} | "
+                f"dd of={path} bs={bs} seek={offset // bs} conv=notrunc 2>&1"
+            ],
+            timeout=max(200, length // 100000),
+        )[0]
+        if result.status != 0:
+            assert False, f"Failed to write pattern to {path}: {result.output}"
+
+    def verify_pattern(self, path, seed, length, offset=0, bs=None):
+        """This Function compares a file or device range with the seeded
+        pattern on target, nothing but the cmp result crosses the console.
+        bs is the dd block size of the read, see write_pattern.
+
+        Returns (passed, offset of the first mismatch or None).
+        """
+        length = parse_size(length)
+        bs = self._pattern_bs(offset, bs)
+        fifo = "/tmp/roast_pattern.fifo"
+        result = self.run_batch(
+            [
+                f"rm -f {fifo}; mkfifo {fifo}; "
+                f"({pattern_cmd(seed, offset, length)} > {fifo} &); "
+                f"dd if={path} bs={bs} skip={offset // bs} 2>/dev/null | "
+                f"head -c {length} | cmp {fifo} -",
+                f"rm -f {fifo}",
+            ],
+            timeout=max(200, length // 100000),
+        )[0]
+        passed, mismatch = parse_cmp(result.output, result.status, offset)
+        if not passed:
+            log.error(f"{path}: pattern {seed} mismatch at {mismatch}")
+        return passed, mismatch
+
+    @staticmethod
+    def _pattern_bs(offset, bs=None):
+        if bs is None:
+            return block_size(offset)
+        bs = parse_size(bs)
+        if offset % bs:
+            raise Exception(f"Offset {offset} is not a multiple of bs {bs}")
+        return bs
+
     def file_system_format(self, device, file_system, fat_size="32"):
         self.unmount(device)
         if file_system == "vfat":
@@ -147,9 +225,11 @@ class FileOps:
             f"{dtbo_file} {extra_options}",
             expected_failures=["failed with error", "Error:"],
         )
+        self.use_live_tree()
 
     def unload_bitstream(self):
         self.console.runcmd(f"fpgautil -R")
+        self.use_live_tree()
 
     def get_partition_list(self, device_list):
         device_partitions_dict = {}
@@ -185,3 +265,57 @@ class FileOps:
             for elem in error_results:
                 msg += f"{elem}\n"
             return msg
+
+    def fio_perf(
+        self,
+        target,
+        patterns=("read", "write", "randread", "randwrite"),
+        block_sizes=("4k", "128k"),
+        iodepths=(1, 32),
+        numjobs=(1,),
+        size="256M",
+        runtime=30,
+        ioengine="libaio",
+        direct=1,
+        **opts,
+    ):
+        """This Function measures storage performance with fio over a matrix
+        of access patterns, block sizes, queue depths and job counts.
+
+        Parameters:
+            target - block device (data is overwritten) or a directory on a
+                     mounted filesystem
+            patterns - fio rw values: read, write, randread, randwrite, rw,
+                       randrw
+            block_sizes - list of block sizes, e.g. "4k"
+            iodepths - list of queue depths
+            numjobs - list of job counts
+            size - io size per job
+            runtime - seconds per point
+            opts - extra fio options, e.g. rwmixread=70
+
+        Returns list of StorageResult, one per point and direction.
+        """
+        self.is_bin_exist("fio", silent_discard=False)
+        results = []
+        for pattern, bs, iodepth, jobs in storage_points(
+            patterns, block_sizes, iodepths, numjobs
+        ):
+            cmd = fio_cmd(
+                target,
+                pattern,
+                bs,
+                iodepth,
+                jobs,
+                size,
+                runtime,
+                ioengine=ioengine,
+                direct=direct,
+                **opts,
+            )
+            result = self.run_batch([cmd], timeout=runtime + 300)[0]
+            if result.status != 0:
+                assert False, f"fio failed on {target}: {result.output}"
+            results += parse_fio(result.output, target, size)
+        log.info(f"fio results for {target}:\n{format_storage_table(results)}")
+        return results
@@ -3,9 +3,14 @@
 # SPDX-License-Identifier: MIT
 #
 
+from roast.testlibs.linux.storageperf import parse_hdparm
+
 
 class HdParm:
     def hdparm_perf_test(self, device):
         self.is_bin_exist("hdparm", silent_discard=False)
         cmd = f"hdparm -tT {device}"
-        self.console.runcmd(cmd, expected="Timing buffered disk reads")
+        result = self.run_batch([cmd])[0]
+        if "Timing buffered disk reads" not in result.output:
+            assert False, f"hdparm failed: {result.output}"
+        return parse_hdparm(result.output, device)
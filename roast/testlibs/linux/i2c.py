@@ -8,6 +8,7 @@ import logging
 from roast.xexpect import Xexpect
 from roast.testlibs.linux.baselinux import BaseLinux
 from roast.testlibs.linux.fileops import FileOps
+from roast.testlibs.linux.pattern import parse_size
 from roast.testlibs.linux.dts import DtsLinux
 from roast.testlibs.linux.sysdevices import SysDevices
 from roast.testlibs.linux.kconfig import Kconfig
@@ -20,6 +21,9 @@ class I2cLinux(FileOps, DtsLinux, SysDevices, Kconfig, BaseLinux):
         super().__init__(console, config)
 
     def get_device_path(self, channel):
+        snapshot = self.sys_snapshot()
+        if snapshot and snapshot.device_path(channel):
+            return snapshot.device_path(channel)
         self.console.sync()
         self.console.runcmd(
             f"find {self.sys_devices} -iname {channel}", expected="\r\n"
@@ -181,13 +185,13 @@ class I2cLinux(FileOps, DtsLinux, SysDevices, Kconfig, BaseLinux):
         return int(self.console.output())
 
     def ina2xx(self):
-        self.capture_boot_dmesg()
-        if "ina2xx" in self.console.output():
+        boot_dmesg = self.capture_boot_dmesg()
+        if "ina2xx" in boot_dmesg:
             log.info("ina2xx driver probed")
         else:
             assert False, "ina2xx driver not probed"
 
-        self.i2c_device = self.console.output().partition(
+        self.i2c_device = boot_dmesg.partition(
             ": power monitor" " ina226 (Rshunt" " = 2000 uOhm)"
         )
         self.i2c_device = self.i2c_device[0].split()[-1]
@@ -259,18 +263,12 @@ class I2cLinux(FileOps, DtsLinux, SysDevices, Kconfig, BaseLinux):
                 assert False, "ina2xx_i2c[i] not matched"
 
     def eeprom_dd(self, eeprom_device, bs="1", count="256"):
-        eeprom_w = "/eeprom_write"
-        eeprom_r = "/eeprom_read"
-        self.createfile(eeprom_w, bs, count)
-        cmdlist = [
-            f"dd if={eeprom_w} of={eeprom_device} bs={bs} count={count}",
-            f"dd if={eeprom_device} of={eeprom_r} bs={bs} count={count}",
-        ]
-        self.console.runcmd_list(cmdlist)
-        diff = self.compfile(eeprom_w, eeprom_r)
-        self.console.runcmd(f"rm {eeprom_w} {eeprom_r}")
-        if not diff:
-            assert False, "eeprom write and read test failed"
+        seed = self.new_pattern_seed()
+        length = parse_size(bs) * int(count)
+        self.write_pattern(eeprom_device, seed, length, bs=bs)
+        passed, mismatch = self.verify_pattern(eeprom_device, seed, length, bs=bs)
+        if not passed:
+            assert False, f"eeprom write and read test failed at offset {mismatch}"
 
     def eeprom_rw_random_iterations(
         self, eeprom_i2c_bus, eeprom_address, iterations="10", extra_addr_bytes="0"
@@ -291,8 +289,9 @@ class I2cLinux(FileOps, DtsLinux, SysDevices, Kconfig, BaseLinux):
     ):
         eeprom_w = "/eeprom_write"
         eeprom_r = "/eeprom_read"
-        self.createfile(eeprom_w, bs, count)
-        file_size = self.get_file_size(eeprom_w)
+        seed = self.new_pattern_seed()
+        file_size = parse_size(bs) * int(count)
+        self.write_pattern(eeprom_w, seed, file_size)
         eeprom_rw_cmd = (
             f"eeprom -d /dev/i2c-{eeprom_i2c_bus} -a 0x{eeprom_address} "
             f"-n {file_size} -o {extra_addr_bytes}"
@@ -304,10 +303,12 @@ class I2cLinux(FileOps, DtsLinux, SysDevices, Kconfig, BaseLinux):
             expected_failures=failures,
         )
         self.console.runcmd(f"{eeprom_rw_cmd} -f {eeprom_r}")
-        diff = self.compfile(eeprom_w, eeprom_r)
+        passed, mismatch = self.verify_pattern(eeprom_r, seed, file_size)
         self.console.runcmd(f"rm {eeprom_w} {eeprom_r}")
-        if not diff:
-            assert False, "eeprom write read with file test failed"
+        if not passed:
+            assert (
+                False
+            ), f"eeprom write read with file test failed at offset {mismatch}"
 
     def eeprom_read(self, eeprom_i2c_bus, eeprom_address, numbData="100", offset="1"):
         eeprom_r1 = "/tmp/eeprom_read1"
@@ -3,11 +3,14 @@
 # SPDX-License-Identifier: MIT
 #
 
+from roast.testlibs.linux.storageperf import parse_iozone
+
 
 class IoZone:
     def iozone_perf_test(self, cmd_options, mnt_path, timeout=300):
         self.is_bin_exist("iozone", silent_discard=False)
-        self.console.runcmd(f"pushd {mnt_path}")
-        cmd = f"iozone {cmd_options}"
-        self.console.runcmd(cmd, timeout=timeout, expected="iozone test complete")
-        self.console.runcmd("popd")
+        cmd = f"(cd {mnt_path} && iozone {cmd_options})"
+        result = self.run_batch([cmd], timeout=timeout)[0]
+        if "iozone test complete" not in result.output:
+            assert False, f"iozone failed: {result.output[-500:]}"
+        return parse_iozone(result.output, mnt_path)
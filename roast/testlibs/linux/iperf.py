@@ -0,0 +1,196 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import re
+import json
+import logging
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+IperfInterval = namedtuple(
+    "IperfInterval",
+    [
+        "start",
+        "end",
+        "bits_per_second",
+        "bytes",
+        "retransmits",
+        "jitter_ms",
+        "lost_percent",
+        "reverse",
+    ],
+)
+IperfSummary = namedtuple(
+    "IperfSummary",
+    [
+        "name",
+        "bits_per_second",
+        "bytes",
+        "retransmits",
+        "jitter_ms",
+        "lost_packets",
+        "lost_percent",
+    ],
+)
+IperfResult = namedtuple(
+    "IperfResult",
+    [
+        "protocol",
+        "streams",
+        "reverse",
+        "bidir",
+        "intervals",
+        "summaries",
+        "cpu_utilization",
+    ],
+)
+
+
+def _interval(data, reverse=False):
+    return IperfInterval(
+        data.get("start"),
+        data.get("end"),
+        data.get("bits_per_second"),
+        data.get("bytes"),
+        data.get("retransmits"),
+        data.get("jitter_ms"),
+        data.get("lost_percent"),
+        reverse,
+    )
+
+
+def parse_iperf3(text: str) -> IperfResult:
+    """This Function parses the "iperf3 -J" report in console output.
+
+    Returns IperfResult with the per interval sums, the end summaries
+    keyed by their iperf3 name, e.g. "sum_sent", "sum_received", "sum"
+    (udp) and "sum_received_bidir_reverse", and the cpu utilization in
+    percent of the client ("host_total") and server ("remote_total").
+    """
+    # the report starts with "{" at the beginning of a line, the echoed
+    # command line before it may contain braces as well
+    start = re.search(r"^\{", text, re.M)
+    end = text.rfind("}")
+    if not start or end < start.start():
+        raise Exception("No iperf3 json report found")
+    data = json.loads(text[start.start() : end + 1])
+    if data.get("error"):
+        raise Exception(f"iperf3 failed: {data['error']}")
+    test = data.get("start", {}).get("test_start", {})
+    intervals = []
+    for interval in data.get("intervals", []):
+        if "sum" in interval:
+            intervals.append(_interval(interval["sum"]))
+        if "sum_bidir_reverse" in interval:
+            intervals.append(_interval(interval["sum_bidir_reverse"], reverse=True))
+    summaries = {}
+    for name, value in data.get("end", {}).items():
+        if name.startswith("sum") and isinstance(value, dict):
+            summaries[name] = IperfSummary(
+                name,
+                value.get("bits_per_second"),
+                value.get("bytes"),
+                value.get("retransmits"),
+                value.get("jitter_ms"),
+                value.get("lost_packets"),
+                value.get("lost_percent"),
+            )
+    return IperfResult(
+        test.get("protocol"),
+        test.get("num_streams"),
+        bool(test.get("reverse")),
+        bool(test.get("bidir")),
+        intervals,
+        summaries,
+        data.get("end", {}).get("cpu_utilization_percent", {}),
+    )
+
+
+def run_capture(console, cmd, timeout=200):
+    """This Function runs cmd and returns its output up to an end marker."""
+    console.runcmd(
+        f'm=ROAST_; {cmd} 2>&1; echo "${{m}}CAPTURE_DONE"',
+        expected="ROAST_CAPTURE_DONE",
+        wait_for_prompt=False,
+        timeout=timeout,
+    )
+    output = console.output()
+    console.expect(timeout=30)
+    return output
+
+
+def wait_for_port(console, port, timeout=10):
+    """This Function polls the listening tcp sockets on console until port
+    is open.
+    """
+    tries = timeout * 10
+    console.runcmd(
+        "m=IPERF_; i=0; "
+        f"while ! (ss -ltn 2>/dev/null || netstat -ltn) | grep -q ':{port} '; do "
+        f"i=$((i+1)); [ $i -gt {tries} ] && break; sleep 0.1; done; "
+        f'[ $i -gt {tries} ] && echo "${{m}}NOT_READY" || echo "${{m}}READY"',
+        expected="IPERF_READY",
+        expected_failures="IPERF_NOT_READY",
+        err_msg=f"iperf3 server not listening on port {port}",
+        timeout=timeout + 30,
+    )
+
+
+def run_iperf3(
+    server_cons,
+    client_cons,
+    server_ip,
+    binary="iperf3",
+    udp=False,
+    parallel=1,
+    reverse=False,
+    bidir=False,
+    duration=10,
+    bitrate=None,
+    port=5201,
+    extra_args="",
+):
+    """This Function runs one iperf3 test between two consoles.
+
+    A one-off server is started on server_cons and the client on client_cons
+    starts as soon as the server port is listening.
+
+    Parameters:
+        server_ip - address of server_cons as seen from client_cons
+        udp - udp instead of tcp
+        parallel - number of parallel streams (-P)
+        reverse - server sends, client receives (-R)
+        bidir - both directions at once (--bidir)
+        duration - seconds to transmit (-t)
+        bitrate - target bitrate (-b), e.g. "0" for unlimited udp
+
+    Returns IperfResult.
+    """
+    server = f"{binary} -s -1 -p {port}"
+    server_cons.runcmd(f"{server} > /tmp/iperf3_{port}.log 2>&1 &")
+    try:
+        wait_for_port(server_cons, port)
+        cmd = f"{binary} -c {server_ip} -p {port} -J -t {duration} -P {parallel}"
+        if udp:
+            cmd += " -u"
+        if bitrate is not None:
+            cmd += f" -b {bitrate}"
+        if reverse:
+            cmd += " -R"
+        if bidir:
+            cmd += " --bidir"
+        if extra_args:
+            cmd += f" {extra_args}"
+        output = run_capture(client_cons, cmd, timeout=duration + 60)
+    finally:
+        server_cons.runcmd(f"pkill -f '{server}' || true")
+    result = parse_iperf3(output)
+    for summary in result.summaries.values():
+        if summary.bits_per_second is not None:
+            log.info(
+                f"iperf3 {summary.name}: {summary.bits_per_second / 1e6:.2f} Mbits/s"
+            )
+    return result
@@ -3,11 +3,94 @@
 # SPDX-License-Identifier: MIT
 #
 
+import re
+import gzip
+import base64
+import logging
+
+log = logging.getLogger(__name__)
+
+# parsed /proc/config.gz per kernel build string (uname -a)
+kconfig_cache = {}
+
+config_re = re.compile(r"^(CONFIG_\w+)=(.*)$")
+not_set_re = re.compile(r"^# (CONFIG_\w+) is not set$")
+
+
+def parse_kernel_config(text: str) -> dict:
+    """This Function parses a kernel .config into symbol -> y/m/n/value."""
+    configs = {}
+    for line in text.splitlines():
+        line = line.strip()
+        match = config_re.match(line)
+        if match:
+            configs[match.group(1)] = match.group(2).strip('"')
+            continue
+        match = not_set_re.match(line)
+        if match:
+            configs[match.group(1)] = "n"
+    return configs
+
 
 class Kconfig:
+    def get_kernel_config(self, refresh=False):
+        """This Function returns the parsed kernel config of the running kernel.
+
+        /proc/config.gz is fetched once per kernel build and cached on the host,
+        None is returned when the target can not provide it.
+        """
+        build = self.get_kernel_info().strip()
+        if not refresh and build in kconfig_cache:
+            return kconfig_cache[build]
+        self.console.sync()
+        result = self.run_batch([f"base64 {self.kconfig_path}"], timeout=300)[0]
+        if result.status != 0:
+            log.info(f"Failed to fetch {self.kconfig_path}: {result.output}")
+            return None
+        try:
+            text = gzip.decompress(base64.b64decode("".join(result.output.split())))
+        except (ValueError, OSError) as err:
+            log.info(f"Failed to decode {self.kconfig_path}: {err}")
+            return None
+        kconfig_cache[build] = parse_kernel_config(text.decode(errors="ignore"))
+        return kconfig_cache[build]
+
+    def query_kernel_config(self, symbols=(), prefix=None, regex=None):
+        """This Function looks up kernel config symbols in bulk.
+
+        Parameters:
+            symbols - symbol names, the CONFIG_ prefix is optional
+            prefix - return all symbols starting with prefix
+            regex - return all symbols matching regex
+
+        Returns dict of symbol -> y/m/n/value, symbols missing in the config
+        map to None.
+        """
+        configs = self.get_kernel_config() or {}
+        result = {}
+        for symbol in symbols:
+            if not symbol.startswith("CONFIG_"):
+                symbol = f"CONFIG_{symbol}"
+            result[symbol] = configs.get(symbol)
+        if prefix:
+            if not prefix.startswith("CONFIG_"):
+                prefix = f"CONFIG_{prefix}"
+            result.update({k: v for k, v in configs.items() if k.startswith(prefix)})
+        if regex:
+            pattern = re.compile(regex)
+            result.update({k: v for k, v in configs.items() if pattern.search(k)})
+        return result
+
     def check_kernel_config(self, kernel_configs=None):
         status_list = []
         status = [True, False, True]
+        configs = self.get_kernel_config()
+        if configs is not None:
+            values = {"y": True, "n": False, "m": True}
+            for config in kernel_configs:
+                if configs.get(config) in values:
+                    status_list.append(values[configs[config]])
+            return status_list
         for config in kernel_configs:
             search_list = [f"{config}=y", f"# {config} is not set", f"{config}=m"]
             self.console.runcmd(
@@ -3,7 +3,11 @@
 # SPDX-License-Identifier: MIT
 #
 
+import re
+import logging
+from collections import namedtuple
 from roast.testlibs.linux.fileops import FileOps
+from roast.testlibs.linux.benchresult import format_table
 from roast.testlibs.linux.baselinux import BaseLinux
 from roast.testlibs.linux.kconfig import Kconfig
 from roast.testlibs.linux.dts import DtsLinux
@@ -11,6 +15,55 @@ from roast.testlibs.linux.hdparm import HdParm
 from roast.testlibs.linux.iozone import IoZone
 from roast.testlibs.linux.bonnieplusplus import BonniePlusPlus
 
+log = logging.getLogger(__name__)
+
+MmcIos = namedtuple(
+    "MmcIos", ["clock", "actual_clock", "bus_width", "timing", "signal_voltage"]
+)
+MmcModeResult = namedtuple("MmcModeResult", ["cap", "ios", "read", "write"])
+
+# bus clock caps in Hz, None keeps the negotiated clock. The debugfs clock
+# only scales the clock of the timing negotiated at card init (SDR104,
+# HS200, HS400, ...), so each result is labelled by the timing read back.
+mmc_clock_caps = (25000000, 50000000, 100000000, None)
+
+
+def parse_mmc_ios(text: str) -> MmcIos:
+    """This Function parses /sys/kernel/debug/mmcX/ios."""
+    fields = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(":")
+        fields[key.strip()] = value.strip()
+
+    def _number(key):
+        match = re.match(r"(\d+)", fields.get(key, ""))
+        return int(match.group(1)) if match else None
+
+    def _text(key):
+        match = re.search(r"\((.*)\)", fields.get(key, ""))
+        return match.group(1) if match else None
+
+    width = re.match(r"(\d+) bits", _text("bus width") or "")
+    return MmcIos(
+        _number("clock"),
+        _number("actual clock"),
+        int(width.group(1)) if width else None,
+        _text("timing spec"),
+        _text("signal voltage"),
+    )
+
+
+def format_mode_table(results) -> str:
+    """This Function formats a list of MmcModeResult as a text table."""
+    header = ["Cap MHz", "Timing", "Clock MHz", "Width", "Read MB/s", "Write MB/s"]
+    rows = []
+    for r in results:
+        clock = r.ios.actual_clock or r.ios.clock
+        cap = round(r.cap / 1e6, 2) if r.cap else "max"
+        row = [cap, r.ios.timing, round(clock / 1e6, 2) if clock else None]
+        rows.append(row + [r.ios.bus_width, r.read, r.write])
+    return format_table(header, rows)
+
 
 class MmcLinux(BonniePlusPlus, IoZone, HdParm, FileOps, Kconfig, DtsLinux, BaseLinux):
     def __init__(self, console, config):
@@ -29,11 +82,14 @@ class MmcLinux(BonniePlusPlus, IoZone, HdParm, FileOps, Kconfig, DtsLinux, BaseL
             assert False, f"{device} not found"
         else:
             mmc_nodes = self.console.output().split()
-            for node in mmc_nodes:
-                self.console.runcmd(
-                    f"cat {self.sys_class_dev['mmc']}/{node}/*/uevent", expected="\r\n"
-                )
-                if f"MMC_TYPE={self.mmc_type}" in self.console.output():
+            results = self.run_batch(
+                [
+                    f"cat {self.sys_class_dev['mmc']}/{node}/*/uevent"
+                    for node in mmc_nodes
+                ]
+            )
+            for node, result in zip(mmc_nodes, results):
+                if f"MMC_TYPE={self.mmc_type}" in result.output:
                     mmc_device = "/dev/mmcblk" + node[-1]
                     self.mmc_list.append(mmc_device)
         if not self.mmc_list:
@@ -44,3 +100,116 @@ class MmcLinux(BonniePlusPlus, IoZone, HdParm, FileOps, Kconfig, DtsLinux, BaseL
         self.capture_dmesg()
         self.mmc_device_list = self.get_mmc_list(device)
         return self.mmc_device_list
+
+    def get_mmc_host(self, device):
+        """This Function returns (host, host device path) of a mmc block
+        device, e.g. ("mmc1", "/sys/devices/platform/axi/ff170000.mmc").
+        """
+        name = device.split("/")[-1]
+        result = self.run_batch([f"readlink -f /sys/block/{name}/device"])[0]
+        match = re.search(r"^(.*)/mmc_host/(mmc\d+)/", result.output)
+        if result.status != 0 or not match:
+            assert False, f"{device} is not a mmc block device: {result.output}"
+        return match.group(2), match.group(1)
+
+    def mmc_ios(self, host) -> MmcIos:
+        """This Function returns the current bus settings of a mmc host."""
+        ios = f"{self.sys_debug}/{host}/ios"
+        result = self.run_batch(
+            [
+                f"[ -f {ios} ] || mount -t debugfs none {self.sys_debug}",
+                f"cat {ios}",
+            ]
+        )[1]
+        if result.status != 0:
+            assert False, f"Failed to read {ios}: {result.output}"
+        return parse_mmc_ios(result.output)
+
+    def mmc_set_clock(self, host, clock):
+        """This Function caps the bus clock of a mmc host in Hz, the kernel
+        rejects clocks above the host f_max.
+        """
+        result = self.run_batch([f"echo {clock} > {self.sys_debug}/{host}/clock"])[0]
+        if result.status != 0:
+            assert False, f"Failed to set {host} clock to {clock}: {result.output}"
+
+    def mmc_rebind_host(self, device, timeout=30):
+        """This Function unbinds and binds the host driver of a mmc block
+        device so the card is enumerated again at its maximum mode.
+
+        Mounted devices (e.g. the rootfs) and active swap are refused, the
+        unbind would take them away from the running system.
+
+        Returns the block device, the index can change on rebind.
+        """
+        _, path = self.get_mmc_host(device)
+        block = device.split("/")[-1]
+        devs, mounts, swaps = self.run_batch(
+            [
+                f"cat /sys/block/{block}/dev /sys/block/{block}/{block}*/dev",
+                "cut -d' ' -f3 /proc/self/mountinfo",
+                "cat /proc/swaps",
+            ]
+        )
+        in_use = set(devs.output.split()) & set(mounts.output.split())
+        if in_use or re.search(rf"^/dev/{block}(p\d+)?\s", swaps.output, re.M):
+            assert False, f"Refusing to rebind the host of {device}, it is in use"
+        name = path.split("/")[-1]
+        results = self.run_batch(
+            [
+                f"driver=$(readlink -f {path}/driver); "
+                f"echo {name} > $driver/unbind && echo {name} > $driver/bind",
+                f"i=0; until ls {path}/mmc_host/mmc*/mmc*/block > /dev/null 2>&1; do "
+                f"i=$((i+1)); [ $i -gt {timeout} ] && break; sleep 1; done; "
+                f"ls {path}/mmc_host/mmc*/mmc*/block",
+            ],
+            timeout=timeout + 60,
+        )
+        self.invalidate_snapshot()
+        for result in results:
+            if result.status != 0:
+                assert False, f"Failed to rebind {name}: {result.output}"
+        return f"/dev/{results[1].output.split()[0]}"
+
+    def mmc_mode_sweep(self, device, clocks=mmc_clock_caps, size="64M", write=False):
+        """This Function measures throughput of a mmc device per bus clock.
+
+        Each step starts from a fresh enumeration (host rebind), caps the
+        bus clock through debugfs and runs a sequential fio probe. The
+        timing stays the negotiated one, caps above the negotiated clock
+        are skipped instead of overclocking the card.
+
+        Parameters:
+            device - mmc block device, e.g. /dev/mmcblk1, must not be mounted
+            clocks - bus clock caps in Hz, None for the negotiated clock
+            size - probe size
+            write - also probe writes, the device content is overwritten
+
+        Returns list of MmcModeResult with the ios of the run and MB/s.
+        """
+        patterns = ["read", "write"] if write else ["read"]
+        results = []
+        for cap in clocks:
+            device = self.mmc_rebind_host(device)
+            host, _ = self.get_mmc_host(device)
+            if cap:
+                negotiated = self.mmc_ios(host).clock
+                if negotiated and cap > negotiated:
+                    log.info(f"Skipping {cap} Hz, {host} negotiated {negotiated} Hz")
+                    continue
+                self.mmc_set_clock(host, cap)
+            ios = self.mmc_ios(host)
+            probe = self.fio_perf(
+                device,
+                patterns=patterns,
+                block_sizes=["512k"],
+                iodepths=[1],
+                size=size,
+                runtime=10,
+            )
+            bandwidth = {r.direction: r.bandwidth for r in probe}
+            results.append(
+                MmcModeResult(cap, ios, bandwidth.get("read"), bandwidth.get("write"))
+            )
+        log.info(f"{device} mode sweep:\n{format_mode_table(results)}")
+        return results
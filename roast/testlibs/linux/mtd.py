@@ -5,9 +5,74 @@
 
 import re
 import logging
+import itertools
+from collections import namedtuple
+from roast.testlibs.linux.dmesg import get_dmesg_log
 
 log = logging.getLogger(__name__)
 
+MtdGeometry = namedtuple(
+    "MtdGeometry", ["size", "eraseblock_size", "page_size", "oob_size"]
+)
+# throughput in MB/s, None when the run did not measure it
+MtdSpeed = namedtuple(
+    "MtdSpeed",
+    ["mtd", "source", "unit", "block_size", "offset", "size", "erase", "write", "read"],
+)
+MtdStress = namedtuple("MtdStress", ["mtd", "operations", "seconds"])
+
+speed_re = re.compile(
+    r"^(\d+x? )?(multi-block |page |eraseblock )?(\w+) speed is (\d+) KiB/s"
+)
+time_re = re.compile(r"real\s+(\d+)m\s*([\d.]+)s")
+
+
+def _mbps(kib):
+    return round(kib * 1024 / 1e6, 2)
+
+
+def parse_speedtest(mtd, records, geometry) -> list:
+    """This Function parses the mtd_speedtest kernel messages into MtdSpeed,
+    one per access unit (eraseblock, page, 2 page, 2x multi-block, ...).
+    """
+    units = {}
+    for record in records:
+        message = record.message.split(": ", 1)[-1]
+        match = speed_re.match(message)
+        if not match:
+            continue
+        count, kind, operation, kib = match.groups()
+        unit = f"{count or ''}{kind or 'eraseblock '}".strip()
+        if operation not in ("erase", "write", "read"):
+            continue
+        units.setdefault(unit, {})[operation] = _mbps(int(kib))
+    results = []
+    for unit, speeds in units.items():
+        factor = int(re.match(r"(\d*)", unit).group(1) or 1)
+        base = geometry.page_size if "page" in unit else geometry.eraseblock_size
+        results.append(
+            MtdSpeed(
+                mtd,
+                "mtd_speedtest",
+                unit,
+                base * factor,
+                0,
+                None,
+                speeds.get("erase"),
+                speeds.get("write"),
+                speeds.get("read"),
+            )
+        )
+    return results
+
+
+def parse_time(output: str):
+    """This Function returns the elapsed seconds of a shell "time" report."""
+    match = time_re.search(output)
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + float(match.group(2))
+
 
 class MtdLinux:
     def is_mtd_exist(self, peripheral):
@@ -123,9 +188,137 @@ class MtdLinux:
 
     def mtdperftest(self, mtd_num, size, count, offset, block_size):
         self.console.sync()
-        cmdlist = [
+        return self._mtd_debug_speed(
+            mtd_num,
+            offset,
+            block_size,
             f"dd if=/dev/urandom of=/tmp/random.bin bs={size} count={count}",
-            f"time mtd_debug write /dev/mtd{mtd_num} {offset} {block_size} /tmp/random.bin",
-            f"time mtd_debug read /dev/mtd{mtd_num} {offset} {block_size} /tmp/read.bin",
+            erase=False,
+        )
+
+    def _mtd_debug_speed(self, mtd_num, offset, length, create, erase=True):
+        dev = f"/dev/mtd{mtd_num}"
+        cmds = [create]
+        if erase:
+            cmds.append(f"time mtd_debug erase {dev} {offset} {length}")
+        cmds += [
+            f"time mtd_debug write {dev} {offset} {length} /tmp/random.bin",
+            f"time mtd_debug read {dev} {offset} {length} /tmp/read.bin",
         ]
-        self.console.runcmd_list(cmdlist, expected="\r\n")
+        results = self.run_batch(cmds, timeout=1200)
+        for result in results:
+            if result.status != 0:
+                assert False, f"{result.cmd} failed: {result.output}"
+        speeds = {}
+        for result in results[1:]:
+            operation = result.cmd.split()[2]
+            seconds = parse_time(result.output)
+            if seconds:
+                speeds[operation] = round(int(length) / seconds / 1e6, 2)
+        return MtdSpeed(
+            mtd_num,
+            "mtd_debug",
+            "range",
+            None,
+            int(offset),
+            int(length),
+            speeds.get("erase"),
+            speeds.get("write"),
+            speeds.get("read"),
+        )
+
+    def get_mtd_geometry(self, mtd_num) -> MtdGeometry:
+        sysfs = f"/sys/class/mtd/mtd{mtd_num}"
+        results = self.run_batch(
+            [
+                f"cat {sysfs}/{name}"
+                for name in ("size", "erasesize", "writesize", "oobsize")
+            ]
+        )
+        for result in results:
+            if result.status != 0:
+                assert False, f"Failed to read mtd{mtd_num} geometry: {result.output}"
+        return MtdGeometry(*(int(result.output) for result in results))
+
+    def mtd_speed_sweep(self, mtd_num, offsets=(0,), sizes=None):
+        """This Function measures erase, write and read throughput with
+        mtd_debug for every offset and size, the flash content is erased.
+
+        Parameters:
+            offsets - list of byte offsets, eraseblock aligned
+            sizes - list of byte lengths, eraseblock multiples, default 1,
+                    16 and 64 eraseblocks
+
+        Returns list of MtdSpeed.
+        """
+        geometry = self.get_mtd_geometry(mtd_num)
+        if not sizes:
+            sizes = [geometry.eraseblock_size * count for count in (1, 16, 64)]
+        results = []
+        for offset, size in itertools.product(offsets, sizes):
+            if offset + size > geometry.size:
+                log.warning(f"mtd{mtd_num}: {size} bytes at {offset} out of range")
+                continue
+            result = self._mtd_debug_speed(
+                mtd_num,
+                offset,
+                size,
+                f"dd if=/dev/urandom of=/tmp/random.bin bs={size} count=1",
+            )
+            log.info(
+                f"mtd{mtd_num} {size} bytes at {offset}: erase {result.erase}, "
+                f"write {result.write}, read {result.read} MB/s"
+            )
+            results.append(result)
+        return results
+
+    def _mtd_test_module(self, mtd_num, module, extra_args, timeout):
+        dmesg = get_dmesg_log(self.console)
+        dmesg.update()
+        start = len(dmesg.records)
+        result = self.run_batch(
+            [
+                f"rmmod {module} 2>/dev/null; modprobe {module} dev={mtd_num} {extra_args}"
+            ],
+            timeout=timeout,
+        )[0]
+        dmesg.update()
+        records = [r for r in dmesg.records[start:] if r.driver == module]
+        return result, records
+
+    def mtd_speedtest(self, mtd_num, count=None, timeout=7200):
+        """This Function runs the mtd_speedtest module and returns its
+        eraseblock, page and multi-block throughputs as MtdSpeed.
+
+        Parameters:
+            count - number of eraseblocks to use, default the whole device
+        """
+        geometry = self.get_mtd_geometry(mtd_num)
+        args = f"count={count}" if count else ""
+        result, records = self._mtd_test_module(mtd_num, "mtd_speedtest", args, timeout)
+        if not any("finished" in r.message for r in records):
+            assert False, f"mtd_speedtest did not finish: {result.output}"
+        speeds = parse_speedtest(mtd_num, records, geometry)
+        for speed in speeds:
+            log.info(
+                f"mtd{mtd_num} {speed.unit} ({speed.block_size} bytes): "
+                f"erase {speed.erase}, write {speed.write}, read {speed.read} MB/s"
+            )
+        return speeds
+
+    def mtd_stresstest(self, mtd_num, count=10000, timeout=7200):
+        """This Function runs the mtd_stresstest module with count random
+        operations and returns MtdStress.
+        """
+        result, records = self._mtd_test_module(
+            mtd_num, "mtd_stresstest", f"count={count}", timeout
+        )
+        done = [r for r in records if "operations done" in r.message]
+        if not done:
+            assert False, f"mtd_stresstest did not finish: {result.output}"
+        operations = int(re.search(r"(\d+) operations done", done[-1].message).group(1))
+        seconds = None
+        if records[0].timestamp is not None:
+            seconds = round(done[-1].timestamp - records[0].timestamp, 3)
+        log.info(f"mtd{mtd_num} stress: {operations} operations in {seconds}s")
+        return MtdStress(mtd_num, operations, seconds)
@@ -0,0 +1,126 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import re
+import csv
+import itertools
+import logging
+from collections import namedtuple
+from roast.testlibs.linux.benchresult import format_table
+
+log = logging.getLogger(__name__)
+
+SweepPoint = namedtuple(
+    "SweepPoint", ["mtu", "protocol", "direction", "streams", "msg_size"]
+)
+SweepResult = namedtuple(
+    "SweepResult",
+    [
+        "point",
+        "tool",
+        "throughput",
+        "board_cpu",
+        "host_cpu",
+        "retransmits",
+        "lost_percent",
+    ],
+)
+
+sweep_directions = ("tx", "rx", "bidir")
+netperf_re = re.compile(r"^\s*([\d.]+),([\d.-]+),([\d.-]+)\s*$", re.M)
+
+
+def sweep_points(mtus, protocols, directions, streams=(1,), msg_sizes=(None,)):
+    """This Function expands a sweep matrix into SweepPoint, ordered so that
+    all points of one MTU run back to back and the MTU changes only once
+    per value.
+    """
+    return [
+        SweepPoint(*point)
+        for point in itertools.product(mtus, protocols, directions, streams, msg_sizes)
+    ]
+
+
+def parse_netperf(output: str):
+    """This Function parses netperf "-o THROUGHPUT,LOCAL_CPU_UTIL,REMOTE_CPU_UTIL"
+    output, returns (Mbits/s, local cpu %, remote cpu %) or None.
+    """
+    match = netperf_re.findall(output)
+    if not match:
+        return None
+    return tuple(float(value) for value in match[-1])
+
+
+def iperf_point(point, result) -> SweepResult:
+    """This Function reduces an IperfResult of a board side client to a
+    SweepResult in Mbits/s.
+    """
+    summaries = result.summaries
+    if point.protocol == "udp":
+        forward = summaries.get("sum_received") or summaries.get("sum")
+        reverse = summaries.get("sum_received_bidir_reverse") or summaries.get(
+            "sum_bidir_reverse"
+        )
+        lost = forward.lost_percent if forward else None
+    else:
+        forward = summaries.get("sum_received")
+        reverse = summaries.get("sum_received_bidir_reverse")
+        lost = None
+    throughput = forward.bits_per_second if forward else 0
+    if point.direction == "bidir" and reverse:
+        throughput += reverse.bits_per_second
+    sent = summaries.get("sum_sent")
+    return SweepResult(
+        point,
+        "iperf3",
+        round(throughput / 1e6, 2),
+        result.cpu_utilization.get("host_total"),
+        result.cpu_utilization.get("remote_total"),
+        sent.retransmits if sent else None,
+        lost,
+    )
+
+
+def format_sweep_table(results) -> str:
+    """This Function formats a list of SweepResult as a text table."""
+    header = [
+        "MTU",
+        "Proto",
+        "Dir",
+        "Streams",
+        "MsgSize",
+        "Tool",
+        "Mbits/s",
+        "Board CPU%",
+        "Host CPU%",
+        "Retrans",
+        "Loss%",
+    ]
+    return format_table(
+        header, [list(result.point) + list(result[1:]) for result in results]
+    )
+
+
+def write_sweep_csv(results, path: str) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(SweepPoint._fields) + list(SweepResult._fields[1:]))
+        for result in results:
+            writer.writerow(list(result.point) + list(result[1:]))
+
+
+def wait_for_link(console, interface, peer_ip, timeout=30):
+    """This Function waits until interface is up and peer_ip answers a ping."""
+    console.runcmd(
+        "m=LINK_; i=0; "
+        f'until [ "$(cat /sys/class/net/{interface}/operstate)" = up ] && '
+        f"ping -c 1 -W 1 {peer_ip} > /dev/null 2>&1; do "
+        f"i=$((i+1)); [ $i -gt {timeout} ] && break; sleep 1; done; "
+        f'[ $i -gt {timeout} ] && echo "${{m}}DOWN" || echo "${{m}}UP"',
+        expected="LINK_UP",
+        expected_failures="LINK_DOWN",
+        err_msg=f"{interface} link to {peer_ip} not ready in {timeout}s",
+        timeout=timeout + 60,
+    )
@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import re
+import hashlib
+import subprocess
+
+# The pattern is the AES-128-CTR keystream of a key derived from the seed.
+# Byte n of a pattern only depends on (seed, n), so any range can be
+# produced or checked on its own: on target with "openssl enc" and on the
+# host with the same cipher, no reference data is stored anywhere.
+
+sizes = {"": 1, "k": 1024, "K": 1024, "M": 1024**2, "G": 1024**3}
+cmp_differ_re = re.compile(r"differ: (?:char|byte) (\d+)")
+cmp_eof_re = re.compile(r"EOF on \S+(?: after byte (\d+))?")
+
+
+def parse_size(size) -> int:
+    """This Function converts dd style sizes ("512", "4k", "1M") to bytes."""
+    match = re.match(r"^(\d+)([kKMG]?)$", str(size).strip())
+    if not match:
+        raise Exception(f"Invalid size {size}")
+    return int(match.group(1)) * sizes[match.group(2)]
+
+
+def pattern_params(seed, offset=0):
+    """This Function returns (key, iv, skip) of the cipher stream starting
+    at the 16 byte block of offset, skip bytes of that block precede offset.
+    """
+    digest = hashlib.sha256(f"roast-pattern:{seed}".encode()).digest()
+    counter = (int.from_bytes(digest[16:], "big") + offset // 16) % (1 << 128)
+    return digest[:16].hex(), f"{counter:032x}", offset % 16
+
+
+def pattern_cmd(seed, offset, length) -> str:
+    """This Function returns a shell pipeline writing length pattern bytes
+    from offset to stdout.
+    """
+    key, iv, skip = pattern_params(seed, offset)
+    cmd = (
+        f"openssl enc -aes-128-ctr -nosalt -K {key} -iv {iv} -in /dev/zero 2>/dev/null"
+    )
+    if skip:
+        cmd += f" | tail -c +{skip + 1}"
+    return f"{cmd} | head -c {length}"
+
+
+def pattern_bytes(seed, offset, length) -> bytes:
+    """This Function generates pattern bytes on the host."""
+    key, iv, skip = pattern_params(seed, offset)
+    proc = subprocess.run(
+        ["openssl", "enc", "-aes-128-ctr", "-nosalt", "-K", key, "-iv", iv],
+        input=bytes(skip + length),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    return proc.stdout[skip : skip + length]
+
+
+def verify_pattern_bytes(data, seed, offset=0, chunk=1 << 20):
+    """This Function checks host side data against the pattern.
+
+    Returns (passed, offset of the first mismatch or None).
+    """
+    for start in range(0, len(data), chunk):
+        part = data[start : start + chunk]
+        expected = pattern_bytes(seed, offset + start, len(part))
+        if part != expected:
+            idx = next(i for i, (a, b) in enumerate(zip(part, expected)) if a != b)
+            return False, offset + start + idx
+    return True, None
+
+
+def parse_cmp(output, status, offset=0):
+    """This Function turns the result of "cmp pattern data" into
+    (passed, offset of the first mismatch or None).
+    """
+    if status == 0:
+        return True, None
+    match = cmp_differ_re.search(output)
+    if match:
+        return False, offset + int(match.group(1)) - 1
+    match = cmp_eof_re.search(output)
+    if match and match.group(1):
+        return False, offset + int(match.group(1))
+    return False, None
+
+
+def block_size(offset, largest=65536) -> int:
+    """This Function returns the largest dd block size offset is aligned to."""
+    bs = largest
+    while offset % bs:
+        bs //= 2
+    return bs
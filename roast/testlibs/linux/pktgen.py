@@ -0,0 +1,70 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import re
+import logging
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+PktgenThread = namedtuple(
+    "PktgenThread", ["device", "packets", "usec", "pps", "mbps", "errors"]
+)
+PktgenResult = namedtuple(
+    "PktgenResult", ["size", "burst", "threads", "packets", "pps", "mbps", "errors"]
+)
+
+pktgen_dir = "/proc/net/pktgen"
+result_re = re.compile(
+    r"Result: OK: (\d+)\(.*?\) usec, (\d+) \(.*?\)\s+(\d+)pps (\d+)Mb/sec "
+    r"\((\d+)bps\) errors: (\d+)",
+    re.S,
+)
+
+
+def parse_pktgen_device(device: str, text: str):
+    """This Function parses the "Result:" of a /proc/net/pktgen device
+    file, returns PktgenThread or None when the run did not complete.
+    """
+    match = result_re.search(text)
+    if not match:
+        return None
+    usec, packets, pps, _, bps, errors = (int(value) for value in match.groups())
+    return PktgenThread(device, packets, usec, pps, round(bps / 1e6, 2), errors)
+
+
+def aggregate(size, burst, threads) -> PktgenResult:
+    return PktgenResult(
+        size,
+        burst,
+        threads,
+        sum(thread.packets for thread in threads),
+        sum(thread.pps for thread in threads),
+        round(sum(thread.mbps for thread in threads), 2),
+        sum(thread.errors for thread in threads),
+    )
+
+
+def pktgen_config(interface, threads, queues, params) -> list:
+    """This Function returns the shell commands binding one pktgen device
+    per kpktgend thread, device i transmits on tx queue i % queues.
+
+    Parameters:
+        interface - network interface, e.g. eth0
+        threads - number of kpktgend threads (cpus) to use
+        queues - number of tx queues of interface
+        params - list of pktgen device commands, e.g. ["count 1000"]
+    """
+    cmds = [f"echo stop > {pktgen_dir}/pgctrl"]
+    for idx in range(threads):
+        device = f"{interface}@{idx}"
+        queue = idx % queues
+        cmds += [
+            f"echo rem_device_all > {pktgen_dir}/kpktgend_{idx}",
+            f"echo 'add_device {device}' > {pktgen_dir}/kpktgend_{idx}",
+        ]
+        for param in params + [f"queue_map_min {queue}", f"queue_map_max {queue}"]:
+            cmds.append(f"echo '{param}' > {pktgen_dir}/{device}")
+    return cmds
@@ -6,6 +6,7 @@
 import logging
 from roast.testlibs.linux.baselinux import BaseLinux
 from roast.testlibs.linux.fileops import FileOps
+from roast.testlibs.linux.pattern import parse_size
 from roast.testlibs.linux.hdparm import HdParm
 from roast.testlibs.linux.iozone import IoZone
 from roast.testlibs.linux.bonnieplusplus import BonniePlusPlus
@@ -46,16 +47,14 @@ class SataLinux(BonniePlusPlus, IoZone, HdParm, FileOps, BaseLinux):
                 expected="\r\n",
             )
         self.console.runcmd(f"mount '{sata_device}1' /mnt_sata", expected="\r\n")
-        self.console.runcmd(
-            f"dd if=/dev/urandom of=/tmp/test.bin bs='{bs}' count='{count}'",
-            expected="\r\n",
-        )
-        self.console.runcmd(f"cp /tmp/test.bin /mnt_sata/", expected="\r\n")
+        seed = self.new_pattern_seed()
+        length = parse_size(bs) * int(count)
+        self.write_pattern("/mnt_sata/test.bin", seed, length)
         self.console.sync()
         self.console.runcmd(f"echo 3 > /proc/sys/vm/drop_caches", expected="\r\n")
 
-        diff = self.compfile("/tmp/test.bin", "/mnt_sata/test.bin")
-        if diff:
+        passed, _ = self.verify_pattern("/mnt_sata/test.bin", seed, length)
+        if passed:
             log.info(f">>> TEST PASS: SATA_dd_rw_{type_mode}")
         else:
             assert False, f">>> TEST FAIL: SATA_dd_rw_{type_mode}"
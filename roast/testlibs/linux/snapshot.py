@@ -0,0 +1,177 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import gzip
+import base64
+import struct
+import fnmatch
+import logging
+import posixpath
+
+log = logging.getLogger(__name__)
+
+FDT_MAGIC = 0xD00DFEED
+FDT_BEGIN_NODE, FDT_END_NODE, FDT_PROP, FDT_NOP, FDT_END = 1, 2, 3, 4, 9
+
+
+def _align(offset):
+    return (offset + 3) & ~3
+
+
+def parse_fdt(blob: bytes) -> dict:
+    """This Function parses a flattened device tree blob.
+
+    Returns dict of node path (relative to the root, "" for the root node)
+    to dict of property name to raw value.
+    """
+    magic, _, off_struct, off_strings = struct.unpack_from(">4I", blob)
+    if magic != FDT_MAGIC:
+        raise Exception("Invalid flattened device tree blob")
+    nodes = {}
+    path = []
+    offset = off_struct
+    while True:
+        (token,) = struct.unpack_from(">I", blob, offset)
+        offset += 4
+        if token == FDT_BEGIN_NODE:
+            end = blob.index(b"\0", offset)
+            path.append(blob[offset:end].decode())
+            offset = _align(end + 1)
+            nodes["/".join(path[1:])] = {}
+        elif token == FDT_END_NODE:
+            path.pop()
+        elif token == FDT_PROP:
+            length, nameoff = struct.unpack_from(">2I", blob, offset)
+            offset += 8
+            start = off_strings + nameoff
+            name = blob[start : blob.index(b"\0", start)].decode()
+            nodes["/".join(path[1:])][name] = blob[offset : offset + length]
+            offset = _align(offset + length)
+        elif token == FDT_NOP:
+            continue
+        elif token == FDT_END:
+            break
+        else:
+            raise Exception(f"Invalid fdt token {token} at offset {offset - 4}")
+    return nodes
+
+
+def parse_sysfs_links(output: str, root: str = "/sys") -> dict:
+    """This Function parses "ls -l" output of sysfs directories.
+
+    Returns dict of directory to dict of link name to resolved target.
+    """
+    links = {}
+    directory = None
+    for line in output.splitlines():
+        line = line.strip()
+        if line.endswith(":") and " " not in line:
+            directory = posixpath.join(root, line[:-1])
+            links[directory] = {}
+        elif directory and " -> " in line:
+            name, target = line.split(" -> ", 1)
+            name = name.split()[-1]
+            links[directory][name] = posixpath.normpath(
+                posixpath.join(directory, target)
+            )
+    return links
+
+
+class SysSnapshot:
+    """This class is a host side index of the target device tree and of the
+    /sys/class and /sys/bus device links, taken once per boot.
+
+    Parameters:
+        nodes - parse_fdt() result
+        links - parse_sysfs_links() result
+        boot_id - /proc/sys/kernel/random/boot_id of the snapshot boot
+    """
+
+    def __init__(self, nodes: dict, links: dict, boot_id: str = None):
+        self.nodes = nodes
+        self.links = links
+        self.boot_id = boot_id
+        self.compatible = {}
+        for node, props in nodes.items():
+            for compat in self.strings(props.get("compatible", b"")):
+                self.compatible.setdefault(compat, []).append(node)
+
+    @staticmethod
+    def strings(value: bytes) -> list:
+        return [item.decode(errors="ignore") for item in value.split(b"\0") if item]
+
+    def text(self, node: str, prop: str):
+        """This Function returns a property as "cat" prints it, None when the
+        property does not exist.
+        """
+        value = self.nodes.get(node, {}).get(prop)
+        if value is None:
+            return None
+        return value.replace(b"\0", b"").decode(errors="ignore")
+
+    def status(self, node: str) -> bool:
+        """This Function returns True when the node is enabled."""
+        status = self.text(node, "status")
+        return status is None or ("ok" in status and "disabled" not in status)
+
+    def nodes_by_compatible(self, pattern: str) -> list:
+        """This Function returns the nodes with a compatible string containing
+        pattern.
+        """
+        return sorted(
+            {
+                node
+                for compat, nodes in self.compatible.items()
+                if pattern in compat
+                for node in nodes
+            }
+        )
+
+    def glob(self, pattern: str) -> list:
+        """This Function expands a shell pattern relative to the device tree
+        root against nodes and properties, "*" does not match "/".
+        """
+        parts = pattern.strip("/").split("/")
+        matches = []
+        for node, props in self.nodes.items():
+            entries = [node] + [f"{node}/{prop}" if node else prop for prop in props]
+            for entry in entries:
+                names = entry.split("/")
+                if len(names) == len(parts) and all(
+                    fnmatch.fnmatchcase(name, part) for name, part in zip(names, parts)
+                ):
+                    matches.append(entry)
+        return sorted(matches)
+
+    def is_node(self, path: str) -> bool:
+        return path.strip("/") in self.nodes
+
+    def entries(self, node: str) -> list:
+        """This Function returns the child node and property names of node."""
+        node = node.strip("/")
+        prefix = f"{node}/" if node else ""
+        children = [
+            path[len(prefix) :]
+            for path in self.nodes
+            if path.startswith(prefix) and path and "/" not in path[len(prefix) :]
+        ]
+        return sorted(children + list(self.nodes.get(node, {})))
+
+    def class_links(self, directory: str) -> dict:
+        """This Function returns link name to target of a /sys/class directory."""
+        return self.links.get(directory.rstrip("/"), {})
+
+    def device_path(self, name: str):
+        """This Function returns the /sys/devices path of a device name."""
+        for links in self.links.values():
+            for target in links.values():
+                if posixpath.basename(target).lower() == name.lower():
+                    return target
+        return None
+
+
+def decode_fdt_dump(output: str) -> bytes:
+    """This Function decodes the gzip compressed base64 fdt console dump."""
+    return gzip.decompress(base64.b64decode("".join(output.split())))
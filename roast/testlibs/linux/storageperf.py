@@ -0,0 +1,214 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import re
+import json
+import itertools
+import logging
+from collections import namedtuple
+from roast.testlibs.linux.benchresult import format_table
+
+log = logging.getLogger(__name__)
+
+# one measured point, bandwidth in MB/s and latency percentiles ("p50",
+# "p99", ...) in us, fields a tool does not report are None
+StorageResult = namedtuple(
+    "StorageResult",
+    [
+        "tool",
+        "target",
+        "pattern",
+        "size",
+        "block_size",
+        "iodepth",
+        "numjobs",
+        "direction",
+        "bandwidth",
+        "iops",
+        "latency",
+    ],
+)
+
+fio_patterns = ("read", "write", "randread", "randwrite", "rw", "randrw")
+percentiles = {
+    "50.000000": "p50",
+    "90.000000": "p90",
+    "99.000000": "p99",
+    "99.900000": "p99.9",
+    "99.990000": "p99.99",
+}
+
+# iozone column name -> (pattern, direction), names of two line headers are
+# joined with "_", e.g. "random_read"
+iozone_columns = {
+    "write": ("write", "write"),
+    "rewrite": ("rewrite", "write"),
+    "read": ("read", "read"),
+    "reread": ("reread", "read"),
+    "random_read": ("randread", "read"),
+    "random_write": ("randwrite", "write"),
+    "bkwd_read": ("bkwdread", "read"),
+    "record_rewrite": ("recrewrite", "write"),
+    "stride_read": ("strideread", "read"),
+    "fwrite": ("fwrite", "write"),
+    "frewrite": ("frewrite", "write"),
+    "fread": ("fread", "read"),
+    "freread": ("freread", "read"),
+}
+
+hdparm_re = re.compile(
+    r"Timing (cached|buffered disk) reads:.*=\s*([\d.]+)\s*([kMG]B)/sec"
+)
+units = {"kB": 1e-3, "MB": 1, "GB": 1e3}
+
+
+def fio_cmd(target, pattern, block_size, iodepth, numjobs, size, runtime, **opts):
+    """This Function returns the fio command line of one point, target is a
+    block device or a directory on a mounted filesystem.
+    """
+    where = "filename" if target.startswith("/dev/") else "directory"
+    cmd = (
+        f"fio --name=roast --{where}={target} --rw={pattern} --bs={block_size} "
+        f"--iodepth={iodepth} --numjobs={numjobs} --size={size} "
+        f"--runtime={runtime} --time_based --group_reporting "
+        "--output-format=json"
+    )
+    for key, value in opts.items():
+        cmd += f" --{key}={value}"
+    return cmd
+
+
+def _latency(data):
+    if "clat_ns" in data:
+        values, scale = data["clat_ns"].get("percentile", {}), 1e-3
+    else:
+        values, scale = data.get("clat", {}).get("percentile", {}), 1
+    return {
+        name: round(values[key] * scale, 2)
+        for key, name in percentiles.items()
+        if key in values
+    }
+
+
+def parse_fio(output: str, target=None, size=None) -> list:
+    """This Function parses "fio --output-format=json --group_reporting"
+    output into one StorageResult per direction with io.
+    """
+    start = re.search(r"^\{", output, re.M)
+    end = output.rfind("}")
+    if not start or end < start.start():
+        raise Exception(f"No fio json report found: {output[-200:]}")
+    data = json.loads(output[start.start() : end + 1])
+    results = []
+    for job in data.get("jobs", []):
+        options = dict(data.get("global options", {}), **job.get("job options", {}))
+        for direction in ("read", "write"):
+            stats = job.get(direction, {})
+            if not stats.get("io_bytes"):
+                continue
+            bandwidth = stats.get("bw_bytes", stats.get("bw", 0) * 1024) / 1e6
+            results.append(
+                StorageResult(
+                    "fio",
+                    target,
+                    options.get("rw"),
+                    size,
+                    options.get("bs"),
+                    int(options.get("iodepth", 1)),
+                    int(options.get("numjobs", 1)),
+                    direction,
+                    round(bandwidth, 2),
+                    round(stats.get("iops", 0), 2),
+                    _latency(stats),
+                )
+            )
+    return results
+
+
+def _iozone_names(upper, header):
+    """Joins the second header line of iozone with the words above it,
+    words belong to the column whose right edge is closest.
+    """
+    columns = [[m.end(), [], m.group()] for m in re.finditer(r"\S+", header)]
+    for word in re.finditer(r"\S+", upper):
+        column = min(columns, key=lambda col: abs(col[0] - word.end()))
+        column[1].append(word.group())
+    return ["_".join(prefix + [name]) for _, prefix, name in columns]
+
+
+def parse_iozone(output: str, target=None) -> list:
+    """This Function parses the iozone report table (kB, reclen and one
+    column per test in kB/s) into StorageResult.
+    """
+    lines = output.replace("\r", "").splitlines()
+    results = []
+    names = None
+    for idx, line in enumerate(lines):
+        words = line.split()
+        if words[:2] == ["kB", "reclen"]:
+            names = _iozone_names(lines[idx - 1] if idx else "", line)
+            continue
+        if not names or not words or not all(word.isdigit() for word in words):
+            continue
+        for name, value in zip(names[2:], words[2:]):
+            if name not in iozone_columns:
+                continue
+            pattern, direction = iozone_columns[name]
+            results.append(
+                StorageResult(
+                    "iozone",
+                    target,
+                    pattern,
+                    f"{words[0]}k",
+                    f"{words[1]}k",
+                    None,
+                    None,
+                    direction,
+                    round(int(value) * 1024 / 1e6, 2),
+                    None,
+                    {},
+                )
+            )
+    return results
+
+
+def parse_hdparm(output: str, target=None) -> list:
+    """This Function parses "hdparm -tT" timings into StorageResult."""
+    results = []
+    for kind, value, unit in hdparm_re.findall(output):
+        pattern = "cached_read" if kind == "cached" else "buffered_read"
+        results.append(
+            StorageResult(
+                "hdparm",
+                target,
+                pattern,
+                None,
+                None,
+                None,
+                None,
+                "read",
+                round(float(value) * units[unit], 2),
+                None,
+                {},
+            )
+        )
+    return results
+
+
+def storage_points(patterns, block_sizes, iodepths, numjobs) -> list:
+    for pattern in patterns:
+        if pattern not in fio_patterns:
+            raise Exception(f"Unknown fio pattern {pattern}")
+    return list(itertools.product(patterns, block_sizes, iodepths, numjobs))
+
+
+def format_storage_table(results) -> str:
+    """This Function formats a list of StorageResult as a text table."""
+    header = ["Tool", "Pattern", "BS", "QD", "Jobs", "Dir", "MB/s", "IOPS", "p99 us"]
+    rows = []
+    for r in results:
+        row = [r.tool, r.pattern, r.block_size, r.iodepth, r.numjobs, r.direction]
+        rows.append(row + [r.bandwidth, r.iops, r.latency.get("p99")])
+    return format_table(header, rows)
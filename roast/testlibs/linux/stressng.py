@@ -5,6 +5,7 @@
 
 from roast.testlibs.linux.baselinux import BaseLinux
 from roast.testlibs.linux.fileops import FileOps
+from roast.testlibs.linux.benchsuite import BenchmarkSuite
 
 
 class StressNg(BaseLinux, FileOps):
@@ -13,3 +14,18 @@ class StressNg(BaseLinux, FileOps):
         cmd = f"stress-ng {cmd_options}"
         self.console.runcmd(cmd, timeout=time_out)
         self.console.runcmd(cmd, err_msg=error_msg, timeout=time_out)
+
+    def stress_ng_detached(
+        self, cmd_options, error_msg=None, time_out=900, poll_interval=30
+    ):
+        """This Function runs stress-ng detached from the console and only
+        polls for completion, see BenchmarkSuite. error_msg is the assertion
+        message on failure, like err_msg of stress_ng_test.
+        """
+        self.is_bin_exist("stress-ng", silent_discard=False)
+        suite = BenchmarkSuite(self, "/tmp/roast_stress_ng", poll_interval)
+        suite.add("stress_ng", f"stress-ng {cmd_options}", timeout=time_out)
+        result = suite.run(timeout=time_out + poll_interval)["stress_ng"]
+        if result.status != 0:
+            assert False, error_msg or f"stress-ng failed: {result.output}"
+        return result
@@ -4,14 +4,24 @@
 #
 
 import logging
+import posixpath
 
 log = logging.getLogger(__name__)
 
 
 class SysDevices:
     def get_channels(self, dts_list, peripheral):
-        self.console.sync()
         self.channels = []
+        snapshot = self.sys_snapshot()
+        if snapshot:
+            links = snapshot.class_links(self.sys_class_dev[peripheral])
+            for dt_node in dts_list:
+                targets = [target for target in links.values() if dt_node in target]
+                if not targets:
+                    log.info(f"No channels found for {dt_node}")
+                self.channels.extend(sorted(posixpath.basename(t) for t in targets))
+            return self.channels
+        self.console.sync()
         for dt_node in dts_list:
             self.console.runcmd(
                 f"ls {self.sys_class_dev[peripheral]} -l | awk '{{print $NF}}'"
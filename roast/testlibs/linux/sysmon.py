@@ -9,6 +9,7 @@ from roast.testlibs.linux.fileops import FileOps
 from roast.testlibs.linux.dts import DtsLinux
 from roast.testlibs.linux.sysdevices import SysDevices
 from roast.testlibs.linux.kconfig import Kconfig
+from roast.testlibs.linux.dmesg import get_dmesg_log
 from roast.utils import check_if_string_in_file
 
 
@@ -20,8 +21,9 @@ class Sysmon(FileOps, DtsLinux, SysDevices, Kconfig, BaseLinux):
         """
         Checks if sysmon is enabled in the device tree
         """
-        self.console.runcmd(f"dmesg | grep -r sysmon", expected="\r\n")
-        console_print = self.console.output()
+        dmesg = get_dmesg_log(self.console)
+        dmesg.update()
+        console_print = "\n".join(record.message for record in dmesg.search("sysmon"))
         if pass_string not in console_print:
             assert False, "Sysmon is not registered"
 
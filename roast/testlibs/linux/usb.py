@@ -8,6 +8,7 @@ import logging
 from roast.testlibs.linux.baselinux import BaseLinux
 from roast.testlibs.linux.fileops import FileOps
 from roast.testlibs.linux.hdparm import HdParm
+from roast.testlibs.linux.storageperf import parse_hdparm
 from roast.testlibs.linux.iozone import IoZone
 from roast.testlibs.linux.bonnieplusplus import BonniePlusPlus
 from roast.testlibs.linux.dts import DtsLinux
@@ -99,9 +100,11 @@ class UsbLinux(BonniePlusPlus, IoZone, HdParm, FileOps, BaseLinux, DtsLinux):
 
     def mass_storage_hdparm(self, usbdev, host_terminal):
         hdparm_cmd = f"hdparm -tT /dev/{usbdev}"
-        host_terminal.runcmd(
-            f"sudo {hdparm_cmd}", expected="Timing buffered disk reads"
-        )
+        host_terminal.runcmd(f"sudo {hdparm_cmd}", expected="\r\n")
+        output = host_terminal.output()
+        if "Timing buffered disk reads" not in output:
+            assert False, f"hdparm failed: {output}"
+        return parse_hdparm(output, f"/dev/{usbdev}")
 
     def get_mass_storage_device(self, host_terminal, vendor_id, product_id):
         host_terminal.runcmd("ls /dev/sd*")
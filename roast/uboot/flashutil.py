@@ -6,6 +6,7 @@
 
 from roast.component.board.boot import load_pdi, uboot_login
 from roast.uboot import flashsubsystems as fs
+from roast.component.xsdb.pool import get_xsdb
 import re, os
 
 
@@ -27,12 +28,18 @@ class Flashutil:
         self.board = board
         self.bootmode = bootmode
         self.console = board.serial
-        self.xsdb = board.xsdb
         self.instance = instance
         self.uboot_load = uboot_load
         self.flash_type = flash_type
         self._setup()
 
+    @property
+    def xsdb(self):
+        # Lease a pooled session only once a flash step needs xsdb
+        if not self.board.xsdb and self.config.get("xsdb_pool"):
+            self.board.xsdb = get_xsdb(self.config, hwserver=self.board.host)
+        return self.board.xsdb
+
     def _setup(self):
         if self.uboot_load:
             self.xsdb.runcmd(f"device program {self.config['uboot_pdi']}")
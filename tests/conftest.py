@@ -15,3 +15,35 @@ def build_dir(request, tmpdir):
     yield buildDir
     rmtree(buildDir)
     os.chdir(rootdir)
+
+
+def batch_output(values):
+    """Frames values like the console output of BaseLinux.run_batch, a value
+    is the frame text or a (status, text) tuple.
+    """
+    frames = [value if isinstance(value, tuple) else (0, value) for value in values]
+    return "".join(
+        f"ROAST_BATCH {idx} BEGIN\r\n{text}\r\nROAST_BATCH {idx} END {status}\r\n"
+        for idx, (status, text) in enumerate(frames)
+    )
+
+
+@pytest.fixture(scope="function")
+def batch_console(mocker):
+    """Returns a factory of mock consoles answering BaseLinux.run_batch.
+
+    respond(cmd) gets the last command sent to the console and returns the
+    frame values for batch_output, or a str passed through unframed.
+    """
+
+    def _console(respond):
+        console = mocker.Mock()
+
+        def _output():
+            values = respond(console.runcmd.call_args[0][0])
+            return values if isinstance(values, str) else batch_output(values)
+
+        console.output.side_effect = _output
+        return console
+
+    return _console
@@ -0,0 +1,61 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import pytest
+from roast.testlibs.linux.baselinux import BaseLinux, CmdResult
+from roast.testlibs.linux.mmc import MmcLinux
+
+
+def batch_console(mocker, frames):
+    console = mocker.Mock()
+    output = "".join(
+        f"ROAST_BATCH {idx} BEGIN\r\n{text}\r\nROAST_BATCH {idx} END {status}\r\n"
+        for idx, (status, text) in enumerate(frames)
+    )
+    console.output.return_value = f"m=ROAST_; echo ...\r\n{output}"
+    return console
+
+
+def test_run_batch(mocker):
+    console = batch_console(mocker, [(0, "hi\r\nthere"), (1, "")])
+    linux = BaseLinux(console, {})
+    results = linux.run_batch(["echo hi; echo there", "false", "reboot"])
+    assert results == [
+        CmdResult("echo hi; echo there", 0, "hi\nthere"),
+        CmdResult("false", 1, ""),
+        CmdResult("reboot", None, ""),
+    ]
+    script = console.runcmd.call_args[0][0]
+    assert script.startswith('m=ROAST_; echo "${m}BATCH 0 BEGIN"; ( echo hi;')
+    assert console.runcmd.call_args[1]["expected"] == "ROAST_BATCH DONE"
+
+
+def test_run_batch_long_script(mocker):
+    console = batch_console(mocker, [(0, "x")] * 50)
+    linux = BaseLinux(console, {})
+    results = linux.run_batch([f"cat /sys/class/node{idx}" for idx in range(50)])
+    assert len(results) == 50
+    cmds = [call[0][0] for call in console.runcmd.call_args_list]
+    assert cmds[0] == "rm -f /tmp/roast_batch.sh"
+    assert all(cmd.startswith("printf '%s\\n' ") for cmd in cmds[1:-1])
+    assert cmds[-1] == "sh /tmp/roast_batch.sh"
+
+
+def test_get_mmc_list(mocker):
+    console = batch_console(mocker, [(0, "MMC_TYPE=MMC"), (0, "MMC_TYPE=SD")])
+    console.output.side_effect = ["mmc0 mmc1"] * 2 + [console.output.return_value]
+    mmc = MmcLinux(console, {})
+    assert mmc.get_mmc_list("sd") == ["/dev/mmcblk1"]
+
+
+def test_check_dt_node_status(mocker):
+    console = batch_console(mocker, [(0, "okay"), (1, "")])
+    dts = MmcLinux(console, {})
+    assert dts.check_dt_node_status(dt_nodes=["amba/dma@0", "amba/dma@1"]) == [
+        True,
+        True,
+    ]
+    with pytest.raises(AssertionError, match="No status received"):
+        dts.check_dt_node_status(dt_nodes=["amba/dma@0", "amba/dma@1", "amba/x"])
@@ -0,0 +1,88 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import csv
+import json
+from roast.testlibs.linux.benchmark import Benchmark
+from roast.testlibs.linux.benchresult import (
+    Metric,
+    format_table,
+    parse_benchmark,
+)
+
+lat_mem_rd = """\
+"stride=64
+0.00049 1.674
+0.00098 1.674
+
+"stride=128
+0.00049 1.675
+"""
+
+linpack = """\
+Enter array size (q to quit) [200]:  Memory required:  315K.
+
+LINPACK benchmark, Double precision.
+Array size 200 X 200.
+    Reps Time(s) DGEFA   DGESL  OVERHEAD    KFLOPS
+----------------------------------------------------
+     128   0.66  84.85%   3.03%  12.12%  514938.271
+     256   1.31  84.73%   3.05%  12.21%  518224.155
+Enter array size (q to quit) [200]:"""
+
+
+def test_parse_pairs():
+    result = parse_benchmark("lat_mem_rd", lat_mem_rd, mem_size=1)
+    assert len(result.metrics) == 3
+    assert result.metrics[2] == Metric(
+        "latency",
+        1.675,
+        "ns",
+        {"mem_size": 1, "stride": "128", "size": 0.00049, "size_unit": "MB"},
+    )
+    bw = parse_benchmark("bw_mem", "67.11 5432.10\n", size="64M", operation="rd")
+    assert bw.metrics[0].value == 5432.1
+    assert bw.metrics[0].unit == "MB/s"
+
+
+def test_parse_named_and_interactive():
+    syscall = parse_benchmark("lat_syscall", "Simple syscall: 0.1234 microseconds\n")
+    assert syscall.metrics == [Metric("Simple syscall", 0.1234, "us", {})]
+    stream = parse_benchmark("stream", "STREAM copy bandwidth: 5432.10 MB/sec\n")
+    assert stream.metrics[0][1:3] == (5432.1, "MB/s")
+    dhry = parse_benchmark("dhrystone", "Dhrystones per Second:    3514000.0 \n")
+    assert [m.name for m in dhry.metrics] == ["dhrystones", "dmips"]
+    assert dhry.metrics[1].value == 2000.0
+    lin = parse_benchmark("linpack", linpack, arraysize=200)
+    assert [m.value for m in lin.metrics] == [514938.271, 518224.155]
+    assert lin.metrics[0].params == {"arraysize": 200, "reps": 128, "time": 0.66}
+
+
+def test_benchmark_export(mocker, tmp_path):
+    console = mocker.Mock()
+    console.output.return_value = (
+        "ROAST_BATCH 0 BEGIN\r\n67.11 5432.10\r\nROAST_BATCH 0 END 0\r\n"
+    )
+    bench = Benchmark(console, {})
+    mocker.patch.object(bench, "is_bin_exist")
+    bench.bw_mem("bw_mem", "64M", "rd")
+    assert "bw_mem 64M rd" in console.runcmd.call_args[0][0]
+
+    bench.export_results(str(tmp_path / "bench.json"))
+    data = json.loads((tmp_path / "bench.json").read_text())
+    assert data[0]["tool"] == "bw_mem"
+    assert data[0]["metrics"][0]["value"] == 5432.1
+    bench.export_results(str(tmp_path / "bench.csv"))
+    rows = list(csv.reader(open(tmp_path / "bench.csv")))
+    assert rows[1][:4] == ["bw_mem", "bandwidth", "5432.1", "MB/s"]
+
+
+def test_format_table():
+    table = format_table(["Tool", "MB/s"], [["fio", 104.86], ["hdparm", None]])
+    assert table.splitlines() == [
+        "  Tool    MB/s",
+        "   fio  104.86",
+        "hdparm       -",
+    ]
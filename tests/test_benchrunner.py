@@ -0,0 +1,65 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import pytest
+from roast.testlibs.linux.benchmark import Benchmark
+from roast.testlibs.linux.benchrunner import (
+    BenchmarkRunner,
+    compare_summaries,
+    reject_outliers,
+    summarize,
+)
+
+
+def test_summarize():
+    assert reject_outliers([10, 10.1, 9.9, 10.2, 30]) == ([10, 10.1, 9.9, 10.2], [30])
+    assert reject_outliers([10, 10.01, 10.1]) == ([10, 10.01, 10.1], [])
+    s = summarize("bw_mem", "bandwidth", "MB/s", {}, [10, 10.1, 9.9, 10.2, 30])
+    assert s.median == 10.05
+    assert s.outliers == [30]
+    assert s.ci_low < 10.05 < s.ci_high
+    faster = s._replace(median=12.0, ci_low=11.9, ci_high=12.1)
+    key = ("bw_mem", "bandwidth", "{}")
+    assert compare_summaries([s], [faster]) == {key: (19.4, True)}
+
+
+def test_benchmark_runner(mocker, batch_console):
+    values = iter(["5000", "5500", "5000", "5001", "5002", "5001", "5000"])
+
+    def _respond(cmd):
+        if "scaling_governor" in cmd and "cat $g" in cmd:
+            return ["/sys/cpu0/scaling_governor ondemand", ""]
+        return [f"64 {next(values)}"]
+
+    console = batch_console(_respond)
+    bench = Benchmark(console, {})
+    mocker.patch.object(bench, "is_bin_exist")
+    runner = BenchmarkRunner(
+        bench, warmup=1, repetitions=10, cpus="1", governor="performance"
+    )
+    (summary,) = runner.run(bench.bw_mem, "bw_mem", "64M", "rd")
+    # warm-up discarded, outlier rejected, stops once the interval is tight
+    assert summary.samples == [5000, 5001, 5002, 5001]
+    assert summary.outliers == [5500]
+    assert len(bench.results) == len(summary.samples) + len(summary.outliers)
+    cmds = [call[0][0] for call in console.runcmd.call_args_list]
+    assert "taskset -c 1 sh -c 'bw_mem 64M rd'" in cmds[2]
+    assert "echo ondemand > /sys/cpu0/scaling_governor" in cmds[-1]
+    assert bench.cmd_prefix == ""
+
+
+def test_benchmark_runner_without_cpufreq(mocker):
+    console = mocker.Mock()
+    console.output.return_value = (
+        "ROAST_BATCH 0 BEGIN\r\n"
+        "cat: can't open '/sys/devices/system/cpu/cpu*/cpufreq/scaling_governor'\r\n"
+        "ROAST_BATCH 0 END 1\r\nROAST_BATCH 1 BEGIN\r\n\r\nROAST_BATCH 1 END 1\r\n"
+    )
+    runner = BenchmarkRunner(Benchmark(console, {}), governor="performance")
+    assert runner._set_governor("performance") == []
+    runner._restore_governor([])
+    assert console.runcmd.call_count == 1
+    with pytest.raises(Exception, match="repetitions must be at least 1"):
+        BenchmarkRunner(runner.bench, repetitions=0)
@@ -0,0 +1,59 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import io
+import base64
+import tarfile
+from roast.testlibs.linux.benchmark import Benchmark
+from roast.testlibs.linux.benchsuite import BenchmarkSuite
+
+
+def _archive(files):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w:gz") as tar:
+        for name, text in files.items():
+            info = tarfile.TarInfo(f"./{name}")
+            info.size = len(text)
+            tar.addfile(info, io.BytesIO(text.encode()))
+    return base64.encodebytes(data.getvalue()).decode().replace("\n", "\r\n")
+
+
+def test_benchmark_suite(mocker, batch_console, tmp_path):
+    mocker.patch("roast.testlibs.linux.benchsuite.time.sleep")
+    files = {
+        "manifest": "dram 900 lat_dram_page\nstress 60 -\n",
+        "dram.out": "64 120.5\r\n128 130.25\n",
+        "dram.rc": "0\n",
+        "stress.out": "stress-ng: info: passed\n",
+        "stress.rc": "143\n",
+    }
+    states = iter(["running dram", "", "done"])
+
+    def _respond(cmd):
+        if "gzip" in cmd:
+            return [_archive(files)]
+        state = next(states)
+        return [state, "alive" if state else ""]
+
+    console = batch_console(_respond)
+    bench = Benchmark(console, {})
+    suite = BenchmarkSuite(bench, poll_interval=1)
+    suite.add("dram", "lat_dram_page -M 64M", tool="lat_dram_page", mem_size="64M")
+    suite.add("stress", "stress-ng --cpu 4 -t 30", timeout=60)
+    suite.add_linpack("linpack", 200, timeout=300)
+    results = suite.run(timeout=60, dest=str(tmp_path))
+
+    cmds = [c[0][0] for c in console.runcmd.call_args_list]
+    assert "printf '%s\\n' 200 q >> /tmp/roast_suite/linpack.in" in cmds
+    assert sum("setsid sh run.sh" in cmd for cmd in cmds) == 2
+    launch = next(cmd for cmd in cmds if "setsid" in cmd)
+    assert launch.startswith("rm -f /tmp/roast_suite/pid; ")
+    assert "while [ ! -s /tmp/roast_suite/pid ]" in launch
+    assert results["dram"].result.metrics[1].value == 130.25
+    assert results["dram"].result.params == {"mem_size": "64M"}
+    assert results["stress"].status == 143
+    assert results["stress"].result is None
+    assert bench.results == [results["dram"].result]
+    assert (tmp_path / "stress.out").read_text() == files["stress.out"]
@@ -0,0 +1,79 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import os
+import lzma
+import hashlib
+from roast.component.bmap import (
+    create_bmap,
+    find_bmap,
+    generate_bmap,
+    parse_bmap,
+    write_bmap,
+)
+
+
+def make_image(path, block_size=4096):
+    # sparse image, the zero block 8 is written and must stay mapped
+    with open(path, "wb") as f:
+        f.write(b"x" * 10)
+        f.seek(block_size * 4)
+        f.write(b"y" * block_size * 2)
+        f.seek(block_size * 8)
+        f.write(bytes(block_size))
+        f.seek(block_size * 16 + 50)
+        f.write(b"z" * 50)
+    return path.read_bytes()
+
+
+def test_create_bmap(tmp_path):
+    data = make_image(tmp_path / "sd.wic")
+    bmap = create_bmap(str(tmp_path / "sd.wic"))
+    assert bmap.image_size == len(data)
+    assert [(r.first, r.last) for r in bmap.ranges] == [
+        (0, 0),
+        (4, 5),
+        (8, 8),
+        (16, 16),
+    ]
+    (tmp_path / "sd.wic.xz").write_bytes(lzma.compress(data))
+    whole = create_bmap(str(tmp_path / "sd.wic.xz"))
+    assert whole.image_size == len(data)
+    assert [(r.first, r.last) for r in whole.ranges] == [(0, 16)]
+    assert whole.ranges[0].chksum == hashlib.sha256(data).hexdigest()
+
+    write_bmap(bmap, str(tmp_path / "sd.wic.bmap"))
+    assert parse_bmap(str(tmp_path / "sd.wic.bmap")) == bmap
+    assert find_bmap(str(tmp_path / "sd.wic.xz")) == str(tmp_path / "sd.wic.bmap")
+
+
+def test_generate_bmap_symlink(tmp_path):
+    make_image(tmp_path / "core-image-20220101.wic")
+    os.symlink("core-image-20220101.wic", tmp_path / "core-image.wic")
+    path = generate_bmap(str(tmp_path / "core-image.wic"))
+    assert path == str(tmp_path / "core-image.wic.bmap")
+    assert os.path.islink(path)
+    assert parse_bmap(path).ranges
+    assert generate_bmap(str(tmp_path / "missing.wic")) is None
+
+
+def test_generate_bmap_after_rebuild(tmp_path):
+    make_image(tmp_path / "core-image-20220101.wic")
+    os.symlink("core-image-20220101.wic", tmp_path / "core-image.wic")
+    path = generate_bmap(str(tmp_path / "core-image.wic"))
+    old_map = os.readlink(path)
+    # the rebuild links core-image.wic to a new, larger image
+    with open(tmp_path / "core-image-20220102.wic", "wb") as f:
+        f.seek(4096 * 31)
+        f.write(b"n" * 4096)
+    os.utime(tmp_path / "core-image-20220102.wic", (2e9, 2e9))
+    os.remove(tmp_path / "core-image.wic")
+    os.symlink("core-image-20220102.wic", tmp_path / "core-image.wic")
+    assert find_bmap(str(tmp_path / "core-image.wic")) is None
+    assert generate_bmap(str(tmp_path / "core-image.wic")) == path
+    assert os.readlink(path) == str(tmp_path / "core-image-20220102.wic.bmap")
+    assert [(r.first, r.last) for r in parse_bmap(path).ranges] == [(31, 31)]
+    # the map of the old image is left alone
+    assert parse_bmap(old_map).image_size == 4096 * 16 + 100
@@ -341,13 +341,14 @@ def test_BootZynqmp__validate_address(mocker):
     }
     mock_object = BootZynqmp(board.serial, board.xsdb, imagedir, config)
     addr_value = {"0reg": "0x0", "1": "0x1", "2": "0x2"}
-    mock_object.xsdbcon.read = mocker.Mock("BootZynqmp xsdbcon.read #0046")
-    mock_object.xsdbcon.read.side_effect = list(addr_value.keys())
-    try:
+    mock_object.xsdbcon.read_many = mocker.Mock("BootZynqmp xsdbcon.read_many #0046")
+    mock_object.xsdbcon.read_many.return_value = {"0reg": 0, "1": 1, "2": 2}
+    mock_object._validate_address(addr_value)
+    mock_object.xsdbcon.read_many.assert_called_once_with(["0reg", "1", "2"])
+
+    mock_object.xsdbcon.read_many.return_value = {"0reg": 0, "1": 1, "2": 3}
+    with pytest.raises(AssertionError):
         mock_object._validate_address(addr_value)
-    except StopIteration:
-        pass
-    mock_object.xsdbcon.read.assert_called()
 
 
 def test_BootZynqmp__load_kernel(mocker):
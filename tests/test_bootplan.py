@@ -0,0 +1,107 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import time
+import pytest
+from roast.component.xsdb.xsdb import XsdbBatch
+from roast.component.board.bootplan import BootPlan, serial_ready, xsdb_ready
+from roast.component.board.boot import BootZynqmp
+
+
+def boot_plan(mocker):
+    xsdbcon = mocker.Mock("xsdbcon")
+    xsdbcon.targets_cmd = lambda proc: f"targets {proc}"
+    xsdbcon.batch = lambda timeout: XsdbBatch(xsdbcon, timeout=timeout)
+    xsdbcon.run_batch = mocker.Mock("xsdbcon run_batch")
+    xsdbcon.wait_state = mocker.Mock("xsdbcon wait_state")
+    serialcon = mocker.Mock("serialcon")
+    serialcon.expect = mocker.Mock("serialcon expect")
+    serialcon.sendline = mocker.Mock("serialcon sendline")
+    return BootPlan(xsdbcon, serialcon)
+
+
+def test_bootplan_run(mocker):
+    plan = boot_plan(mocker)
+    plan.add("fsbl", target="a53_0", file="/fsbl.elf", post=["con"])
+    plan.add("halt", pre=["stop"], ready=xsdb_ready("Stopped", timeout=5))
+    plan.add("kernel", file="/Image", addr=0x200000, timeout=400)
+    plan.add("rootfs", file="/rootfs.cpio.gz.u-boot", addr=0x4000000, timeout=1800)
+    plan.add("boot", pre=["con"], ready=serial_ready("ZynqMP>", timeout=10, send=""))
+    timings = plan.run()
+
+    assert [t.name for t in timings] == ["fsbl", "halt", "kernel+rootfs", "boot"]
+    batches = plan.xsdbcon.run_batch.call_args_list
+    assert [cmd for cmd, _ in batches[0][0][0]] == [
+        "targets a53_0",
+        "dow -force /fsbl.elf",
+        "con",
+    ]
+    assert [cmd for cmd, _ in batches[2][0][0]] == [
+        "dow -data -force /Image 0x200000",
+        "dow -data -force /rootfs.cpio.gz.u-boot 0x4000000",
+    ]
+    assert batches[2][1]["timeout"] == 2200
+    plan.xsdbcon.wait_state.assert_called_once_with("Stopped", timeout=5)
+    plan.serialcon.sendline.assert_called_once_with("")
+    plan.serialcon.expect.assert_called_once_with(
+        expected="ZynqMP>", wait_for_prompt=False, timeout=10
+    )
+
+
+def test_bootplan_ready_failure(mocker):
+    plan = boot_plan(mocker)
+    plan.serialcon.expect.side_effect = Exception("ERROR: Expect returned TIMEOUT")
+    plan.add("fsbl", file="/fsbl.elf", ready=serial_ready("FSBL", required=False))
+    assert len(plan.run()) == 1
+
+    plan.add("uboot", file="/u-boot.elf", ready=serial_ready("ZynqMP>"))
+    with pytest.raises(Exception, match="TIMEOUT"):
+        plan.run()
+
+
+def test_bootplan_action(mocker):
+    plan = boot_plan(mocker)
+    load = mocker.Mock("load_bitstream", side_effect=lambda: time.sleep(0.05))
+    plan.add("bitstream", action=load)
+    plan.add("kernel", file="/Image", addr=0x200000)
+    timings = plan.run()
+    load.assert_called_once_with()
+    # the action stage is not merged with the data stages
+    assert [t.name for t in timings] == ["bitstream", "kernel"]
+    # the load is timed as load, not as readiness wait
+    assert timings[0].load >= 0.05 > timings[0].wait
+
+
+def test_BootZynqmp_linux_boot_plan(mocker):
+    config = {
+        "jtag_boot_plan": True,
+        "load_bitstream": True,
+        "system_dtb": "system.dtb",
+        "dtb_loadaddr": 0x100000,
+        "kernel_loadaddr": 0x200000,
+        "rootfs_path": "/rootfs.cpio.gz.u-boot",
+        "rootfs_loadaddr": 0x4000000,
+        "boot_scr_path": "/boot.scr",
+        "boot_scr_loadaddr": 0x20000000,
+    }
+    plan = boot_plan(mocker)
+    boot = BootZynqmp(plan.serialcon, plan.xsdbcon, "/images", config)
+    uboot_login = mocker.patch("roast.component.board.boot.uboot_login")
+    boot._linux_boot()
+
+    assert [t.name for t in boot.timings] == [
+        "bitstream",
+        "pmu_init",
+        "pmufw",
+        "fsbl",
+        "devicetree",
+        "uboot",
+        "atf",
+        "halt",
+        "kernel+rootfs+boot_scr",
+        "resume",
+    ]
+    uboot_login.assert_called_once_with(plan.serialcon)
+    plan.serialcon.sendline.assert_called_with("source 0x20000000")
@@ -0,0 +1,53 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import os
+import pytest
+from roast.component.buildcache import BuildCache
+
+
+def make_tree(path, size=16):
+    os.makedirs(path / "sub")
+    (path / "Image").write_bytes(b"k" * size)
+    (path / "sub" / "system.dtb").write_bytes(b"d" * size)
+    return path
+
+
+def test_buildcache_key(tmp_path):
+    cache = BuildCache(str(tmp_path / "cache"))
+    xsa = tmp_path / "design.xsa"
+    xsa.write_bytes(b"xsa-1")
+    inputs = {"xsa": str(xsa), "configs": {"kernel": ["CONFIG_A=y"]}}
+    key = cache.key(inputs, files=["xsa"])
+    assert key == cache.key(dict(reversed(list(inputs.items()))), files=["xsa"])
+
+    xsa.write_bytes(b"xsa-2")
+    assert cache.key(inputs, files=["xsa"]) != key
+    assert cache.key({**inputs, "configs": {"kernel": []}}, files=["xsa"]) != key
+
+
+@pytest.mark.parametrize("link", ["reflink", "hardlink", "copy"])
+def test_buildcache_store_restore(tmp_path, link):
+    cache = BuildCache(str(tmp_path / "cache"), link=link)
+    src = make_tree(tmp_path / "images")
+    dest = tmp_path / "restored" / "linux"
+    assert not cache.restore("abc", str(dest))
+
+    cache.store("abc", str(src), {"xsa": "design.xsa"})
+    assert cache.has("abc")
+    assert cache.restore("abc", str(dest))
+    assert (dest / "Image").read_bytes() == b"k" * 16
+    assert (dest / "sub" / "system.dtb").read_bytes() == b"d" * 16
+
+
+def test_buildcache_evict(tmp_path):
+    cache = BuildCache(str(tmp_path / "cache"), max_size=70)
+    for key in ("one", "two"):
+        cache.store(key, str(make_tree(tmp_path / key)))
+        os.utime(tmp_path / "cache" / f"{key}.json", (1, 1 if key == "two" else 2))
+    # "two" is least recently used and goes first
+    cache.store("three", str(make_tree(tmp_path / "three")))
+    assert [key for _, _, key in cache.entries()] == ["one", "three"]
+    assert not os.path.exists(tmp_path / "cache" / "two")
@@ -0,0 +1,61 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import pytest
+from roast.testlibs.linux.dma import DmaLinux, parse_dmatest_summary
+
+summaries = """<6>[  200.000001] dmatest: Added 2 threads using dma0chan0
+<6>[  200.000002] dmatest: Added 2 threads using dma0chan1
+<6>[  200.500000] dmatest: dma0chan0-copy0: summary 10 tests, 0 failures 3289.04 iops 26312 KB/s (0)
+<6>[  200.500001] dmatest: dma0chan0-copy1: summary 10 tests, 0 failures 3000.00 iops 24000 KB/s (0)
+<6>[  200.500002] dmatest: dma0chan1-copy0: summary 10 tests, 0 failures 2000.50 iops 16004 KB/s (0)
+<6>[  200.500003] dmatest: dma0chan1-copy1: summary 10 tests, 1 failures 1000 iops 8000 KB/s (0)"""
+
+
+def _dma(batch_console, done="N"):
+    updates = iter(["", summaries])
+
+    def _respond(cmd):
+        if "dmesg -r" in cmd:
+            return f"{next(updates)}\r\n"
+        if "/run" in cmd:
+            return [done]
+        return [""] * 10
+
+    console = batch_console(_respond)
+    return console, DmaLinux(console, {})
+
+
+def test_dmatest(batch_console):
+    console, dma = _dma(batch_console)
+    result = dma.dmatest(["dma0chan0", "dma0chan1"], threads=2, buf_sizes=[4096])[0]
+    assert (result.buf_size, len(result.threads)) == (4096, 4)
+    assert (result.tests, result.failures) == (40, 1)
+    assert (result.iops, result.kbps) == (9289.54, 74316.0)
+    assert {thread.channel for thread in result.threads} == {"dma0chan0", "dma0chan1"}
+    cmds = " ".join(call[0][0] for call in console.runcmd.call_args_list)
+    assert cmds.index("threads_per_chan") < cmds.index("dma0chan0 >")
+    assert "echo '' >" not in cmds
+    assert 'while [ "$(cat /sys/module/dmatest/parameters/run)" = Y ]' in cmds
+    with pytest.raises(AssertionError):
+        dma.dma_print_result()
+
+
+def test_dmatest_timeout(batch_console):
+    _, dma = _dma(batch_console, done="Y")
+    with pytest.raises(AssertionError, match="did not complete"):
+        dma.dma_run(timeout=5)
+
+
+def test_parse_dmatest_summary():
+    thread = parse_dmatest_summary(
+        "dma1chan3-copy0: summary 1 tests, 0 failures 500 iops 4000 KB/s (0)"
+    )
+    assert (thread.thread, thread.channel, thread.iops) == (
+        "dma1chan3-copy0",
+        "dma1chan3",
+        500.0,
+    )
+    assert parse_dmatest_summary("dmatest: Added 1 threads using dma1chan3") is None
@@ -0,0 +1,86 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import pytest
+from roast.testlibs.linux.dmesg import DmesgRecord, get_dmesg_log, parse_dmesg_record
+
+boot_id = "0f6d1c2e-3b4a-4c5d-8e9f-0a1b2c3d4e5f"
+
+boot_log = [
+    "<6>[    0.000000] Booting Linux on physical CPU 0x0000000000 [0x410fd034]",
+    "<6>[    2.104512] sdhci-arasan ff170000.mmc: allocated mmc-pwrseq",
+    "<3>[    2.104512] xilinx-zynqmp-dma fd500000.dma-controller: probe failed",
+]
+
+
+def dmesg_console(mocker, outputs):
+    console = mocker.Mock()
+    console.output.side_effect = [
+        f"m=DMESG_; cat ...\r\n{boot}\r\n" + "\r\n".join(lines) + "\r\n"
+        for boot, lines in outputs
+    ]
+    return console
+
+
+def test_parse_dmesg_record():
+    assert parse_dmesg_record(boot_log[1]) == DmesgRecord(
+        2.104512,
+        0,
+        6,
+        "sdhci-arasan",
+        "sdhci-arasan ff170000.mmc: allocated mmc-pwrseq",
+    )
+    assert parse_dmesg_record("<14>[   12.5] init: started").facility == 1
+    assert parse_dmesg_record("no record") is None
+
+
+def test_dmesg_log_incremental(mocker):
+    new = "<6>[   10.000000] macb ff0e0000.ethernet eth0: link up"
+    console = dmesg_console(
+        mocker,
+        [
+            (boot_id, boot_log),
+            (boot_id, boot_log[1:] + [new]),
+            ("1" + boot_id[1:], []),
+            ("1" + boot_id[1:], boot_log[:1]),
+        ],
+    )
+    dmesg = get_dmesg_log(console)
+    assert get_dmesg_log(console) is dmesg
+    assert len(dmesg.update()) == 3
+    assert "awk -F'[][]' '$2+0 >= 0.000000'" in console.runcmd.call_args[0][0]
+
+    # records at the cursor are sent again and dropped
+    assert [r.message for r in dmesg.update()] == [new[18:]]
+    assert "'$2+0 >= 2.104512'" in console.runcmd.call_args[0][0]
+    assert len(dmesg.search(driver="sdhci-arasan")) == 1
+    assert len(dmesg.search(level=3)) == 1
+    assert dmesg.search("link up", since=5)[0].driver == "macb"
+    assert dmesg.expect("probe failed").level == 3
+
+    # a new boot_id starts a new log, fetched again without the old cursor
+    assert len(dmesg.update()) == 1
+    assert len(dmesg.records) == 1
+    assert "'$2+0 >= 0.000000'" in console.runcmd.call_args[0][0]
+    with pytest.raises(AssertionError, match="not found in dmesg"):
+        dmesg.expect("link up", timeout=0)
+
+
+def test_dmesg_log_without_timestamps(mocker):
+    untimed = [line[:3] + line[18:] for line in boot_log]
+    console = dmesg_console(
+        mocker,
+        [
+            (boot_id, untimed[:2] + ["DMESG_LINES 2"]),
+            (boot_id, untimed[2:] + ["DMESG_LINES 3"]),
+        ],
+    )
+    dmesg = get_dmesg_log(console)
+    records = dmesg.update()
+    assert [r.timestamp for r in records] == [None, None]
+    assert records[1].driver == "sdhci-arasan"
+    assert [r.message for r in dmesg.update()] == [untimed[2][3:]]
+    assert "tail -n +3 /tmp/roast_dmesg" in console.runcmd.call_args[0][0]
+    assert dmesg.search("probe failed", since=5)[0].level == 3
@@ -0,0 +1,54 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import json
+import pytest
+from roast.testlibs.linux.iperf import parse_iperf3, run_iperf3
+
+report = {
+    "start": {"test_start": {"protocol": "TCP", "num_streams": 2, "bidir": 1}},
+    "intervals": [
+        {
+            "sum": {"start": 0, "end": 1, "bits_per_second": 9.4e8, "retransmits": 3},
+            "sum_bidir_reverse": {"start": 0, "end": 1, "bits_per_second": 9.1e8},
+        }
+    ],
+    "end": {
+        "sum_sent": {"bits_per_second": 9.4e8, "bytes": 117500000, "retransmits": 3},
+        "sum_received": {"bits_per_second": 9.39e8, "bytes": 117400000},
+        "sum_received_bidir_reverse": {"bits_per_second": 9.1e8},
+        "cpu_utilization_percent": {"host_total": 12.5},
+    },
+}
+
+
+def test_parse_iperf3():
+    text = f'm=IPERF_; iperf3 -c 10.0.0.1 -J; echo "${{m}}DONE"\r\n{json.dumps(report, indent=1)}'
+    result = parse_iperf3(text.replace("\n", "\r\n"))
+    assert (result.protocol, result.streams, result.bidir) == ("TCP", 2, True)
+    assert [i.reverse for i in result.intervals] == [False, True]
+    assert result.intervals[0].retransmits == 3
+    assert sorted(result.summaries) == [
+        "sum_received",
+        "sum_received_bidir_reverse",
+        "sum_sent",
+    ]
+    assert result.summaries["sum_sent"].retransmits == 3
+    assert result.cpu_utilization["host_total"] == 12.5
+    with pytest.raises(Exception, match="unable to connect"):
+        parse_iperf3('{"start": {}, "error": "unable to connect to server"}')
+
+
+def test_run_iperf3(mocker):
+    server, client = mocker.Mock(), mocker.Mock()
+    client.output.return_value = json.dumps(report)
+    result = run_iperf3(server, client, "10.0.0.1", parallel=2, bidir=True)
+    assert result.summaries["sum_received"].bits_per_second == 9.39e8
+    cmd = client.runcmd.call_args[0][0]
+    assert "iperf3 -c 10.0.0.1 -p 5201 -J -t 10 -P 2 --bidir" in cmd
+    server_cmds = [c[0][0] for c in server.runcmd.call_args_list]
+    assert server_cmds[0] == "iperf3 -s -1 -p 5201 > /tmp/iperf3_5201.log 2>&1 &"
+    assert "grep -q ':5201 '" in server_cmds[1]
+    assert server_cmds[2] == "pkill -f 'iperf3 -s -1 -p 5201' || true"
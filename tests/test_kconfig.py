@@ -0,0 +1,54 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import gzip
+import base64
+from roast.testlibs.linux import kconfig
+from roast.testlibs.linux.baselinux import BaseLinux
+from roast.testlibs.linux.kconfig import Kconfig, parse_kernel_config
+
+config = """\
+CONFIG_SPI=y
+CONFIG_SPI_CADENCE=m
+# CONFIG_MTD_SPI_NOR_USE_4K_SECTORS is not set
+CONFIG_LOG_BUF_SHIFT=17
+CONFIG_CMDLINE="console=ttyPS0"
+"""
+
+
+class KconfigLinux(Kconfig, BaseLinux):
+    pass
+
+
+def test_parse_kernel_config():
+    assert parse_kernel_config(config) == {
+        "CONFIG_SPI": "y",
+        "CONFIG_SPI_CADENCE": "m",
+        "CONFIG_MTD_SPI_NOR_USE_4K_SECTORS": "n",
+        "CONFIG_LOG_BUF_SHIFT": "17",
+        "CONFIG_CMDLINE": "console=ttyPS0",
+    }
+
+
+def test_kernel_config_cache(mocker):
+    mocker.patch.dict(kconfig.kconfig_cache, clear=True)
+    dump = base64.b64encode(gzip.compress(config.encode())).decode()
+    console = mocker.Mock()
+    console.output.side_effect = [
+        "Linux xilinx 5.15.36 #1 SMP",
+        f"ROAST_BATCH 0 BEGIN\r\n{dump}\r\nROAST_BATCH 0 END 0\r\n",
+    ] + ["Linux xilinx 5.15.36 #1 SMP"] * 3
+    linux = KconfigLinux(console, {})
+    assert linux.check_kernel_config(
+        ["CONFIG_SPI", "CONFIG_SPI_CADENCE", "CONFIG_MTD_SPI_NOR_USE_4K_SECTORS"]
+    ) == [True, True, False]
+    assert linux.query_kernel_config(["SPI", "CONFIG_USB"]) == {
+        "CONFIG_SPI": "y",
+        "CONFIG_USB": None,
+    }
+    assert list(linux.query_kernel_config(prefix="SPI_")) == ["CONFIG_SPI_CADENCE"]
+    assert linux.query_kernel_config(regex=r"SHIFT$") == {"CONFIG_LOG_BUF_SHIFT": "17"}
+    # config.gz fetched once, later queries only check the kernel build
+    assert console.runcmd.call_count == 5
@@ -0,0 +1,69 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import json
+import pytest
+from roast.testlibs.linux.mmc import MmcLinux, parse_mmc_ios
+
+ios = """clock:\t\t200000000 Hz
+actual clock:\t187500000 Hz
+vdd:\t\t21 (3.3 ~ 3.4 V)
+bus width:\t2 (4 bits)
+timing spec:\t6 (sd uhs SDR104)
+signal voltage:\t1 (1.80 V)"""
+
+fio = {
+    "jobs": [
+        {
+            "job options": {"rw": "read", "bs": "512k"},
+            "read": {"io_bytes": 1, "bw_bytes": 80000000, "iops": 152},
+        }
+    ]
+}
+
+
+def test_parse_mmc_ios():
+    assert parse_mmc_ios(ios) == (200000000, 187500000, 4, "sd uhs SDR104", "1.80 V")
+
+
+def mmc_console(batch_console, mounts="0:22 179:2"):
+    def _respond(cmd):
+        if "mountinfo" in cmd:
+            return ["179:0\r\n179:1", mounts, "Filename Type Size Used Priority"]
+        if "readlink -f /sys/block" in cmd:
+            return ["/sys/devices/platform/axi/ff170000.mmc/mmc_host/mmc1/mmc1:aaaa"]
+        if "/bind" in cmd:
+            return ["", "mmcblk1"]
+        if "/ios" in cmd:
+            return ["", ios]
+        if "fio " in cmd:
+            return [json.dumps(fio)]
+        return [""]
+
+    return batch_console(_respond)
+
+
+def test_mmc_mode_sweep(batch_console):
+    console = mmc_console(batch_console)
+    mmc = MmcLinux(console, {})
+    results = mmc.mmc_mode_sweep("/dev/mmcblk1", clocks=[50000000, 400000000, None])
+    cmds = [c[0][0] for c in console.runcmd.call_args_list]
+    assert len([c for c in cmds if "echo ff170000.mmc > $driver/unbind" in c]) == 3
+    clock_cmds = [c for c in cmds if "/sys/kernel/debug/mmc1/clock" in c]
+    assert len(clock_cmds) == 1 and "echo 50000000 >" in clock_cmds[0]
+    assert [(r.cap, r.read, r.write) for r in results] == [
+        (50000000, 80.0, None),
+        (None, 80.0, None),
+    ]
+    assert results[0].ios.timing == "sd uhs SDR104"
+
+
+def test_mmc_rebind_host_mounted(batch_console):
+    console = mmc_console(batch_console, mounts="0:22 179:1")
+    mmc = MmcLinux(console, {})
+    with pytest.raises(AssertionError, match="in use"):
+        mmc.mmc_rebind_host("/dev/mmcblk1")
+    cmds = [c[0][0] for c in console.runcmd.call_args_list]
+    assert not [c for c in cmds if "unbind" in c]
@@ -0,0 +1,39 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+from roast.testlibs.linux.spi import SpiLinux
+from roast.testlibs.linux.mtd import parse_time
+
+speedtest = """<6>[  100.000001] mtd_speedtest: MTD device: 2
+<6>[  100.000002] mtd_speedtest: eraseblock write speed is 1000 KiB/s
+<6>[  100.500000] mtd_speedtest: eraseblock read speed is 40000 KiB/s
+<6>[  101.000000] mtd_speedtest: page write speed is 500 KiB/s
+<6>[  101.500000] mtd_speedtest: 2 page read speed is 30000 KiB/s
+<6>[  102.000000] mtd_speedtest: erase speed is 2000 KiB/s
+<6>[  102.500000] mtd_speedtest: 4x multi-block erase speed is 2500 KiB/s
+<6>[  103.000000] mtd_speedtest: finished"""
+
+
+def test_mtd_speedtest(batch_console):
+    updates = iter(["", speedtest])
+
+    def _respond(cmd):
+        if "dmesg -r" in cmd:
+            return f"{next(updates)}\r\n"
+        if "/sys/class/mtd/mtd2" in cmd:
+            return ["16777216", "65536", "256", "0"]
+        return [""]
+
+    console = batch_console(_respond)
+    spi = SpiLinux(console, {})
+    speeds = {s.unit: s for s in spi.mtd_speedtest(2)}
+    assert sorted(speeds) == ["2 page", "4x multi-block", "eraseblock", "page"]
+    eraseblock = speeds["eraseblock"]
+    assert (eraseblock.erase, eraseblock.write, eraseblock.read) == (2.05, 1.02, 40.96)
+    assert eraseblock.block_size == 65536
+    assert speeds["2 page"].block_size == 512
+    assert speeds["4x multi-block"].block_size == 4 * 65536
+    assert parse_time("real\t0m 1.25s\r\nuser\t0m 0.00s") == 1.25
+    assert parse_time("real\t1m2.500s") == 62.5
@@ -0,0 +1,54 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import json
+from roast.testlibs.linux.ethernet import Ethernet
+from roast.testlibs.linux.netsweep import (
+    format_sweep_table,
+    parse_netperf,
+    sweep_points,
+)
+
+
+def test_sweep_points():
+    points = sweep_points([9000, 1500], ["tcp", "udp"], ["tx", "rx"], [1, 4])
+    assert len(points) == 16
+    mtus = [point.mtu for point in points]
+    assert mtus == [9000] * 8 + [1500] * 8
+    output = "MIGRATED TCP STREAM TEST\r\nThroughput,Local CPU Util %,Remote CPU Util %\r\n941.35,12.34,5.67\r\n"
+    assert parse_netperf(output) == (941.35, 12.34, 5.67)
+    assert parse_netperf("recv_response: connection reset") is None
+
+
+def test_network_sweep(mocker):
+    report = {
+        "start": {"test_start": {"protocol": "TCP", "num_streams": 1}},
+        "end": {
+            "sum_sent": {"bits_per_second": 9.4e8, "retransmits": 2},
+            "sum_received": {"bits_per_second": 9.3e8},
+            "cpu_utilization_percent": {"host_total": 40.5, "remote_total": 3.2},
+        },
+    }
+    terminal, client = mocker.Mock(), mocker.Mock()
+    terminal.output.return_value = json.dumps(report)
+    mocker.patch.object(Ethernet, "get_client_console")
+    eth = Ethernet(terminal, {}, "eth0")
+    eth.client_console = client
+    results = eth.network_sweep(
+        mtus=[1500, 9000], protocols=["tcp"], directions=["tx", "rx"]
+    )
+    cmds = [c[0][0] for c in terminal.runcmd.call_args_list]
+    assert len([cmd for cmd in cmds if "mtu" in cmd]) == 2
+    assert len([cmd for cmd in cmds if " -R" in cmd]) == 2
+    assert [(r.point.mtu, r.point.direction) for r in results] == [
+        (1500, "tx"),
+        (1500, "rx"),
+        (9000, "tx"),
+        (9000, "rx"),
+    ]
+    assert results[0].throughput == 930.0
+    assert (results[0].board_cpu, results[0].host_cpu) == (40.5, 3.2)
+    assert results[0].retransmits == 2
+    assert "930.0" in format_sweep_table(results).splitlines()[1]
@@ -0,0 +1,51 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import pytest
+from roast.testlibs.linux.i2c import I2cLinux
+from roast.testlibs.linux.pattern import (
+    block_size,
+    parse_cmp,
+    parse_size,
+    pattern_cmd,
+    pattern_params,
+)
+
+
+def test_pattern_params():
+    key, iv, skip = pattern_params(7, 0)
+    _, iv2, skip2 = pattern_params(7, 4100)
+    assert (len(key), skip, skip2) == (32, 0, 4)
+    assert int(iv2, 16) - int(iv, 16) == 256
+    assert pattern_params(8, 0)[0] != key
+    assert pattern_cmd(7, 4100, 10).endswith("| tail -c +5 | head -c 10")
+    assert (parse_size("4k"), parse_size("1M"), parse_size(512)) == (4096, 1 << 20, 512)
+    assert (block_size(0), block_size(4608), block_size(3)) == (65536, 512, 1)
+    assert parse_cmp("", 0) == (True, None)
+    assert parse_cmp("/tmp/f - differ: char 1235, line 3", 1, 100) == (False, 1334)
+    assert parse_cmp("cmp: EOF on - after byte 64, line 1", 1) == (False, 64)
+
+
+def test_eeprom_dd(batch_console):
+    def _respond(cmd):
+        if "cmp " not in cmd:
+            return [""]
+        return [(1, "/tmp/roast_pattern.fifo - differ: char 17, line 1")]
+
+    console = batch_console(_respond)
+    i2c = I2cLinux(console, {})
+    with pytest.raises(AssertionError, match="offset 16"):
+        i2c.eeprom_dd("/sys/bus/i2c/devices/0-0054/eeprom", bs="1", count="256")
+    cmds = [c[0][0] for c in console.runcmd.call_args_list]
+    # the eeprom is written and read with the requested block size
+    assert any(
+        "head -c 256 | dd of=/sys/bus/i2c/devices/0-0054/eeprom bs=1 seek=0" in cmd
+        for cmd in cmds
+    )
+    assert any(
+        "dd if=/sys/bus/i2c/devices/0-0054/eeprom bs=1 skip=0" in cmd for cmd in cmds
+    )
+    with pytest.raises(Exception, match="not a multiple"):
+        i2c.write_pattern("/tmp/f", 1, 16, offset=8, bs="16")
@@ -0,0 +1,44 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+from roast.testlibs.linux.ethernet import Ethernet
+from roast.testlibs.linux.pktgen import parse_pktgen_device, pktgen_config
+
+device_file = """Params: count 1000  min_pkt_size: 64  max_pkt_size: 64
+Current:
+     pkts-sofar: 1000  errors: 0
+Result: OK: 1234(c1200+d34) usec, 1000 (64byte,0frags)
+  810372pps 414Mb/sec (414910464bps) errors: 2"""
+
+
+def test_parse_pktgen():
+    thread = parse_pktgen_device("eth0@0", device_file)
+    assert thread == ("eth0@0", 1000, 1234, 810372, 414.91, 2)
+    assert parse_pktgen_device("eth0@0", "Result: Idle") is None
+    cmds = pktgen_config("eth0", 4, 2, ["count 10"])
+    assert "echo 'add_device eth0@3' > /proc/net/pktgen/kpktgend_3" in cmds
+    assert "echo 'queue_map_min 1' > /proc/net/pktgen/eth0@3" in cmds
+
+
+def test_pktgen_sweep(batch_console):
+    def _respond(cmd):
+        if "nproc" in cmd:
+            return ["", "2", "1"]
+        if "cat /proc/net/pktgen/eth0@" in cmd:
+            return [device_file] * 2
+        return [""] * 50
+
+    console = batch_console(_respond)
+    eth = Ethernet(console, {}, "eth0")
+    results = eth.pktgen(sizes=[64, 1500], bursts=[1, 8])
+    assert [(r.size, r.burst) for r in results] == [
+        (64, 1),
+        (64, 8),
+        (1500, 1),
+        (1500, 8),
+    ]
+    assert results[0].pps == 2 * 810372
+    assert results[0].errors == 4
+    assert len(results[0].threads) == 2
@@ -0,0 +1,85 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import pytest
+from roast.component.board.sd import decompress_cmd, stream_flash, FlashResult
+
+sha = "ab" * 32
+
+
+def flash_console(mocker, readback):
+    console = mocker.Mock()
+    outputs = {
+        "cat /tmp/roast_flash.size": "4194304\r\n",
+        "cat /tmp/roast_flash.sha256": f"{sha}  -\r\n",
+        "sha256sum": f"{readback}  -\r\n",
+        "wc -l": "0\r\n",
+    }
+    last = []
+
+    def _runcmd(cmd, **kwargs):
+        last[:] = [cmd]
+
+    def _output():
+        for key, value in outputs.items():
+            if last[0].endswith(key):
+                return value
+        return ""
+
+    console.runcmd.side_effect = _runcmd
+    console.output.side_effect = _output
+    return console
+
+
+def test_decompress_cmd():
+    assert decompress_cmd("sdimage.wic.xz") == "xzcat"
+    assert decompress_cmd("rootfs.cpio.gz") == "zcat"
+    assert decompress_cmd("sdimage.wic.zst") == "zstdcat"
+    assert decompress_cmd("sdimage.wic") == "cat"
+
+
+def test_stream_flash(mocker):
+    console = flash_console(mocker, sha)
+    result = stream_flash(console, "/nfsroot/sd.wic.zst", "/dev/mmcblk0", 600)
+    assert isinstance(result, FlashResult)
+    assert (result.image, result.size, result.sha256) == (
+        "/nfsroot/sd.wic.zst",
+        4194304,
+        sha,
+    )
+    cmds = [call[0][0] for call in console.runcmd.call_args_list]
+    assert cmds[0].startswith("zstdcat /nfsroot/sd.wic.zst | tee /tmp/roast_flash.tee")
+    assert "dd of=/dev/mmcblk0 bs=32M conv=fsync" in cmds[0]
+    assert "head -c 4194304 | sha256sum" in cmds[-2]
+
+
+def test_stream_flash_mismatch(mocker):
+    console = flash_console(mocker, "cd" * 32)
+    with pytest.raises(Exception, match="sha256 mismatch"):
+        stream_flash(console, "/nfsroot/sd.wic", "/dev/mmcblk0", 600)
+
+
+def test_bmap_flash(mocker):
+    from roast.component.bmap import Bmap, BmapRange
+    from roast.component.board.sd import bmap_flash
+
+    console = flash_console(mocker, sha)
+    bmap = Bmap(4096 * 8, 4096, "sha256", [BmapRange(0, 1, sha), BmapRange(7, 7, sha)])
+    result = bmap_flash(console, "/nfsroot/sd.wic.xz", "/dev/mmcblk0", bmap, 600)
+    assert result.size == 3 * 4096
+    cmds = [call[0][0] for call in console.runcmd.call_args_list]
+    assert f"'0 8192 {sha}' '28672 4096 {sha}' >> /tmp/roast_bmap.ranges" in cmds[2]
+    assert cmds[3].startswith("xzcat /nfsroot/sd.wic.xz | { pos=0;")
+    assert "oflag=seek_bytes seek=$offset" in cmds[3]
+    assert "sha256sum" in cmds[5]
+
+    console.runcmd.reset_mock()
+    ranges = [BmapRange(idx * 2, idx * 2, sha) for idx in range(200)]
+    bmap_flash(
+        console, "/nfsroot/sd.wic", "/dev/mmcblk0", bmap._replace(ranges=ranges), 600
+    )
+    cmds = [call[0][0] for call in console.runcmd.call_args_list]
+    assert max(len(cmd) for cmd in cmds) < 4095
+    assert sum(cmd.count(sha) for cmd in cmds if "printf" in cmd) == 200
@@ -0,0 +1,152 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import gzip
+import base64
+import struct
+from roast.testlibs.linux.baselinux import BaseLinux
+from roast.testlibs.linux.dts import DtsLinux
+from roast.testlibs.linux.fileops import FileOps
+from roast.testlibs.linux.sysdevices import SysDevices
+from roast.testlibs.linux.snapshot import (
+    SysSnapshot,
+    parse_fdt,
+    parse_sysfs_links,
+)
+
+tree = {
+    "compatible": b"xlnx,zynqmp\0",
+    "axi": {
+        "i2c@ff020000": {
+            "compatible": b"cdns,i2c-r1p14\0",
+            "status": b"okay\0",
+        },
+        "i2c@ff030000": {
+            "compatible": b"cdns,i2c-r1p14\0",
+            "status": b"disabled\0",
+        },
+        "dma-controller@fd500000": {"compatible": b"xlnx,zynqmp-dma-1.0\0"},
+    },
+}
+
+class_listing = """\
+class/i2c-adapter:
+lrwxrwxrwx 1 root root 0 Jan  1 00:00 i2c-0 -> ../../devices/platform/axi/ff020000.i2c/i2c-0
+class/dma:
+lrwxrwxrwx 1 root root 0 Jan  1 00:00 dma0chan0 -> ../../devices/platform/axi/fd500000.dma-controller/dma/dma0chan0
+"""
+
+
+def build_fdt(tree):
+    strings = b""
+    offsets = {}
+
+    def node(name, content):
+        nonlocal strings
+        data = struct.pack(">I", 1) + name.encode() + b"\0"
+        data += b"\0" * (-len(data) % 4)
+        for key, value in content.items():
+            if isinstance(value, bytes):
+                if key not in offsets:
+                    offsets[key] = len(strings)
+                    strings += key.encode() + b"\0"
+                data += struct.pack(">3I", 3, len(value), offsets[key]) + value
+                data += b"\0" * (-len(data) % 4)
+        for key, value in content.items():
+            if isinstance(value, dict):
+                data += node(key, value)
+        return data + struct.pack(">I", 2)
+
+    dt_struct = node("", tree) + struct.pack(">I", 9)
+    header = struct.pack(">4I", 0xD00DFEED, 0, 40, 40 + len(dt_struct))
+    return header + b"\0" * 24 + dt_struct + strings
+
+
+def test_sys_snapshot():
+    snapshot = SysSnapshot(parse_fdt(build_fdt(tree)), parse_sysfs_links(class_listing))
+    assert snapshot.nodes_by_compatible("cdns,i2c") == [
+        "axi/i2c@ff020000",
+        "axi/i2c@ff030000",
+    ]
+    assert snapshot.glob("axi/i2c*/compatible") == [
+        "axi/i2c@ff020000/compatible",
+        "axi/i2c@ff030000/compatible",
+    ]
+    assert snapshot.status("axi/i2c@ff020000")
+    assert not snapshot.status("axi/i2c@ff030000")
+    assert snapshot.status("axi/dma-controller@fd500000")
+    assert snapshot.entries("") == ["axi", "compatible"]
+    assert snapshot.device_path("I2C-0") == (
+        "/sys/devices/platform/axi/ff020000.i2c/i2c-0"
+    )
+
+
+class DtsDevices(DtsLinux, SysDevices, BaseLinux):
+    pass
+
+
+def snapshot_frames():
+    dump = base64.b64encode(gzip.compress(build_fdt(tree))).decode()
+    dump = "\r\n".join(dump[i : i + 76] for i in range(0, len(dump), 76))
+    frames = [(0, "1234-boot"), (0, dump), (0, class_listing.replace("\n", "\r\n"))]
+    return "".join(
+        f"ROAST_BATCH {idx} BEGIN\r\n{text}\r\nROAST_BATCH {idx} END {status}\r\n"
+        for idx, (status, text) in enumerate(frames)
+    )
+
+
+def test_dts_queries_from_snapshot(mocker):
+    console = mocker.Mock()
+    console.output.side_effect = [
+        snapshot_frames(),
+        "1234-boot",
+        "1234-boot",
+        "1234-boot",
+        "1234-boot",
+    ]
+    linux = DtsDevices(console, {})
+    dts_list = linux.list_dts_parameters("axi/i2c*", parameter="compatible")
+    assert dts_list == [
+        "/sys/firmware/devicetree/base/axi/i2c@ff020000/compatible",
+        "/sys/firmware/devicetree/base/axi/i2c@ff030000/compatible",
+    ]
+    nodes = linux.get_dts_nodes(dts_list, "cdns")
+    assert nodes == ["ff020000", "ff030000"]
+    assert linux.check_dt_node_status(dt_nodes=["axi/i2c@ff030000"]) == [False]
+    assert linux.get_channels(nodes, "i2c") == ["i2c-0"]
+    # bus names match like in the find output of the console path
+    assert linux.get_dtsbus_node(bus_req="ax") == "/ax/"
+    assert console.runcmd.call_count == 5
+
+    linux.invalidate_snapshot()
+    assert linux.snapshot is None
+
+
+class OverlayDevices(FileOps, DtsLinux, BaseLinux):
+    pass
+
+
+def test_overlay_nodes_from_live_tree(mocker):
+    console = mocker.Mock()
+    overlay_node = "/sys/firmware/devicetree/base/axi/gpio@a0000000/compatible"
+    console.output.side_effect = [
+        snapshot_frames(),
+        "1234-boot",
+        "1234-boot",
+        "1234-boot",
+        overlay_node,
+        overlay_node,
+    ]
+    linux = OverlayDevices(console, {})
+    assert linux.sys_snapshot()
+    assert not linux.sys_snapshot().glob("axi/gpio*")
+    linux.load_bitstream("/lib/firmware/pl.bit.bin", "pl.dtbo")
+    # the boot time fdt has no overlay nodes, the live tree is queried
+    dts_list = linux.list_dts_parameters("axi/gpio*", parameter="compatible")
+    assert dts_list == [overlay_node]
+    assert "ls /sys/firmware/devicetree/base/axi/gpio*" in (
+        console.runcmd.call_args[0][0]
+    )
+    assert linux.snapshot is None
@@ -0,0 +1,89 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import os
+from roast.component.sstate import SstateManager, SstateStats, parse_sstate_summary
+
+summary = (
+    "NOTE: Executing Tasks\n"
+    "Sstate summary: Wanted 200 Local 120 Mirrors 30 Missed 50 Current 10 "
+    "(75% match, 80% complete)\n"
+)
+
+
+def test_parse_sstate_summary():
+    assert parse_sstate_summary("no summary") is None
+    assert parse_sstate_summary(summary) == SstateStats(200, 120, 30, 50, 10, 75.0)
+    network = summary.replace("Mirrors", "Network")
+    assert parse_sstate_summary(summary + network).wanted == 400
+    old = "Sstate summary: Wanted 100 Found 60 Missed 40 Current 5 (60% match)"
+    assert parse_sstate_summary(old) == SstateStats(100, 60, 0, 40, 5, 60.0)
+
+
+def test_sstate_inject(tmp_path):
+    config = {
+        "sstate_dir": str(tmp_path / "sstate"),
+        "sstate_dl_dir": str(tmp_path / "downloads"),
+        "sstate_mirror": "http://mirror/sstate",
+        "sstate_dl_mirror": "/mirror/downloads",
+    }
+    assert SstateManager.enabled(config)
+    assert not SstateManager.enabled({})
+    conf = tmp_path / "auto.conf"
+    SstateManager(config).inject(str(conf))
+    lines = conf.read_text().splitlines()
+    assert f'SSTATE_DIR = "{tmp_path}/sstate"' in lines
+    assert f'DL_DIR = "{tmp_path}/downloads"' in lines
+    assert (
+        'SSTATE_MIRRORS = "file://.* http://mirror/sstate/PATH;downloadfilename=PATH"'
+        in lines
+    )
+    assert lines[3].startswith('PREMIRRORS:prepend = "git://.*/.* file:///mirror/')
+    assert os.path.isdir(tmp_path / "sstate")
+
+    bb = tmp_path / "sources" / "core" / "bitbake" / "lib" / "bb"
+    bb.mkdir(parents=True)
+    (bb / "__init__.py").write_text('__version__ = "1.46.0"\n')
+    old_conf = tmp_path / "old.conf"
+    SstateManager(config).inject(str(old_conf), search_dirs=[str(tmp_path)])
+    assert "PREMIRRORS_prepend = " in old_conf.read_text()
+
+
+def test_sstate_seed_prune(tmp_path):
+    local = tmp_path / "build" / "sstate-cache"
+    os.makedirs(local / "ab")
+    for idx in range(4):
+        (local / "ab" / f"sstate:obj{idx}.tgz").write_bytes(b"x" * 1024)
+    config = {
+        "sstate_mirror": str(tmp_path / "mirror"),
+        "sstate_seed": True,
+        "sstate_max_gb": 2048 / (1 << 30),
+    }
+    sstate = SstateManager(config)
+    assert sstate.seed(str(local)) == 4
+    assert sstate.seed(str(local)) == 0
+
+    # least recently accessed objects go first
+    for idx in range(4):
+        os.utime(local / "ab" / f"sstate:obj{idx}.tgz", (1000 + idx, 1000 + idx))
+    assert sstate.prune(str(local)) == 2048
+    assert sorted(os.listdir(local / "ab")) == ["sstate:obj2.tgz", "sstate:obj3.tgz"]
+
+
+def test_sstate_stats(tmp_path):
+    cooker = tmp_path / "tmp" / "log" / "cooker" / "zynqmp"
+    os.makedirs(cooker)
+    (cooker / "old.log").write_text(summary)
+    os.utime(cooker / "old.log", (100, 100))
+    (cooker / "new.log").write_text(summary.replace("Wanted 200", "Wanted 300"))
+    sstate = SstateManager({"sstate_dir": str(tmp_path / "sstate")})
+    assert sstate.stats(str(tmp_path / "tmp"), since=1000).wanted == 300
+    assert sstate.post_build(str(tmp_path / "tmp"), str(tmp_path)).wanted == 500
+    # a split build reports the summaries of every TMPDIR
+    split = tmp_path / "tmp-1" / "log" / "cooker" / "zynqmp"
+    os.makedirs(split)
+    (split / "new.log").write_text(summary)
+    tmp_dirs = [str(tmp_path / "tmp"), str(tmp_path / "tmp-1")]
+    assert sstate.stats(tmp_dirs, since=1000).wanted == 500
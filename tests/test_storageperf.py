@@ -0,0 +1,80 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import json
+from roast.testlibs.linux.sata import SataLinux
+from roast.testlibs.linux.storageperf import parse_hdparm, parse_iozone
+
+fio_report = {
+    "fio version": "fio-3.30",
+    "global options": {},
+    "jobs": [
+        {
+            "jobname": "roast",
+            "job options": {"rw": "randrw", "bs": "4k", "iodepth": "32"},
+            "read": {
+                "io_bytes": 409600,
+                "bw_bytes": 52428800,
+                "iops": 12800.5,
+                "clat_ns": {"percentile": {"50.000000": 2400, "99.000000": 15360}},
+            },
+            "write": {
+                "io_bytes": 409600,
+                "bw": 20480,
+                "iops": 5120,
+                "clat": {"percentile": {"99.000000": 880}},
+            },
+        }
+    ],
+}
+
+iozone_output = """\
+\tIozone: Performance Test of File I/O
+                                                              random    random     bkwd    record    stride
+              kB  reclen    write  rewrite    read    reread    read     write     read   rewrite      read   fwrite frewrite    fread  freread
+            1024       4   102400   204800   409600   419430   307200    51200
+iozone test complete."""
+
+hdparm_output = """/dev/sda:
+ Timing cached reads:   1234 MB in  2.00 seconds = 617.12 MB/sec
+ Timing buffered disk reads: 300 MB in  3.01 seconds = 99.67 MB/sec"""
+
+
+def test_parse_legacy_tools():
+    results = parse_iozone(iozone_output.replace("\n", "\r\n"), "/mnt")
+    assert [(r.pattern, r.direction) for r in results] == [
+        ("write", "write"),
+        ("rewrite", "write"),
+        ("read", "read"),
+        ("reread", "read"),
+        ("randread", "read"),
+        ("randwrite", "write"),
+    ]
+    assert results[0].bandwidth == 104.86
+    assert results[0].block_size == "4k"
+    hdparm = parse_hdparm(hdparm_output, "/dev/sda")
+    assert [(r.pattern, r.bandwidth) for r in hdparm] == [
+        ("cached_read", 617.12),
+        ("buffered_read", 99.67),
+    ]
+
+
+def test_fio_perf(mocker):
+    console = mocker.Mock()
+    console.output.return_value = (
+        f"ROAST_BATCH 0 BEGIN\r\n{json.dumps(fio_report, indent=1)}\r\n"
+        "ROAST_BATCH 0 END 0\r\n"
+    )
+    sata = SataLinux(console, {})
+    results = sata.fio_perf("/dev/sda", patterns=["randrw"], iodepths=[32])
+    cmds = [c[0][0] for c in console.runcmd.call_args_list]
+    assert any(
+        "--filename=/dev/sda --rw=randrw --bs=128k --iodepth=32" in c for c in cmds
+    )
+    assert len(results) == 4
+    read, write = results[:2]
+    assert (read.direction, read.bandwidth, read.iops) == ("read", 52.43, 12800.5)
+    assert read.latency == {"p50": 2.4, "p99": 15.36}
+    assert (write.bandwidth, write.latency) == (20.97, {"p99": 880})
@@ -0,0 +1,110 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import pytest
+from array import array
+from box import Box
+from roast.exceptions import ExpectError
+from roast.component.xsdb.xsdb import Xsdb, XsdbBatch, XsdbResult
+
+
+def xsdb_session(mocker, output=""):
+    mocker.patch.object(Xsdb, "__init__", return_value=None)
+    xsdb = Xsdb()
+    xsdb.batch_line_max = 3000
+    xsdb.runcmd = mocker.Mock("xsdb runcmd")
+    xsdb.expect = mocker.Mock("xsdb expect")
+    xsdb.terminal = Box(before=output)
+    return xsdb
+
+
+def test_xsdb_batch_tcl(mocker):
+    xsdb = xsdb_session(mocker)
+    tcl = xsdb._batch_tcl([("mwr 0xff 0x1", []), ("mrd -value 0xff 1", [])], 2)
+    assert "set roast_rc [catch {mwr 0xff 0x1} roast_res]" in tcl
+    assert 'puts "XSDB_RESULT 2 $roast_rc' in tcl
+    assert 'puts "XSDB_RESULT 3 $roast_rc' in tcl
+    assert tcl.endswith('set roast_n 4; puts "XSDB_BATCH_END $roast_n"')
+    assert "\n" not in tcl
+
+
+def test_xsdb_run_batch(mocker):
+    output = (
+        "set roast_rc ... XSDB_RESULT 0 $roast_rc ...\r\n"
+        "XSDB_RESULT 0 0 \r\n"
+        "XSDB_RESULT 1 0 0x1ff\r\n"
+        "XSDB_RESULT 2 1 Memory write error at 0xFF.\\nBlocked address\r\n"
+    )
+    xsdb = xsdb_session(mocker, output)
+    batch = xsdb.batch(raise_on_error=False)
+    assert isinstance(batch, XsdbBatch)
+    batch.targets("PSU").mrd("0xffca0038").mwr("0xff", "0x0")
+    results = batch.run()
+    xsdb.runcmd.assert_called_once()
+    xsdb.expect.assert_called_once()
+    assert results[0] == XsdbResult(xsdb.targets_cmd("PSU"), True, "")
+    assert results[1].ok and results[1].output == "0x1ff"
+    assert not results[2].ok
+    assert results[2].output == "Memory write error at 0xFF.\nBlocked address"
+    assert len(batch) == 0
+
+
+def test_xsdb_run_batch_failure(mocker):
+    xsdb = xsdb_session(mocker, "XSDB_RESULT 0 0 \r\n")
+    with pytest.raises(ExpectError, match="No result received"):
+        xsdb.run_batch([("mwr 0x0 0x0", []), ("mwr 0x4 0x0", [])])
+
+
+def test_xsdb_run_batch_chunks(mocker):
+    xsdb = xsdb_session(mocker)
+    xsdb.batch_line_max = 250
+    cmds = [(f"mwr 0x{addr:x} 0x0", []) for addr in range(4)]
+    xsdb.run_batch(cmds, raise_on_error=False)
+    assert xsdb.runcmd.call_count == 2
+
+
+def test_xsdb_write_read_batched(mocker):
+    xsdb = xsdb_session(mocker, "XSDB_RESULT 0 0 \r\nXSDB_RESULT 1 0 \r\n")
+    xsdb.write({"0xFFD80118": "0x00800000", "0xFFD80120": "0x00800000"})
+    xsdb.runcmd.assert_called_once()
+    assert "mwr  0xFFD80118 0x00800000" in xsdb.runcmd.call_args[0][0]
+
+    xsdb.terminal.before = "XSDB_RESULT 0 0 1\r\nXSDB_RESULT 1 0 2 3\r\n"
+    assert xsdb.read(["0x0", "0x4"], 2) == {"0x0": ["1"], "0x4": ["2", "3"]}
+
+
+def test_xsdb_read_many(mocker):
+    xsdb = xsdb_session(
+        mocker, "XSDB_RESULT 0 0 2147483648\r\nXSDB_RESULT 1 0 0x1ff\r\n"
+    )
+    assert xsdb.read_many(["0xFF0A0344", "0xffca0038"]) == {
+        "0xFF0A0344": 0x80000000,
+        "0xffca0038": 0x1FF,
+    }
+    xsdb.runcmd.assert_called_once()
+
+
+def test_xsdb_read_block(mocker):
+    xsdb = xsdb_session(mocker, "XSDB_RESULT 0 0 \r\n")
+
+    def _mrd_bin(cmd, **kwargs):
+        bin_file = cmd.split("-file ")[1].split()[0]
+        with open(bin_file, "wb") as f:
+            f.write(array("I", [1, 2, 0xDEADBEEF]).tobytes())
+
+    xsdb.runcmd.side_effect = _mrd_bin
+    words = xsdb.read_block("0xf2019000", 3)
+    assert isinstance(words, memoryview)
+    assert words.tolist() == [1, 2, 0xDEADBEEF]
+
+    # remote xsdb host: nothing lands in the local file, values are read instead
+    xsdb.runcmd.side_effect = None
+    xsdb.terminal.before = "XSDB_RESULT 0 0 \r\n"
+    mocker.patch.object(
+        xsdb,
+        "run_batch",
+        side_effect=[[], [XsdbResult("mrd", True, "1 2 3735928559")]],
+    )
+    assert xsdb.read_block("0xf2019000", 3).tolist() == [1, 2, 0xDEADBEEF]
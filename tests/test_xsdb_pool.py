@@ -0,0 +1,77 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import pytest
+import roast.component.xsdb.pool
+from roast.component.xsdb.pool import XsdbPool, get_xsdb
+
+config = {"vitisPath": "/tools/Vitis"}
+
+
+@pytest.fixture
+def xsdb_cls(mocker):
+    return mocker.patch.object(
+        roast.component.xsdb.pool,
+        "Xsdb",
+        side_effect=lambda *args, **kwargs: mocker.Mock(),
+    )
+
+
+def test_xsdb_pool_reuse(xsdb_cls):
+    pool = XsdbPool()
+    xsdb = pool.acquire(config, hwserver="host1")
+    pool.release(xsdb)
+    assert pool.acquire(config, hwserver="host1") is xsdb
+    xsdb.alive.assert_called_once_with(timeout=10)
+    xsdb.reconnect.assert_called_once()
+    assert xsdb_cls.call_count == 1
+
+    # leased sessions are never shared, other hw_servers get their own session
+    assert pool.acquire(config, hwserver="host1") is not xsdb
+    assert pool.acquire(config, hwserver="host2") is not xsdb
+    assert xsdb_cls.call_count == 3
+
+
+def test_xsdb_pool_dead_session(xsdb_cls):
+    pool = XsdbPool()
+    with pool.lease(config, hwserver="host1") as xsdb:
+        pass
+    xsdb.alive.return_value = None
+    assert pool.acquire(config, hwserver="host1") is not xsdb
+    xsdb.exit.assert_called_once()
+    assert len(pool) == 1
+
+
+def test_xsdb_pool_limits(mocker, xsdb_cls):
+    pool = XsdbPool(max_sessions=2, idle_timeout=60)
+    xsdb1 = pool.acquire(config, hwserver="host1")
+    xsdb2 = pool.acquire(config, hwserver="host2")
+    with pytest.raises(Exception, match="XSDB pool exhausted"):
+        pool.acquire(config, hwserver="host3")
+
+    # least recently used idle session makes room
+    pool.release(xsdb1)
+    pool.acquire(config, hwserver="host3")
+    xsdb1.exit.assert_called_once()
+
+    pool.release(xsdb2)
+    monotonic = roast.component.xsdb.pool.time.monotonic() + 61
+    mocker.patch.object(
+        roast.component.xsdb.pool.time, "monotonic", return_value=monotonic
+    )
+    pool.evict_idle()
+    xsdb2.exit.assert_called_once()
+    assert len(pool) == 1
+
+
+def test_get_xsdb(mocker, xsdb_cls):
+    pool = mocker.patch.object(roast.component.xsdb.pool, "xsdb_pool")
+    get_xsdb(config, hwserver="host1")
+    xsdb_cls.assert_called_with(config, hwserver="host1", port="3121")
+    pool.acquire.assert_not_called()
+
+    get_xsdb({**config, "xsdb_pool": True, "xsdb_pool_max_sessions": 8}, "host1")
+    pool.acquire.assert_called_once()
+    assert pool.max_sessions == 8
@@ -0,0 +1,176 @@
+#
+# Copyright (c) 2022 Xilinx, Inc. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+
+import os
+import pytest
+import subprocess
+from roast.component.yocto import (
+    Yocto,
+    RecipeResult,
+    parse_bitbake_log,
+    resolve_script,
+)
+
+bitbake_log = """\
+1000 Loading cache: 100% |####| Time: 0:00:01
+1010 NOTE: recipe busybox-1.35.0-r0: task do_compile: Started
+1040 NOTE: recipe busybox-1.35.0-r0: task do_compile: Succeeded
+1045 NOTE: recipe core-image-minimal-1.0-r0: task do_rootfs: Started
+1100 NOTE: recipe core-image-minimal-1.0-r0: task do_rootfs: Succeeded
+1050 NOTE: recipe linux-xlnx-6.1.30-xilinx-v2023.2+git-r0: task do_compile: Failed
+1051 ERROR: Task (/layers/linux-xlnx_2023.2.bb:do_compile) failed with exit code '1'
+"""
+
+
+def yocto_builder(mocker, tmp_path, text):
+    mocker.patch.object(Yocto, "__init__", return_value=None)
+    yocto = Yocto()
+    yocto.config = {}
+    yocto.yocto_build_dir = str(tmp_path)
+    yocto.yocto_conf_dir = str(tmp_path / "conf")
+    yocto.setupfile = None
+    yocto.console = mocker.Mock("yocto console")
+
+    def _runcmd(cmd, **kwargs):
+        if "tee" in cmd:
+            with open(cmd.split("tee ")[-1], "w") as f:
+                f.write(text)
+        elif "bitbake -g" in cmd:
+            (tmp_path / "pn-buildlist").write_text("busybox\ncore-image-minimal\n")
+
+    yocto.console.runcmd = mocker.Mock(side_effect=_runcmd)
+    return yocto
+
+
+def test_parse_bitbake_log():
+    assert parse_bitbake_log(bitbake_log) == {
+        "busybox": (1010, 1040, False),
+        "core-image-minimal": (1045, 1100, False),
+        "linux-xlnx": (1050, 1050, True),
+    }
+
+
+def test_yocto_image_builder(mocker, tmp_path):
+    (tmp_path / "conf").mkdir()
+    yocto = yocto_builder(mocker, tmp_path, bitbake_log)
+    yocto.config = {"yocto_bb_number_threads": 16, "yocto_parallel_make": 8}
+    mocker.patch("roast.component.yocto.time.time", return_value=1000)
+    with pytest.raises(AssertionError, match="bitbake failed for linux-xlnx"):
+        yocto.image_builder(["core-image-minimal", "linux-xlnx"])
+
+    cmd = yocto.console.runcmd.call_args_list[0][0][0]
+    assert "bitbake -k core-image-minimal linux-xlnx 2>&1" in cmd
+    assert yocto.recipe_results == {
+        "core-image-minimal": RecipeResult("core-image-minimal", True, 55),
+        "linux-xlnx": RecipeResult("linux-xlnx", False, 0),
+    }
+    yocto.config["yocto_parallel_make"] = 4
+    yocto.set_build_tuning()
+    auto_conf = (tmp_path / "conf" / "auto.conf").read_text().splitlines()
+    assert auto_conf == [
+        "# roast build tuning begin",
+        'BB_NUMBER_THREADS = "16"',
+        'PARALLEL_MAKE = "-j 4"',
+        "# roast build tuning end",
+    ]
+
+
+def test_yocto_image_builder_split(mocker, tmp_path):
+    yocto = yocto_builder(mocker, tmp_path, "")
+    yocto.setupfile = str(tmp_path / "setupsdk")
+    yocto.sstate = None
+    bitbake = mocker.patch.object(
+        Yocto,
+        "_bitbake",
+        side_effect=lambda console, build_dir, group, timeout: {
+            recipe: RecipeResult(recipe, True, 1) for recipe in group
+        },
+    )
+    mocker.patch("roast.component.yocto.Xexpect")
+    (tmp_path / "conf").mkdir()
+    recipes = ["a", "b", "c"]
+    results = yocto.image_builder(recipes, timeout=10, builds=2)
+    assert list(results) == recipes
+    groups = sorted(call[0][2] for call in bitbake.call_args_list)
+    assert groups == [["a", "c"], ["b"]]
+    assert (tmp_path.parent / f"{tmp_path.name}-0" / "conf" / "auto.conf").exists()
+
+    # every group deploys into its own TMPDIR
+    for idx in range(2):
+        images = (
+            tmp_path.parent / f"{tmp_path.name}-{idx}" / "tmp" / "deploy" / "images"
+        )
+        images.mkdir(parents=True)
+        (images / f"image-{idx}.wic").write_text(str(idx))
+    stale = tmp_path / "tmp" / "deploy" / "images"
+    stale.mkdir(parents=True)
+    (stale / "image-stale.wic").write_text("stale")
+    yocto.yocto_tmp_dir = str(tmp_path / "tmp")
+    yocto.yocto_ws_deploy_dir = str(tmp_path / "tmp" / "deploy")
+    yocto.imagesDir = str(tmp_path / "images")
+    yocto.config = {"sd_flash_bmap": False}
+    assert yocto.deploy()
+    assert sorted(os.listdir(tmp_path / "images" / "images")) == [
+        "image-0.wic",
+        "image-1.wic",
+    ]
+
+
+def test_yocto_incremental_sync(mocker, tmp_path):
+    yocto = yocto_builder(mocker, tmp_path, "")
+    yocto.repo_path = "repo"
+    yocto.workDir = str(tmp_path)
+    state = {"sources/poky": "a" * 40, "sources/meta-xilinx": "b" * 40}
+
+    def _runcmd(cmd, **kwargs):
+        if "forall -j" in cmd:
+            (tmp_path / ".roast_repo_state.paths").write_text("\n".join(state))
+            (tmp_path / ".roast_repo_state").write_text(
+                "".join(f"{path} {rev}\n" for path, rev in state.items())
+            )
+
+    yocto.console.runcmd = mocker.Mock(side_effect=_runcmd)
+    assert yocto.incremental_sync() == ["sources/meta-xilinx", "sources/poky"]
+    cmds = [call[0][0] for call in yocto.console.runcmd.call_args_list]
+    assert any("git clean -fdx" in cmd for cmd in cmds)
+    assert "repo sync -d -j 20" in cmds
+
+    yocto.console.runcmd.reset_mock()
+    assert yocto.incremental_sync() == []
+    assert yocto.console.runcmd.call_count == 1
+
+    state["sources/poky"] = "c" * 40
+    yocto.config = {"yocto_repo_jobs": 4}
+    assert yocto.incremental_sync() == ["sources/poky"]
+    cmds = [call[0][0] for call in yocto.console.runcmd.call_args_list]
+    assert "repo forall sources/poky -c 'git reset --hard -q'" in cmds
+    assert cmds[-1] == "repo sync -d -j 4 sources/poky"
+
+
+def test_repo_resolve_script(tmp_path):
+    remote = tmp_path / "remote"
+    git = ["git", "-C", str(remote), "-c", "user.name=r", "-c", "user.email=r@r"]
+    subprocess.run(["git", "init", "-q", str(remote)], check=True)
+    script = tmp_path / "resolve.sh"
+    script.write_text("".join(f"{line}\n" for line in resolve_script))
+    shas = {}
+    for name in ("main", "feature/main", "v1"):
+        subprocess.run(git + ["commit", "-q", "--allow-empty", "-m", name], check=True)
+        head = subprocess.run(git + ["rev-parse", "HEAD"], capture_output=True)
+        shas[name] = head.stdout.decode().strip()
+        subprocess.run(git + ["branch", "-f", name], check=True)
+    subprocess.run(git + ["tag", "-a", "-m", "tag", "v1", shas["main"]], check=True)
+
+    def _resolve(rev):
+        env = dict(os.environ, REPO_REMOTE=str(remote), REPO_RREV=rev)
+        proc = subprocess.run(["sh", str(script)], env=env, capture_output=True)
+        return proc.stdout.decode().strip()
+
+    assert _resolve("main") == shas["main"]
+    assert _resolve("feature/main") == shas["feature/main"]
+    assert _resolve("v1") == shas["v1"]
+    assert _resolve("refs/tags/v1") == shas["main"]
+    assert _resolve("a" * 40) == "a" * 40
+    assert _resolve("missing") == ""